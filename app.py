@@ -1,9 +1,14 @@
 import streamlit as st
-from logic.data_loader import load_turns, load_topics, load_repairs
+from logic.artifacts import load_bundle
+from logic.data_loader import load_turns, load_topics, load_repair_index
+from logic.hot_reload import POLL_SECONDS, poll_turn_sources, watch_state
+from logic.selection import select_turns
 from ui.overview import render_overview
 from ui.diagnostics import render_diagnostics
 from ui.insights import render_positive_insights
 from ui.upload_lab_fixed import render_upload_lab
+from ui.search import render_search
+from ui.filter_bar import render_filter_bar
 
 st.set_page_config(
     page_title="RetailMind",
@@ -11,18 +16,47 @@ st.set_page_config(
 )
 
 # ---- Load data once ----
+# Boot from the prebuilt artifact bundle (python -m logic.artifacts build) when it
+# matches the source files; otherwise load and prepare the raw sources
+bundle = load_bundle()
+
 if "turns_df" not in st.session_state:
-    st.session_state.turns_df = load_turns()
+    st.session_state.turns_df = bundle["turns"] if bundle else load_turns()
 
 if "topics_df" not in st.session_state:
-    st.session_state.topics_df = load_topics()
+    st.session_state.topics_df = bundle["topics"] if bundle else load_topics()
+
+if "repairs" not in st.session_state:
+    st.session_state.repairs = bundle["repairs"] if bundle else load_repair_index()
+
+if "source_state" not in st.session_state:
+    st.session_state.source_state = watch_state()
+
+
+# ---- Hot reload ----
+# Poll the turn sources; appended turns are applied as a delta (derived tables
+# updated, data_version bumped) and the page reruns on the new store
+@st.fragment(run_every=POLL_SECONDS)
+def watch_turn_sources():
+    reload = poll_turn_sources(
+        st.session_state.source_state, st.session_state.turns_df, st.session_state.topics_df
+    )
+    st.session_state.source_state = reload["state"]
+    if reload["mode"] is None:
+        return
+    st.session_state.turns_df = reload["turns_df"]
+    if reload["mode"] == "delta":
+        st.toast(f"Loaded {reload['new_turns']} new turns")
+    else:
+        st.toast("Turn data changed on disk; reloaded")
+    st.rerun()
 
-if "repairs_df" not in st.session_state:
-    st.session_state.repairs_df = load_repairs()
+
+watch_turn_sources()
 
 turns_df = st.session_state.turns_df
 topics_df = st.session_state.topics_df
-repairs_df = st.session_state.repairs_df
+repairs = st.session_state.repairs
 
 # ---- App state routing ----
 if "page" not in st.session_state:
@@ -178,7 +212,7 @@ with st.container():
         )
 
     with col_nav:
-        nav_col1, nav_col2, nav_col3, nav_col4 = st.columns(4, gap="medium")
+        nav_col1, nav_col2, nav_col3, nav_col4, nav_col5 = st.columns(5, gap="medium")
         
         with nav_col1:
             if st.button("📊 Overview", use_container_width=True, key="btn_overview"):
@@ -198,15 +232,33 @@ with st.container():
             if st.button("🚀 Upload Lab", use_container_width=True, key="btn_upload_lab"):
                 st.session_state.page = "Upload Lab"
 
+        with nav_col5:
+            if st.button("🔎 Search", use_container_width=True, key="btn_search"):
+                st.session_state.page = "Search"
+
+# ---- Global filters ----
+# Overview, Diagnostics and What Works Well show the turns selected by the filter
+# bar. Selections are cached by filter signature (logic/selection.py), so pages
+# under the same filters share one selected frame
+view_df = turns_df
+if st.session_state.page in ("Overview", "Diagnostics", "What Works Well"):
+    view_df = select_turns(turns_df, render_filter_bar(turns_df, topics_df))
+    if view_df.empty:
+        st.info("No turns match the current filters.")
+        st.stop()
+
 # ---- Pages ----
 if st.session_state.page == "Overview":
-    render_overview(turns_df, topics_df)
+    render_overview(view_df, topics_df)
 
 elif st.session_state.page == "Diagnostics":
-    render_diagnostics(turns_df, topics_df, repairs_df)
+    render_diagnostics(view_df, topics_df, repairs)
 
 elif st.session_state.page == "What Works Well":
-    render_positive_insights(turns_df, topics_df)
+    render_positive_insights(view_df, topics_df)
 
 elif st.session_state.page == "Upload Lab":
     render_upload_lab()
+
+elif st.session_state.page == "Search":
+    render_search(turns_df)
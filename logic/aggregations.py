@@ -9,8 +9,13 @@ def get_topic_turns(df_turns, topic_id):
 
 def group_conversations(df_turns):
     return df_turns.groupby("conv_id")
+from collections import Counter
+
+import numpy as np
 import pandas as pd
 
+from logic.issues import count_issues, has_any_issue, has_issue, issue_masks
+
 # ---- Severity mapping (EXPLAINED BELOW) ----
 SEVERITY_MAP = {
     "LOW": 1,
@@ -18,8 +23,14 @@ SEVERITY_MAP = {
     "HIGH": 3
 }
 
+# Means are rounded before ranking so float summation order (pandas vs SQL backends)
+# cannot flip the order of mathematically tied conversations
+RANK_PRECISION = 9
+
 def compute_severity_stats(turns_df: pd.DataFrame):
     df = turns_df.copy()
+    # Plain labels: categorical value_counts would list unobserved levels and break ties by level order
+    df["severity"] = df["severity"].astype(object)
     # Consider only valid severity labels and drop missing values
     valid = df[df["severity"].isin(SEVERITY_MAP.keys())].copy()
     valid["severity_score"] = valid["severity"].map(SEVERITY_MAP)
@@ -86,46 +97,8 @@ def get_top_success_topics_detailed(turns_df: pd.DataFrame, topics_df: pd.DataFr
     - low_satisfaction_rate (% of turns marked as low-satisfaction)
     - n_examples
     """
-    # Get all turns with valid satisfaction scores
-    user_turns = turns_df[
-        (turns_df["speaker"] == "USER") &
-        (turns_df["satisfaction_score"].notna())
-    ]
-
-    if user_turns.empty:
-        return pd.DataFrame()
-
-    # Aggregate by topic
-    by_topic = (
-        user_turns
-        .groupby("topic_id")
-        .agg(
-            mean_satisfaction=("satisfaction_score", "mean"),
-            successful_turns=("satisfaction_score", "count"),
-            low_sat_count=("low_satisfaction", "sum")
-        )
-        .reset_index()
-    )
-
-    # Calculate low satisfaction rate
-    by_topic["low_satisfaction_rate"] = (
-        by_topic["low_sat_count"] / by_topic["successful_turns"]
-    )
-
-    # Merge with topic labels and examples count
-    result = by_topic.merge(
-        topics_df[["topic_id", "topic_label", "n_examples"]],
-        on="topic_id",
-        how="left"
-    )
-
-    # Sort by low satisfaction rate (ascending = best first) and then by mean satisfaction (descending)
-    result = result.sort_values(
-        by=["low_satisfaction_rate", "mean_satisfaction"],
-        ascending=[True, False]
-    ).head(top_n)
-
-    return result
+    # Per-topic rollups come from the topic stats table (see build_topic_stats)
+    return top_success_topics(build_topic_stats(turns_df), topics_df, top_n)
 
 
 def get_successful_conversations(turns_df: pd.DataFrame, topic_id: int, limit: int = 5):
@@ -170,10 +143,13 @@ def get_successful_conversations(turns_df: pd.DataFrame, topic_id: int, limit: i
     conv_df = pd.DataFrame(conv_data)
     
     # Sort by mean satisfaction (descending), then by low satisfaction count (ascending)
-    conv_df = conv_df.sort_values(
-        by=["mean_satisfaction", "low_sat_count"],
-        ascending=[False, True]
-    ).head(limit)
+    conv_df["rank_mean"] = conv_df["mean_satisfaction"].round(RANK_PRECISION)
+    conv_df = select_top_k(
+        conv_df,
+        by=["rank_mean", "low_sat_count"],
+        ascending=[False, True],
+        limit=limit
+    ).drop(columns="rank_mean")
 
     return conv_df.to_dict("records")
 
@@ -200,31 +176,19 @@ def get_success_insights_for_topic(turns_df: pd.DataFrame, topic_id: int) -> dic
         }
 
     # Check for issues
-    has_issues = topic_turns["issues"].apply(
-        lambda x: len(x) > 0 if isinstance(x, list) else False
-    )
-    clear_intent_pct = (1 - has_issues.sum() / len(topic_turns)) * 100
+    masks, vocab = issue_masks(topic_turns)
+    clear_intent_pct = (1 - has_any_issue(masks).sum() / len(topic_turns)) * 100
 
     # Conciseness: avg turns per conversation
     conv_turn_counts = topic_turns.groupby("conv_id")["turn_id"].max()
     avg_turns = conv_turn_counts.mean()
 
     # KB coverage: % without UNSUPPORTED_INTENT
-    def has_unsupported(issues):
-        if isinstance(issues, list):
-            return "UNSUPPORTED_INTENT" in issues
-        return False
-
-    unsupported_pct = topic_turns["issues"].apply(has_unsupported).sum() / len(topic_turns)
+    unsupported_pct = has_issue(masks, "UNSUPPORTED_INTENT", vocab).sum() / len(topic_turns)
     kb_coverage = (1 - unsupported_pct) * 100
 
     # Most common issues
-    all_issues = []
-    for issues_list in topic_turns["issues"]:
-        if isinstance(issues_list, list):
-            all_issues.extend(issues_list)
-
-    issue_counts = pd.Series(all_issues).value_counts().head(3).to_dict() if all_issues else {}
+    issue_counts = count_issues(masks, vocab, limit=3)
 
     return {
         "clear_intent": f"{clear_intent_pct:.0f}%",
@@ -245,6 +209,14 @@ def get_top_conversations(turns_df: pd.DataFrame, limit: int = 50):
     
     Returns list of conversation dicts with metadata and assigned topic.
     """
+    return rank_conversations(summarize_conversations(turns_df), limit=limit)
+
+
+def summarize_conversations(turns_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the per-conversation summary table used to rank conversations,
+    one row per conversation with at least one scored USER turn, in conv_id order.
+    """
     # Group by conversation and aggregate
     conv_data = []
     for conv_id, conv_group in turns_df.groupby("conv_id"):
@@ -291,21 +263,73 @@ def get_top_conversations(turns_df: pd.DataFrame, limit: int = 50):
             "topic_label": topic_label
         })
     
-    if not conv_data:
+    return pd.DataFrame(conv_data)
+
+
+def rank_conversations(conv_df: pd.DataFrame, limit: int = 50) -> list:
+    """Rank a `summarize_conversations` table and return the top `limit` as dicts."""
+    if conv_df.empty:
         return []
     
-    # Convert to DataFrame
-    conv_df = pd.DataFrame(conv_data)
-    
     # Sort by satisfaction, then by success metrics
-    conv_df = conv_df.sort_values(
-        by=["mean_satisfaction", "user_turns", "low_sat_count"],
-        ascending=[False, False, True]
-    ).head(limit)
+    conv_df = conv_df.assign(rank_mean=conv_df["mean_satisfaction"].round(RANK_PRECISION))
+    conv_df = select_top_k(
+        conv_df,
+        by=["rank_mean", "user_turns", "low_sat_count"],
+        ascending=[False, False, True],
+        limit=limit
+    ).drop(columns="rank_mean")
     
     return conv_df.to_dict("records")
 
 
+def update_conversation_summary(conv_df: pd.DataFrame, turns_df: pd.DataFrame, conv_ids) -> pd.DataFrame:
+    """
+    `summarize_conversations` table after the turns of `conv_ids` changed: only
+    those conversations are re-summarized (from all of their turns in turns_df),
+    the other rows are kept, and conv_id order is restored.
+    """
+    conv_ids = pd.unique(pd.Series(list(conv_ids), dtype="int64"))
+    changed = summarize_conversations(turns_df[turns_df["conv_id"].isin(conv_ids)])
+    if conv_df.empty:
+        return changed
+    kept = conv_df[~conv_df["conv_id"].isin(conv_ids)]
+    if changed.empty:
+        return kept.reset_index(drop=True)
+    return pd.concat([kept, changed], ignore_index=True).sort_values("conv_id", kind="stable").reset_index(drop=True)
+
+
+def update_top_conversations(top_conversations: list, new_conv_df: pd.DataFrame, limit: int = 50) -> list:
+    """
+    Incrementally fold newly summarized conversations into an existing top-`limit` list.
+    
+    Ties are broken by conv_id order (as in the full ranking), so the result is the
+    same as re-ranking the whole corpus as long as the existing conversations did not
+    change. Only the current top list and the new rows are touched.
+    """
+    if new_conv_df is None or new_conv_df.empty:
+        return top_conversations
+    candidates = pd.concat([pd.DataFrame(top_conversations), new_conv_df], ignore_index=True)
+    candidates = candidates.sort_values("conv_id", kind="stable").reset_index(drop=True)
+    return rank_conversations(candidates, limit=limit)
+
+
+def select_top_k(df: pd.DataFrame, by: list, ascending: list, limit: int) -> pd.DataFrame:
+    """
+    Same rows and order as `df.sort_values(by, ascending, kind="stable").head(limit)`,
+    without sorting the whole table: an O(n) partition on the first key keeps every
+    row that can reach the top `limit` (including boundary ties), and only those are sorted.
+    """
+    if len(df) > limit > 0:
+        primary = df[by[0]].to_numpy(dtype="float64")
+        if not ascending[0]:
+            primary = -primary
+        kth = np.partition(primary, limit - 1)[limit - 1]
+        if not np.isnan(kth):
+            df = df[primary <= kth]
+    return df.sort_values(by=by, ascending=ascending, kind="stable").head(limit)
+
+
 def get_top_performing_topics_from_conversations(conv_list: list, limit: int = 5) -> pd.DataFrame:
     """
     Build "Top Performing Topics" from a list of conversations.
@@ -367,21 +391,26 @@ def get_why_it_works_patterns(conv_list: list, turns_df: pd.DataFrame) -> dict:
     conv_ids = [c["conv_id"] for c in conv_list]
     top_conv_turns = turns_df[turns_df["conv_id"].isin(conv_ids)].copy()
     
+    masks, vocab = issue_masks(top_conv_turns)
+    
     # Pattern 1: Clear Intent (no issues)
-    has_issues = top_conv_turns["issues"].apply(
-        lambda x: len(x) > 0 if isinstance(x, list) else False
-    )
-    clear_intent_pct = (1 - has_issues.sum() / len(top_conv_turns)) * 100 if len(top_conv_turns) > 0 else 0
+    clear_intent_pct = (1 - has_any_issue(masks).sum() / len(top_conv_turns)) * 100 if len(top_conv_turns) > 0 else 0
     
     # Pattern 2: Knowledge Base Alignment (no UNSUPPORTED_INTENT)
-    def has_unsupported(issues):
-        if isinstance(issues, list):
-            return "UNSUPPORTED_INTENT" in issues
-        return False
-    
-    unsupported_count = top_conv_turns["issues"].apply(has_unsupported).sum()
+    unsupported_count = has_issue(masks, "UNSUPPORTED_INTENT", vocab).sum()
     kb_alignment = (1 - unsupported_count / len(top_conv_turns)) * 100 if len(top_conv_turns) > 0 else 0
     
+    # Pattern 5: Most common positive signals (absence of issues)
+    issue_counts = count_issues(masks, vocab, limit=5)
+    
+    return build_why_it_works_patterns(conv_list, clear_intent_pct, kb_alignment, issue_counts)
+
+
+def build_why_it_works_patterns(conv_list: list, clear_intent_pct: float, kb_alignment: float, issue_counts: dict) -> dict:
+    """
+    Turn the turn-level signals of `get_why_it_works_patterns` into pattern cards.
+    Shared by every aggregation backend so the wording stays identical.
+    """
     # Pattern 3: Conciseness
     avg_turns = sum([c["turn_count"] for c in conv_list]) / len(conv_list) if conv_list else 0
     
@@ -390,14 +419,6 @@ def get_why_it_works_patterns(conv_list: list, turns_df: pd.DataFrame) -> dict:
     avg_low_sat_per_conv = total_low_sat / len(conv_list) if conv_list else 0
     low_error_rate = 1.0 - (avg_low_sat_per_conv / avg_turns) if avg_turns > 0 else 0.95
     
-    # Pattern 5: Most common positive signals (absence of issues)
-    all_issues = []
-    for issues_list in top_conv_turns["issues"]:
-        if isinstance(issues_list, list):
-            all_issues.extend(issues_list)
-    
-    issue_counts = pd.Series(all_issues).value_counts().head(5).to_dict() if all_issues else {}
-    
     # Build human-readable patterns
     patterns = []
     
@@ -485,3 +506,188 @@ def infer_conversation_theme(conv_group: pd.DataFrame) -> str:
         return "Complex Multi-Turn Help"
 
     return "General Conversation"
+
+
+# ---- Page indexes (precomputed into the artifact bundle, see logic/artifacts.py) ----
+
+def build_topic_label_index(turns_df: pd.DataFrame, topics_df: pd.DataFrame) -> dict:
+    """
+    Display labels shared by the Overview and Diagnostics pages: topics ranked by
+    n_examples, each titled "Failure - <inferred theme>" with a #n suffix on repeats.
+
+    Returns dict with:
+    - labels: topic_id -> unique display label
+    - ranks: topic_id -> 1-based rank
+    """
+    labels = {}
+    ranks = {}
+    used_labels = set()
+    ranked = topics_df.sort_values("n_examples", ascending=False, kind="stable")
+    for rank, (topic_id, theme_label) in enumerate(zip(ranked["topic_id"], ranked["topic_label"]), 1):
+        topic_turns = get_topic_turns(turns_df, topic_id)
+        if not topic_turns.empty:
+            inferred = infer_conversation_theme(topic_turns)
+            if inferred:
+                theme_label = inferred
+
+        base_label = f"Failure - {theme_label}"
+        unique_label = base_label
+        suffix = 1
+        while unique_label in used_labels:
+            suffix += 1
+            unique_label = f"{base_label} #{suffix}"
+
+        used_labels.add(unique_label)
+        labels[topic_id] = unique_label
+        ranks[topic_id] = rank
+
+    return {"labels": labels, "ranks": ranks}
+
+
+def build_issue_index(turns_df: pd.DataFrame, top_topics: int = 5) -> dict:
+    """
+    Issue breakdown of low-satisfaction turns.
+
+    Returns dict with:
+    - counts: issue -> occurrences, most common first
+    - topics: issue -> [(topic_id, occurrences), ...] top clustered topics with that issue
+    """
+    failure_turns = turns_df[turns_df["low_satisfaction"] == True]
+    masks, vocab = issue_masks(failure_turns)
+    counts = count_issues(masks, vocab)
+    topic_ids = failure_turns["topic_id"].to_numpy()
+
+    topics = {}
+    for issue in counts:
+        with_issue = topic_ids[has_issue(masks, issue, vocab)]
+        topics[issue] = Counter(with_issue[with_issue != -1].tolist()).most_common(top_topics)
+
+    return {"counts": counts, "topics": topics}
+
+
+def severity_stats_from_counts(counts: list) -> dict:
+    """
+    compute_severity_stats result from [(severity label, turns)], most common
+    first (ties in first-seen order, as value_counts orders them).
+    """
+    valid = [(s, n) for s, n in counts if s in SEVERITY_MAP]
+    if valid:
+        score_sum = sum(SEVERITY_MAP[s] * n for s, n in valid)
+        return {
+            "avg_severity": round(score_sum / sum(n for _, n in valid), 2),
+            "severity_counts": {s: int(n) for s, n in valid},
+            "dominant_severity": valid[0][0],
+        }
+    if any(s == "NONE" for s, _ in counts):
+        return {
+            "avg_severity": None,
+            "severity_counts": {s: int(n) for s, n in counts},
+            "dominant_severity": "NONE",
+        }
+    return {
+        "avg_severity": None,
+        "severity_counts": {},
+        "dominant_severity": "N/A",
+    }
+
+
+def severity_stats_from_histogram(counts: pd.DataFrame) -> dict:
+    """severity_stats_from_counts of a histogram indexed by severity, with `count` and `first_pos` columns."""
+    counts = counts.sort_values(["count", "first_pos"], ascending=[False, True])
+    return severity_stats_from_counts(list(zip(counts.index, counts["count"])))
+
+
+SEVERITY_STAT_KEYS = ("avg_severity", "severity_counts", "dominant_severity")
+
+
+def build_topic_stats(turns_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-topic stats table, indexed by topic_id in first-seen order, built in one
+    grouped pass over all topics.
+
+    Columns:
+    - n_turns
+    - avg_severity, severity_counts, dominant_severity: compute_severity_stats of the topic's turns
+    - mean_satisfaction, successful_turns, low_sat_count, low_satisfaction_rate: rollup of the
+      topic's scored USER turns, as in get_top_success_topics_detailed (NaN / 0 without any)
+    """
+    turns = pd.DataFrame({
+        "topic_id": turns_df["topic_id"].to_numpy(),
+        # Plain labels: categorical groupby would list unobserved levels
+        "severity": turns_df["severity"].astype(object).to_numpy(),
+        "pos": np.arange(len(turns_df)),
+    })
+    stats = turns.groupby("topic_id", sort=False).agg(n_turns=("pos", "size"))
+
+    # One histogram for all topics, most common label first within each topic
+    histogram = (
+        turns.dropna(subset=["severity"])
+        .groupby(["topic_id", "severity"])
+        .agg(count=("pos", "size"), first_pos=("pos", "min"))
+        .reset_index()
+        .sort_values(["count", "first_pos"], ascending=[False, True])
+    )
+    counts = {}
+    for topic_id, label, n in zip(histogram["topic_id"].tolist(), histogram["severity"].tolist(), histogram["count"].tolist()):
+        counts.setdefault(topic_id, []).append((label, n))
+    severity = [severity_stats_from_counts(counts.get(topic_id, [])) for topic_id in stats.index]
+    for key in SEVERITY_STAT_KEYS:
+        # object columns keep avg_severity None (not NaN) for topics without a scored label
+        stats[key] = pd.Series([row[key] for row in severity], index=stats.index, dtype=object)
+
+    user_turns = turns_df[(turns_df["speaker"] == "USER") & (turns_df["satisfaction_score"].notna())]
+    satisfaction = user_turns.groupby("topic_id").agg(
+        mean_satisfaction=("satisfaction_score", "mean"),
+        successful_turns=("satisfaction_score", "count"),
+        low_sat_count=("low_satisfaction", "sum"),
+    )
+    stats = stats.join(satisfaction)
+    stats["successful_turns"] = stats["successful_turns"].fillna(0).astype("int64")
+    stats["low_sat_count"] = stats["low_sat_count"].fillna(0).astype("int64")
+    stats["low_satisfaction_rate"] = stats["low_sat_count"] / stats["successful_turns"].where(stats["successful_turns"] > 0)
+    return stats
+
+
+def topic_severity_stats(topic_stats: pd.DataFrame, topic_id) -> dict:
+    """compute_severity_stats of one topic, looked up in a build_topic_stats table."""
+    if topic_id not in topic_stats.index:
+        return severity_stats_from_counts([])
+    return {key: topic_stats.at[topic_id, key] for key in SEVERITY_STAT_KEYS}
+
+
+def top_success_topics(topic_stats: pd.DataFrame, topics_df: pd.DataFrame, top_n=5) -> pd.DataFrame:
+    """get_top_success_topics_detailed from a build_topic_stats table."""
+    by_topic = topic_stats[topic_stats["successful_turns"] > 0].sort_index()
+    if by_topic.empty:
+        return pd.DataFrame()
+
+    by_topic = by_topic[
+        ["mean_satisfaction", "successful_turns", "low_sat_count", "low_satisfaction_rate"]
+    ].rename_axis("topic_id").reset_index()
+    result = by_topic.merge(
+        topics_df[["topic_id", "topic_label", "n_examples"]],
+        on="topic_id",
+        how="left"
+    )
+    return result.sort_values(
+        by=["low_satisfaction_rate", "mean_satisfaction"],
+        ascending=[True, False]
+    ).head(top_n)
+
+
+def build_severity_index(turns_df: pd.DataFrame) -> dict:
+    """
+    compute_severity_stats per topic, from build_topic_stats tables.
+
+    Returns dict with:
+    - topics: topic_id -> stats over all of the topic's turns (topic page)
+    - failure_topics: topic_id -> stats over the topic's low-satisfaction turns (Overview)
+    - failure_turn_counts: topic_id -> number of low-satisfaction turns
+    """
+    topic_stats = build_topic_stats(turns_df)
+    failure_stats = build_topic_stats(turns_df[turns_df["low_satisfaction"] == True])
+    return {
+        "topics": {topic_id: topic_severity_stats(topic_stats, topic_id) for topic_id in topic_stats.index},
+        "failure_topics": {topic_id: topic_severity_stats(failure_stats, topic_id) for topic_id in failure_stats.index},
+        "failure_turn_counts": Counter(failure_stats["n_turns"].to_dict()),
+    }
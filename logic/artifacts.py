@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from types import MappingProxyType
+
+import pandas as pd
+import streamlit as st
+
+from logic import aggregations
+from logic.data_loader import (
+    DATA_DIR,
+    TURNS_FILE,
+    TURNS_PARTITION_DIR,
+    file_data_version,
+    load_repair_index,
+    load_topics,
+    load_turns,
+    turns_data_version,
+)
+from logic.issues import issue_vocab
+from logic.partitions import discover_parts
+from logic.positives import build_positive_artifacts
+from logic.sharded import sharded_aggregate
+from logic.streaming import build_kpi_cube
+from logic.topic_assign import build_topic_centroids
+
+# ---- Artifact bundle ----
+# `python -m logic.artifacts build` reads the raw turn/topic/repair sources once,
+# computes every derived table the pages need and writes them as a bundle:
+#
+#   data/bundle/manifest.json        format, data_version, source hashes, tables
+#   data/bundle/<version>/<table>.pkl
+#
+# The manifest is replaced last (atomically), so readers always see a complete
+# bundle. The app boots from the bundle when its source hashes still match the
+# files on disk; pages use a derived table only while the loaded turns carry the
+# bundle's data_version (uploads bump it) and compute live otherwise.
+
+BUNDLE_DIR = f"{DATA_DIR}/bundle"
+BUNDLE_FORMAT = 3
+# Turns are versioned by turns_data_version (single log or partitions)
+SOURCES = {
+    "topics": "dashboard_topics.json",
+    "repairs": "dashboard_repairs.json",
+}
+
+
+def source_versions(data_dir=DATA_DIR) -> dict:
+    versions = {"turns": turns_data_version()}
+    versions.update({name: file_data_version(f"{data_dir}/{filename}") for name, filename in SOURCES.items()})
+    return versions
+
+
+def build_bundle(turns_df: pd.DataFrame, topics_df: pd.DataFrame, repairs, workers=1) -> dict:
+    """
+    Every table the pages read, computed once from the loaded sources. With
+    workers > 1 the conversation-level tables (conversation summary, positives)
+    are aggregated per conv_id shard in a process pool (logic.sharded).
+
+    Returns dict with:
+    - turns, topics, repairs: the loaded sources (interned, issue masks included)
+    - issue_vocab: the vocabulary the turns' issue masks were encoded with
+    - conversation_summary: summarize_conversations table
+    - topic_label_index: build_topic_label_index result
+    - issue_index: build_issue_index result
+    - kpi_cube: dataset -> streaming partial (build_kpi_cube)
+    - positives: top-50 conversations, top topics and why-it-works patterns
+    - severity_index: build_severity_index result
+    - topic_stats: build_topic_stats table
+    - topic_model: build_topic_centroids result (topic assignment of uploaded turns)
+    """
+    aggregate = sharded_aggregate(turns_df, workers) if workers > 1 else None
+    return {
+        "turns": turns_df,
+        "issue_vocab": list(issue_vocab(turns_df)),
+        "topics": topics_df,
+        # Read-only mappings don't pickle; load_bundle re-freezes them
+        "repairs": {topic_id: dict(record) for topic_id, record in repairs.items()},
+        "conversation_summary": (
+            aggregations.summarize_conversations(turns_df) if aggregate is None else aggregate["conversations"]
+        ),
+        "topic_label_index": aggregations.build_topic_label_index(turns_df, topics_df),
+        "issue_index": aggregations.build_issue_index(turns_df),
+        "kpi_cube": build_kpi_cube(turns_df),
+        "positives": build_positive_artifacts(turns_df, aggregate),
+        "severity_index": aggregations.build_severity_index(turns_df),
+        "topic_stats": aggregations.build_topic_stats(turns_df),
+        "topic_model": build_topic_centroids(turns_df),
+    }
+
+
+def write_bundle(tables: dict, sources: dict, data_version, bundle_dir=BUNDLE_DIR) -> dict:
+    version_dir = data_version[:16]
+    os.makedirs(f"{bundle_dir}/{version_dir}", exist_ok=True)
+    for name, table in tables.items():
+        pd.to_pickle(table, f"{bundle_dir}/{version_dir}/{name}.pkl")
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "data_version": data_version,
+        "sources": sources,
+        "dir": version_dir,
+        "tables": sorted(tables),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    tmp = f"{bundle_dir}/manifest.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, f"{bundle_dir}/manifest.json")
+
+    # Older versions are unreachable once the manifest points here
+    for entry in os.listdir(bundle_dir):
+        if entry != version_dir and os.path.isdir(f"{bundle_dir}/{entry}"):
+            shutil.rmtree(f"{bundle_dir}/{entry}", ignore_errors=True)
+    return manifest
+
+
+def build(bundle_dir=BUNDLE_DIR, workers=1) -> dict:
+    """Read the sources, compute every table and write the bundle; returns the manifest."""
+    sources = source_versions()
+    turns_df = load_turns()
+    tables = build_bundle(turns_df, load_topics(), load_repair_index(), workers=workers)
+    return write_bundle(tables, sources, turns_df.attrs["data_version"], bundle_dir)
+
+
+def read_manifest(bundle_dir=BUNDLE_DIR):
+    try:
+        with open(f"{bundle_dir}/manifest.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# How often load_bundle re-stats the manifest and sources (it runs on every bundle_table lookup)
+BUNDLE_CHECK_SECONDS = 5
+_bundle_stamps = {}
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def bundle_stamp(bundle_dir=BUNDLE_DIR, data_dir=DATA_DIR) -> tuple:
+    """
+    Sizes and mtimes of the bundle manifest and of the source files: cheap to take,
+    and it changes whenever the bundle is rebuilt or a source is edited.
+    """
+    parts = discover_parts(TURNS_PARTITION_DIR)
+    turn_files = [part["path"] for part in parts] if parts else [TURNS_FILE]
+    source_files = turn_files + [f"{data_dir}/{filename}" for filename in SOURCES.values()]
+    return (_file_stamp(f"{bundle_dir}/manifest.json"),) + tuple((path, _file_stamp(path)) for path in source_files)
+
+
+def load_bundle(bundle_dir=BUNDLE_DIR):
+    """
+    The current bundle's tables, or None when there is no bundle, it was written
+    by another format, or the source files changed since it was built. Re-checked
+    (at most every BUNDLE_CHECK_SECONDS) against bundle_stamp, so a rebuilt bundle
+    or an edited source is picked up while the app runs. Shared across reruns and
+    sessions; treat the tables as read-only.
+    """
+    now = time.monotonic()
+    checked = _bundle_stamps.get(bundle_dir)
+    if checked is None or now - checked[0] >= BUNDLE_CHECK_SECONDS:
+        checked = _bundle_stamps[bundle_dir] = (now, bundle_stamp(bundle_dir))
+    return _load_bundle(bundle_dir, checked[1])
+
+
+@st.cache_resource(max_entries=4)
+def _load_bundle(bundle_dir, stamp):
+    manifest = read_manifest(bundle_dir)
+    if manifest is None or manifest.get("format") != BUNDLE_FORMAT:
+        return None
+    if manifest["sources"] != source_versions():
+        return None
+
+    try:
+        tables = {
+            name: pd.read_pickle(f"{bundle_dir}/{manifest['dir']}/{name}.pkl")
+            for name in manifest["tables"]
+        }
+    except (FileNotFoundError, EOFError):
+        return None
+    tables["turns"].attrs["data_version"] = manifest["data_version"]
+    # Masks are only meaningful with the vocabulary of the process that built them
+    tables["turns"].attrs["issue_vocab"] = tuple(tables["issue_vocab"])
+    tables["repairs"] = MappingProxyType({
+        topic_id: MappingProxyType(record) for topic_id, record in tables["repairs"].items()
+    })
+    tables["data_version"] = manifest["data_version"]
+    return tables
+
+
+# Derived tables kept up to date by hot reload (logic/hot_reload.py) and the exact
+# Overview tables (logic/sampling.py), keyed by the data_version of the turn store
+# they describe; only the latest few are kept
+MAX_LIVE_VERSIONS = 8
+_live_tables = {}
+
+# Tables of views of a store (dataset slices, filter selections, and derived_table
+# results for any frame) are kept apart, so browsing many views cannot evict the
+# store's live tables
+MAX_VIEW_VERSIONS = 32
+_view_tables = {}
+
+
+def _register(cache: dict, limit, data_version, tables: dict):
+    cache.pop(data_version, None)
+    cache[data_version] = tables
+    while len(cache) > limit:
+        del cache[next(iter(cache))]
+
+
+def register_live_tables(data_version, tables: dict):
+    _register(_live_tables, MAX_LIVE_VERSIONS, data_version, tables)
+
+
+def register_view_tables(data_version, tables: dict):
+    _register(_view_tables, MAX_VIEW_VERSIONS, data_version, tables)
+
+
+def live_tables(data_version):
+    """Derived tables for a turn store or view version: the bundle's, hot reload's or the view's, else None."""
+    bundle = load_bundle()
+    if bundle is not None and bundle["data_version"] == data_version:
+        return bundle
+    tables = _live_tables.get(data_version)
+    return tables if tables is not None else _view_tables.get(data_version)
+
+
+def bundle_table(turns_df: pd.DataFrame, name):
+    """
+    A derived table built from exactly this turn log (by the bundle, or kept up
+    to date by hot reload), else None.
+    """
+    tables = live_tables(turns_df.attrs.get("data_version"))
+    return None if tables is None else tables.get(name)
+
+
+def derived_table(turns_df: pd.DataFrame, name, build):
+    """
+    bundle_table(turns_df, name), else build(turns_df) computed once and kept
+    with this version's live tables (a store hot reload keeps) or view tables.
+    """
+    table = bundle_table(turns_df, name)
+    if table is not None:
+        return table
+    version = turns_df.attrs.get("data_version")
+    table = build(turns_df)
+    tables = _live_tables.get(version, _view_tables.get(version))
+    if tables is None:
+        register_view_tables(version, {name: table})
+    else:
+        tables[name] = table
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m logic.artifacts", description="Dashboard artifact bundle")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="compute every dashboard table and write the bundle")
+    build_cmd.add_argument("--out", default=BUNDLE_DIR, help="bundle directory")
+    build_cmd.add_argument(
+        "--workers", type=int, default=1,
+        help="processes for the conversation-level tables (sharded by conv_id; default: serial)",
+    )
+    commands.add_parser("info", help="show the current bundle's manifest")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        manifest = build(args.out, workers=args.workers)
+        print(f"wrote {len(manifest['tables'])} tables to {args.out}/{manifest['dir']} (data version {manifest['data_version']})")
+    else:
+        manifest = read_manifest()
+        if manifest is None:
+            print("no bundle; run `python -m logic.artifacts build`")
+        else:
+            stale = manifest["sources"] != source_versions()
+            print(json.dumps(manifest, indent=2))
+            print("status: " + ("stale (sources changed since build)" if stale else "current"))
+
+
+if __name__ == "__main__":
+    main()
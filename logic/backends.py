@@ -0,0 +1,17 @@
+import os
+
+from logic import aggregations
+
+# "pandas" (default) or "duckdb"; both expose the same aggregation functions
+AGGREGATION_BACKEND = os.environ.get("RETAILMIND_AGG_BACKEND", "pandas")
+
+
+def get_aggregation_backend(name=None):
+    """Return the module implementing the aggregation functions for the configured backend."""
+    name = (name or AGGREGATION_BACKEND).lower()
+    if name == "duckdb":
+        from logic import duckdb_backend
+        return duckdb_backend
+    if name != "pandas":
+        raise ValueError(f"Unknown aggregation backend: {name!r}")
+    return aggregations
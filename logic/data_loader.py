@@ -1,31 +1,265 @@
-import json
+import difflib
+import hashlib
+import re
+from types import MappingProxyType
+
 import pandas as pd
 import streamlit as st
 
+from logic import fastjson
+from logic.issues import encode_turn_issues, issue_vocab
+from logic.partitions import discover_parts, parts_data_version, read_parts
+
 DATA_DIR = "data"
+TURNS_FILE = f"{DATA_DIR}/dashboard_turns.jsonl"
+# Partitioned turn log (see logic.partitions); used instead of TURNS_FILE when it has parts
+TURNS_PARTITION_DIR = f"{DATA_DIR}/turns"
+
+# Repeated string columns are dictionary-encoded: each distinct value is stored
+# once and rows hold small integer codes, so equality filters compare codes.
+# `text` uses the same pool for the many repeated short turns ("Okay.", bot templates).
+CATEGORICAL_COLUMNS = [
+    "dataset",
+    "speaker",
+    "text",
+    "severity",
+    "reason",
+    "topic_label",
+    "satisfaction_source",
+]
+
+
+def file_data_version(path) -> str:
+    """Content hash of a data file; precomputed artifacts record it to detect staleness."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bump_data_version(version, new_turns: pd.DataFrame) -> str:
+    """Version of a turn log after appending `new_turns` (never equals a file hash artifacts were built from)."""
+    payload = new_turns.drop(columns=["issue_mask"], errors="ignore").to_json(orient="records", default_handler=str)
+    return hashlib.sha256(f"{version}+{payload}".encode("utf-8")).hexdigest()
+
+
+def intern_turn_columns(turns_df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the repeated string columns of a turn frame to categoricals."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in turns_df.columns:
+            turns_df[col] = turns_df[col].astype("category")
+    return turns_df
+
+
+def append_turns(turns_df: pd.DataFrame, new_turns: pd.DataFrame) -> pd.DataFrame:
+    """
+    Concatenate new turns onto an interned turn frame. Category pools are extended
+    in place of re-encoding, so the result stays dictionary-encoded (a plain concat
+    of mismatched categoricals falls back to object columns). Issue masks of the
+    new turns are encoded with the store's vocabulary, extended with their unseen types.
+    """
+    turns_df = turns_df.copy(deep=False)
+    new_turns = new_turns.copy()
+    if "issue_mask" in turns_df.columns:
+        encode_turn_issues(new_turns, issue_vocab(turns_df))
+    for col in CATEGORICAL_COLUMNS:
+        if col not in new_turns.columns or col not in turns_df.columns:
+            continue
+        if not isinstance(turns_df[col].dtype, pd.CategoricalDtype):
+            continue
+        pool = turns_df[col].cat.categories
+        missing = pd.Index(new_turns[col].dropna().unique()).difference(pool)
+        if len(missing) > 0:
+            turns_df[col] = turns_df[col].cat.add_categories(missing)
+        new_turns[col] = pd.Categorical(new_turns[col], categories=turns_df[col].cat.categories)
+    combined = pd.concat([turns_df, new_turns], ignore_index=True)
+    version = turns_df.attrs.get("data_version")
+    combined.attrs["data_version"] = bump_data_version(version, new_turns)
+    if "issue_vocab" in new_turns.attrs:
+        combined.attrs["issue_vocab"] = new_turns.attrs["issue_vocab"]
+
+    # Versions this store was appended from -> their row counts (see appended_rows)
+    ancestors = dict(_ancestors(turns_df))
+    if version is not None:
+        ancestors[version] = len(turns_df)
+    while len(ancestors) > MAX_LINEAGE:
+        del ancestors[next(iter(ancestors))]
+    combined.attrs["lineage"] = {"version": combined.attrs["data_version"], "ancestors": ancestors}
+    return combined
+
+
+# Ancestor versions remembered per store; indexes older than that are rebuilt
+MAX_LINEAGE = 64
+
+
+def _ancestors(turns_df: pd.DataFrame) -> dict:
+    # attrs propagate to frames derived from a store (slices, filters); the lineage
+    # only describes the store it was stamped on
+    lineage = turns_df.attrs.get("lineage")
+    if not lineage or lineage["version"] != turns_df.attrs.get("data_version"):
+        return {}
+    return lineage["ancestors"]
+
+
+def appended_rows(turns_df: pd.DataFrame, data_version):
+    """
+    Rows the store had at `data_version`, when turns_df is that store or was built
+    from it by append_turns (so those rows are unchanged and new turns follow
+    them); None otherwise, e.g. after a full reload.
+    """
+    if data_version == turns_df.attrs.get("data_version"):
+        return len(turns_df)
+    return _ancestors(turns_df).get(data_version)
+
+
+def base_version(turns_df: pd.DataFrame):
+    """
+    (version, rows) of the oldest remembered store turns_df was appended from, e.g.
+    the one loaded from disk before uploads; turns_df's own when it was not appended to.
+    """
+    return next(iter(_ancestors(turns_df).items()), (turns_df.attrs.get("data_version"), len(turns_df)))
+
+
+def turns_data_version() -> str:
+    """Version of the turn store on disk, as load_turns stamps it."""
+    parts = discover_parts(TURNS_PARTITION_DIR)
+    if parts:
+        return parts_data_version(parts, TURNS_PARTITION_DIR, file_data_version)
+    return file_data_version(TURNS_FILE)
+
+
+def _finish_turns(turns_df: pd.DataFrame, data_version) -> pd.DataFrame:
+    encode_turn_issues(turns_df)
+    turns_df.attrs["data_version"] = data_version
+    return intern_turn_columns(turns_df)
+
 
 @st.cache_data
 def load_turns():
-    records = []
-    with open(f"{DATA_DIR}/dashboard_turns.jsonl", "r", encoding="utf-8") as f:
-        for line in f:
-            records.append(json.loads(line))
-    return pd.DataFrame(records)
+    """All turns: the partitioned log under TURNS_PARTITION_DIR when it has parts, else TURNS_FILE."""
+    parts = discover_parts(TURNS_PARTITION_DIR)
+    if parts:
+        return _finish_turns(read_parts(parts), parts_data_version(parts, TURNS_PARTITION_DIR, file_data_version))
+    with open(TURNS_FILE, "rb") as f:
+        turns_df = fastjson.turns_frame(f)
+    return _finish_turns(turns_df, file_data_version(TURNS_FILE))
+
+
+@st.cache_data
+def load_turn_partitions(start=None, end=None, datasets=None, root=TURNS_PARTITION_DIR):
+    """
+    Turns of the partitions in a date range (inclusive ISO dates) and/or of some
+    datasets; pruned parts are never opened. Carries its own data_version.
+    """
+    parts = discover_parts(root, start=start, end=end, datasets=datasets)
+    return _finish_turns(read_parts(parts), parts_data_version(parts, root, file_data_version))
 
 @st.cache_data
 def load_topics():
-    with open(f"{DATA_DIR}/dashboard_topics.json", "r", encoding="utf-8") as f:
-        return pd.DataFrame(json.load(f))
+    with open(f"{DATA_DIR}/dashboard_topics.json", "rb") as f:
+        return pd.DataFrame(fastjson.load(f))
 
 @st.cache_data
 def load_repairs():
-    with open(f"{DATA_DIR}/dashboard_repairs.json", "r", encoding="utf-8") as f:
-        return pd.DataFrame(json.load(f))
+    with open(f"{DATA_DIR}/dashboard_repairs.json", "rb") as f:
+        return pd.DataFrame(fastjson.load(f))
+
+def _as_lines(value) -> list:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    if isinstance(value, str) and value:
+        return [value]
+    return []
+
+
+def format_repair(repair: dict):
+    """
+    One repair package with everything render_repair shows already formatted.
+
+    Returns a read-only mapping with:
+    - topic_id, topic_label
+    - root_cause_html: the highlighted root-cause block
+    - prompt_changes_code: suggested prompt changes, one per line
+    - system_prompt_snippet
+    - guardrails_markdown: numbered guardrail list
+    - evaluation_checks: tuple of checks
+    """
+    guardrails = _as_lines(repair.get("guardrail_rules"))
+    return MappingProxyType({
+        "topic_id": int(repair["topic_id"]),
+        "topic_label": repair.get("topic_label", ""),
+        "root_cause_html": f"""
+            <div style="background: #fef2f2; border-left: 4px solid #dc2626; border-radius: 8px; padding: 1rem; margin: 0.5rem 0;">
+                <p style="margin: 0; font-size: 1rem; line-height: 1.6; color: #1e293b;">{repair.get('root_cause', '')}</p>
+            </div>
+            """,
+        "prompt_changes_code": "\n".join(_as_lines(repair.get("suggested_prompt_changes"))),
+        "system_prompt_snippet": repair.get("system_prompt_snippet") or "",
+        "guardrails_markdown": "\n".join(f"{idx}. {g}" for idx, g in enumerate(guardrails, 1)),
+        "evaluation_checks": tuple(_as_lines(repair.get("evaluation_checks"))),
+    })
+
+
+@st.cache_resource
+def load_repair_index():
+    """
+    Repair packages keyed by topic_id, formatted once at load so rendering a
+    package is a dict lookup. Shared across reruns and sessions; records are
+    read-only mappings.
+    """
+    with open(f"{DATA_DIR}/dashboard_repairs.json", "rb") as f:
+        repairs = fastjson.load(f)
+    index = {}
+    for repair in repairs:
+        # First package wins when a topic has several, as the old .iloc[0] lookup did
+        index.setdefault(int(repair["topic_id"]), format_repair(repair))
+    return MappingProxyType(index)
 
 @st.cache_data
 def load_sandbox_cases():
     try:
-        with open(f"{DATA_DIR}/dashboard_sandbox_cases.json", "r", encoding="utf-8") as f:
-            return pd.DataFrame(json.load(f))
+        with open(f"{DATA_DIR}/dashboard_sandbox_cases.json", "rb") as f:
+            return pd.DataFrame(fastjson.load(f))
     except FileNotFoundError:
         return pd.DataFrame()
+
+
+def _prompt_segments(prompt):
+    """Split a system prompt into sentences/lines, the unit the repair diff works on."""
+    return [seg for seg in re.split(r"(?<=[.!?])\s+|\n+", prompt or "") if seg.strip()]
+
+
+def diff_prompts(baseline, repaired):
+    """Sentence-level diff as a list of {"op": "equal"|"removed"|"added", "text"}."""
+    before, after = _prompt_segments(baseline), _prompt_segments(repaired)
+    diff = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=before, b=after, autojunk=False).get_opcodes():
+        if tag == "equal":
+            diff += [{"op": "equal", "text": seg} for seg in before[i1:i2]]
+            continue
+        diff += [{"op": "removed", "text": seg} for seg in before[i1:i2]]
+        diff += [{"op": "added", "text": seg} for seg in after[j1:j2]]
+    return diff
+
+
+@st.cache_resource
+def load_sandbox_index():
+    """
+    Sandbox cases keyed by topic_id, each with its baseline -> repaired prompt diff
+    precomputed. Loaded on first use and shared across reruns and sessions
+    (cache_resource hands back the same dict, so lookups are O(1) without a copy);
+    treat it as read-only.
+    """
+    try:
+        with open(f"{DATA_DIR}/dashboard_sandbox_cases.json", "rb") as f:
+            cases = fastjson.load(f)
+    except FileNotFoundError:
+        return {}
+    return {
+        int(case["topic_id"]): {
+            **case,
+            "prompt_diff": diff_prompts(case.get("baseline_system_prompt"), case.get("repaired_system_prompt")),
+        }
+        for case in cases
+    }
@@ -0,0 +1,113 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from logic import aggregations
+from logic.artifacts import live_tables, register_view_tables
+from logic.streaming import build_kpi_cube
+
+# ---- Dataset slices ----
+# Turns carry a `dataset` ("CCPE", "UPLOAD", ...). Once per turn store version
+# the store is partitioned by dataset: the row positions of each dataset plus
+# per-dataset summaries that merge:
+#
+#   kpi_cube                dataset -> streaming partial (shared with the bundle)
+#   conversation_summaries  dataset -> summarize_conversations table
+#
+# A slice (some datasets) is the store's rows of those datasets in store order,
+# stamped with its own data_version. Its KPI cube and conversation summary are
+# assembled from the per-dataset summaries and registered for that version, so
+# pages read them through bundle_table like any precomputed table.
+
+MAX_STORES = 4
+_stores = {}
+_slices = {}
+
+
+def build_dataset_store(turns_df: pd.DataFrame) -> dict:
+    """
+    Per-dataset partitions of a turn store.
+
+    Returns dict with:
+    - positions: dataset -> row positions (ascending)
+    - kpi_cube: dataset -> streaming partial
+    - conversation_summaries: dataset -> summarize_conversations table
+    """
+    positions = {
+        dataset: np.asarray(rows)
+        for dataset, rows in turns_df.groupby("dataset", sort=True, observed=True).indices.items()
+    }
+    tables = live_tables(turns_df.attrs.get("data_version")) or {}
+    kpi_cube = tables.get("kpi_cube")
+    if kpi_cube is None:
+        kpi_cube = build_kpi_cube(turns_df)
+    return {
+        "positions": positions,
+        "kpi_cube": kpi_cube,
+        "conversation_summaries": {
+            dataset: aggregations.summarize_conversations(turns_df.iloc[rows])
+            for dataset, rows in positions.items()
+        },
+    }
+
+
+def _remember(cache: dict, key, value):
+    cache[key] = value
+    while len(cache) > MAX_STORES:
+        del cache[next(iter(cache))]
+    return value
+
+
+def dataset_store(turns_df: pd.DataFrame) -> dict:
+    """build_dataset_store result, kept per data_version."""
+    version = turns_df.attrs.get("data_version")
+    store = _stores.get(version)
+    if store is None:
+        store = _remember(_stores, version, build_dataset_store(turns_df))
+    return store
+
+
+def merge_conversation_summaries(summaries: list, turns_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    summarize_conversations(turns_df) from per-dataset tables of its datasets.
+    A conv_id present in several datasets is one conversation across them, so
+    those are re-summarized from turns_df.
+    """
+    summaries = [s for s in summaries if not s.empty]
+    if not summaries:
+        return pd.DataFrame()
+    merged = pd.concat(summaries, ignore_index=True)
+    shared = merged.loc[merged["conv_id"].duplicated(), "conv_id"].unique()
+    if len(shared) > 0:
+        return aggregations.update_conversation_summary(merged, turns_df, shared)
+    return merged.sort_values("conv_id", kind="stable").reset_index(drop=True)
+
+
+def slice_datasets(turns_df: pd.DataFrame, datasets=None) -> pd.DataFrame:
+    """
+    Turns of `datasets`, in store order. With no selection, or every dataset
+    selected, the store itself is returned. Slices carry attrs["datasets"].
+    """
+    store = dataset_store(turns_df)
+    selected = sorted(d for d in set(datasets or ()) if d in store["positions"])
+    if datasets is None or len(selected) == len(store["positions"]):
+        return turns_df
+
+    version = turns_df.attrs.get("data_version")
+    slice_version = hashlib.sha256(f"{version}|datasets={','.join(selected)}".encode("utf-8")).hexdigest()
+    sliced = _slices.get(slice_version)
+    if sliced is not None:
+        return sliced
+
+    rows = np.sort(np.concatenate([store["positions"][d] for d in selected])) if selected else np.array([], dtype=np.intp)
+    sliced = turns_df.iloc[rows].reset_index(drop=True)
+    sliced.attrs["data_version"] = slice_version
+    sliced.attrs["datasets"] = tuple(selected)
+    register_view_tables(slice_version, {
+        "kpi_cube": {d: store["kpi_cube"][d] for d in selected if d in store["kpi_cube"]},
+        "conversation_summary": merge_conversation_summaries(
+            [store["conversation_summaries"][d] for d in selected], sliced
+        ),
+    })
+    return _remember(_slices, slice_version, sliced)
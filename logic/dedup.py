@@ -0,0 +1,200 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from logic.data_loader import appended_rows
+from logic.search import tokenize
+
+# ---- Near-duplicate conversations (MinHash + LSH) ----
+# Each conversation is reduced to the set of word 3-gram shingles of its turns,
+# summarized by a NUM_PERM-value MinHash signature. Signatures are split into
+# BANDS bands of ROWS values; conversations sharing any band bucket are
+# candidates, and candidates whose estimated Jaccard similarity reaches
+# SIMILARITY_THRESHOLD are merged into one cluster (union-find). Only bucket
+# mates are compared, so adding a conversation costs O(BANDS) lookups instead
+# of a pass over every other conversation.
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+
+def conversation_shingles(texts) -> set:
+    tokens = [t for text in texts for t in tokenize(text)]
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(shingles: set) -> np.ndarray:
+    """NUM_PERM minimum hash values over the shingles (all-max for an empty set)."""
+    if not shingles:
+        return np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    hashes %= _MERSENNE_PRIME
+    # (a * x + b) mod p for every permutation/shingle pair; a, x < 2^31 so nothing overflows
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def empty_dedup_index():
+    return {
+        "signatures": {},
+        "buckets": {},
+        "parent": {},
+        "n_rows": 0,
+        # data_version of the store the rows were indexed from
+        "data_version": None,
+    }
+
+
+def _find(parent: dict, conv_id):
+    root = conv_id
+    while parent[root] != root:
+        root = parent[root]
+    while parent[conv_id] != root:
+        parent[conv_id], conv_id = root, parent[conv_id]
+    return root
+
+
+def _union(parent: dict, a, b):
+    root_a, root_b = _find(parent, a), _find(parent, b)
+    if root_a != root_b:
+        # Older (smaller) conv_id stays the root so cluster ids are stable
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _band_keys(signature: np.ndarray):
+    return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+
+def _link(index: dict, conv_id):
+    """Union conv_id with every similar conversation sharing one of its band buckets."""
+    signatures = index["signatures"]
+    parent = index["parent"]
+    signature = signatures[conv_id]
+    for key in _band_keys(signature):
+        for other in index["buckets"].get(key, []):
+            if other == conv_id or _find(parent, other) == _find(parent, conv_id):
+                continue
+            if np.mean(signatures[other] == signature) >= SIMILARITY_THRESHOLD:
+                _union(parent, other, conv_id)
+
+
+def add_conversations(index: dict, turns_df: pd.DataFrame, conv_ids) -> dict:
+    """
+    (Re)index `conv_ids` from all of their turns in turns_df. A conversation that
+    was indexed before (its later turns arrived in an append) is taken out of its
+    buckets, and its old cluster is split up and re-linked, before it is re-inserted.
+    """
+    signatures = index["signatures"]
+    buckets = index["buckets"]
+    parent = index["parent"]
+    conv_ids = {int(conv_id) for conv_id in conv_ids}
+
+    relink = set()
+    changed = conv_ids & signatures.keys()
+    if changed:
+        for conv_id in changed:
+            for key in _band_keys(signatures[conv_id]):
+                buckets[key].remove(conv_id)
+        stale_roots = {_find(parent, conv_id) for conv_id in changed}
+        relink = {conv_id for conv_id in parent if _find(parent, conv_id) in stale_roots}
+        for conv_id in relink:
+            parent[conv_id] = conv_id
+
+    conv_turns = turns_df[turns_df["conv_id"].isin(conv_ids)].sort_values("turn_id", kind="stable")
+    for conv_id, conv in conv_turns.groupby("conv_id", sort=True):
+        conv_id = int(conv_id)
+        signatures[conv_id] = minhash_signature(conversation_shingles(conv["text"]))
+        parent.setdefault(conv_id, conv_id)
+        for key in _band_keys(signatures[conv_id]):
+            buckets.setdefault(key, []).append(conv_id)
+
+    # Links are symmetric, so comparing each new or re-signed conversation (and each
+    # member of a split cluster) with its bucket mates restores every cluster
+    for conv_id in sorted(conv_ids | relink):
+        if conv_id in signatures:
+            _link(index, conv_id)
+    return index
+
+
+def build_dedup_index(turns_df: pd.DataFrame) -> dict:
+    index = add_conversations(empty_dedup_index(), turns_df, turns_df["conv_id"].unique())
+    index["n_rows"] = len(turns_df)
+    index["data_version"] = turns_df.attrs.get("data_version")
+    return index
+
+
+def sync_dedup_index(index, turns_df: pd.DataFrame) -> dict:
+    """
+    Bring an index up to date with the turn store: when the store was appended to
+    since, only the conversations the new turns belong to are (re)indexed, from all
+    of their turns; anything else (e.g. a full reload) rebuilds it.
+    """
+    rows = None if index is None else appended_rows(turns_df, index.get("data_version"))
+    if rows is None or rows != index["n_rows"]:
+        return build_dedup_index(turns_df)
+    if rows < len(turns_df):
+        add_conversations(index, turns_df, turns_df["conv_id"].iloc[rows:].unique())
+        index["n_rows"] = len(turns_df)
+    index["data_version"] = turns_df.attrs.get("data_version")
+    return index
+
+
+def cluster_of(index: dict, conv_id):
+    """Cluster id (smallest conv_id in the cluster) of an indexed conversation."""
+    conv_id = int(conv_id)
+    if conv_id not in index["parent"]:
+        return conv_id
+    return _find(index["parent"], conv_id)
+
+
+def cluster_sizes(index: dict) -> dict:
+    sizes = {}
+    for conv_id in index["parent"]:
+        root = _find(index["parent"], conv_id)
+        sizes[root] = sizes.get(root, 0) + 1
+    return sizes
+
+
+def collapse_near_duplicates(conv_list: list, index: dict) -> list:
+    """
+    Keep the first (best-ranked) conversation of each near-duplicate cluster in a
+    ranked list. Kept entries gain `n_near_duplicates`: how many other conversations
+    in the log fall in the same cluster.
+    """
+    sizes = cluster_sizes(index)
+    seen = set()
+    collapsed = []
+    for conv in conv_list:
+        cluster = cluster_of(index, conv["conv_id"])
+        if cluster in seen:
+            continue
+        seen.add(cluster)
+        collapsed.append({**conv, "n_near_duplicates": sizes.get(cluster, 1) - 1})
+    return collapsed
+
+
+def top_distinct_conversations(rank, index: dict, limit: int = 50) -> list:
+    """
+    The top `limit` conversations of a ranking after collapse_near_duplicates.
+    `rank(n)` returns the ranking's top n; more candidates are ranked (doubling)
+    until `limit` distinct clusters are found or the ranking runs out, so a
+    collapsed duplicate lets the next distinct conversation in.
+    """
+    n = limit
+    while True:
+        ranked = rank(n)
+        collapsed = collapse_near_duplicates(ranked, index)
+        if len(collapsed) >= limit or len(ranked) < n:
+            return collapsed[:limit]
+        n *= 2
@@ -0,0 +1,368 @@
+# ---- DuckDB implementation of logic.aggregations ----
+# Same functions and arguments as the pandas backend, except `turns` may also be a
+# path/glob to JSONL or Parquet turn files. Filters (speaker, topic_id, non-null
+# satisfaction_score) are then pushed down into the scan instead of loading the log.
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # optional dependency
+    duckdb = None
+
+from logic.aggregations import (
+    RANK_PRECISION,
+    SEVERITY_MAP,
+    build_why_it_works_patterns,
+    get_top_performing_topics_from_conversations,
+    infer_conversation_theme,
+    rank_topics,
+)
+
+
+def _connect():
+    if duckdb is None:
+        raise ImportError("The duckdb backend requires the 'duckdb' package (pip install duckdb).")
+    return duckdb.connect()
+
+
+# Explicit schema for file scans so JSONL type inference cannot widen ints to HUGEINT
+TURN_COLUMNS = {
+    "dataset": "VARCHAR",
+    "conv_id": "BIGINT",
+    "turn_id": "BIGINT",
+    "speaker": "VARCHAR",
+    "text": "VARCHAR",
+    "satisfaction_score": "DOUBLE",
+    "low_satisfaction": "BOOLEAN",
+    "issues": "VARCHAR[]",
+    "severity": "VARCHAR",
+    "reason": "VARCHAR",
+    "topic_id": "BIGINT",
+    "topic_label": "VARCHAR",
+    "satisfaction_source": "VARCHAR",
+}
+
+
+def _source_sql(turns) -> str:
+    """
+    SQL table expression for a DataFrame (registered as `turns_src`) or a file path,
+    with `pos`: the row's position in the frame or file. First-seen tie-breaks order
+    by it, as the pandas backend's do by row order; a window without ORDER BY would
+    number rows in whatever order a parallel scan produces them.
+    """
+    if isinstance(turns, pd.DataFrame):
+        return "turns_src"
+    path = str(turns).replace("'", "''")
+    if path.endswith(".parquet"):
+        scan = f"read_parquet('{path}')"
+    else:
+        columns = ", ".join(f"'{name}': '{sql_type}'" for name, sql_type in TURN_COLUMNS.items())
+        scan = f"read_json('{path}', format='newline_delimited', columns={{{columns}}})"
+    return f"(SELECT * EXCLUDE (ordinality), ordinality - 1 AS pos FROM {scan} WITH ORDINALITY)"
+
+
+def _query(turns, sql: str, params=None) -> pd.DataFrame:
+    """
+    Run `sql` against a `turns` relation. The JSONL log stores missing scores as NaN,
+    which pandas treats as missing; normalise them to NULL so SQL matches pandas.
+    """
+    replacements = ["NULLIF(satisfaction_score, 'NaN'::DOUBLE) AS satisfaction_score"]
+    if isinstance(turns, pd.DataFrame):
+        # Interned (categorical) columns arrive as ENUMs; expose them as plain text
+        replacements += [
+            f"CAST({name} AS VARCHAR) AS {name}"
+            for name, dtype in turns.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+        ]
+    con = _connect()
+    try:
+        if isinstance(turns, pd.DataFrame):
+            con.register("turns_src", turns.assign(pos=np.arange(len(turns), dtype=np.int64)))
+        con.execute(
+            f"CREATE TEMP VIEW turns AS SELECT * REPLACE ({', '.join(replacements)}) "
+            f"FROM {_source_sql(turns)}"
+        )
+        return con.execute(sql, params or []).df()
+    finally:
+        con.close()
+
+
+def compute_severity_stats(turns, topic_id=None):
+    topic_filter = "AND topic_id = ?" if topic_id is not None else ""
+    params = [topic_id] if topic_id is not None else []
+    counts_df = _query(
+        turns,
+        f"""
+        SELECT severity, COUNT(*) AS n, MIN(pos) AS first_pos
+        FROM turns
+        WHERE severity IS NOT NULL {topic_filter}
+        GROUP BY severity
+        ORDER BY n DESC, first_pos
+        """,
+        params,
+    )
+
+    valid = counts_df[counts_df["severity"].isin(SEVERITY_MAP.keys())]
+    avg = None
+    counts = {}
+
+    if not valid.empty:
+        total = valid["n"].sum()
+        score_sum = sum(SEVERITY_MAP[s] * n for s, n in zip(valid["severity"], valid["n"]))
+        avg = round(score_sum / total, 2)
+        counts = {s: int(n) for s, n in zip(valid["severity"], valid["n"])}
+        dom = valid.iloc[0]["severity"]
+    elif (counts_df["severity"] == "NONE").any():
+        dom = "NONE"
+        counts = {s: int(n) for s, n in zip(counts_df["severity"], counts_df["n"])}
+    else:
+        dom = "N/A"
+
+    return {
+        "avg_severity": avg,
+        "severity_counts": counts,
+        "dominant_severity": dom
+    }
+
+
+def get_success_topics(turns, top_n=5):
+    result = _query(
+        turns,
+        """
+        SELECT topic_id,
+               FSUM(satisfaction_score) / COUNT(satisfaction_score) AS mean_satisfaction,
+               COUNT(satisfaction_score) AS successful_turns
+        FROM turns
+        WHERE speaker = 'USER' AND low_satisfaction = FALSE AND satisfaction_score IS NOT NULL
+        GROUP BY topic_id
+        ORDER BY mean_satisfaction DESC, topic_id
+        LIMIT ?
+        """,
+        [top_n],
+    )
+    return result if not result.empty else pd.DataFrame()
+
+
+def get_top_success_topics_detailed(turns, topics_df: pd.DataFrame, top_n=5):
+    by_topic = _query(
+        turns,
+        """
+        SELECT topic_id,
+               FSUM(satisfaction_score) / COUNT(satisfaction_score) AS mean_satisfaction,
+               COUNT(satisfaction_score) AS successful_turns,
+               CAST(SUM(CAST(low_satisfaction AS INTEGER)) AS BIGINT) AS low_sat_count
+        FROM turns
+        WHERE speaker = 'USER' AND satisfaction_score IS NOT NULL
+        GROUP BY topic_id
+        ORDER BY topic_id
+        """,
+    )
+    if by_topic.empty:
+        return pd.DataFrame()
+
+    by_topic["low_satisfaction_rate"] = by_topic["low_sat_count"] / by_topic["successful_turns"]
+    result = by_topic.merge(
+        topics_df[["topic_id", "topic_label", "n_examples"]],
+        on="topic_id",
+        how="left"
+    )
+    return result.sort_values(
+        by=["low_satisfaction_rate", "mean_satisfaction"],
+        ascending=[True, False]
+    ).head(top_n)
+
+
+def _pandas_means(score_lists: pd.Series) -> list:
+    """
+    Series.mean of each list of scores (in turn order). The pandas backend sums
+    per-conversation scores with numpy's pairwise summation, which neither SUM nor
+    FSUM reproduces bit for bit; SQL means are only used for ranking.
+    """
+    return [float(np.asarray(scores, dtype="float64").sum() / len(scores)) for scores in score_lists]
+
+
+def get_successful_conversations(turns, topic_id: int, limit: int = 5):
+    conv_df = _query(
+        turns,
+        """
+        SELECT conv_id,
+               MIN(satisfaction_score) FILTER (WHERE speaker = 'USER') AS min_satisfaction,
+               MAX(satisfaction_score) FILTER (WHERE speaker = 'USER') AS max_satisfaction,
+               FSUM(satisfaction_score) FILTER (WHERE speaker = 'USER') / COUNT(satisfaction_score) FILTER (WHERE speaker = 'USER') AS mean_satisfaction,
+               LIST(satisfaction_score ORDER BY pos) FILTER (WHERE speaker = 'USER' AND satisfaction_score IS NOT NULL) AS user_scores,
+               MAX(turn_id) AS turn_count,
+               COUNT(*) FILTER (WHERE speaker = 'SYSTEM') AS system_turns,
+               COUNT(*) FILTER (WHERE speaker = 'USER') AS user_turns,
+               CAST(SUM(CAST(low_satisfaction AS INTEGER)) FILTER (WHERE speaker = 'USER') AS BIGINT) AS low_sat_count
+        FROM turns
+        WHERE topic_id = ?
+        GROUP BY conv_id
+        HAVING COUNT(satisfaction_score) FILTER (WHERE speaker = 'USER') > 0
+        ORDER BY ROUND(mean_satisfaction, ?) DESC, low_sat_count ASC, conv_id
+        LIMIT ?
+        """,
+        [topic_id, RANK_PRECISION, limit],
+    )
+    conv_df["mean_satisfaction"] = _pandas_means(conv_df.pop("user_scores"))
+    return conv_df.to_dict("records")
+
+
+def get_success_insights_for_topic(turns, topic_id: int) -> dict:
+    summary = _query(
+        turns,
+        """
+        SELECT COUNT(*) AS n_turns,
+               COUNT(*) FILTER (WHERE len(issues) > 0) AS n_with_issues,
+               COUNT(*) FILTER (WHERE list_contains(issues, 'UNSUPPORTED_INTENT')) AS n_unsupported
+        FROM turns
+        WHERE topic_id = ?
+        """,
+        [topic_id],
+    ).iloc[0]
+
+    if summary["n_turns"] == 0:
+        return {
+            "clear_intent": "N/A",
+            "concise": "N/A",
+            "kb_coverage": "N/A",
+            "dominant_issues": {}
+        }
+
+    avg_turns = _query(
+        turns,
+        "SELECT AVG(max_turn) AS avg_turns FROM "
+        "(SELECT MAX(turn_id) AS max_turn FROM turns WHERE topic_id = ? GROUP BY conv_id)",
+        [topic_id],
+    ).iloc[0]["avg_turns"]
+    issue_counts = _issue_counts(turns, "topic_id = ?", [topic_id], limit=3)
+
+    clear_intent_pct = (1 - summary["n_with_issues"] / summary["n_turns"]) * 100
+    kb_coverage = (1 - summary["n_unsupported"] / summary["n_turns"]) * 100
+
+    return {
+        "clear_intent": f"{clear_intent_pct:.0f}%",
+        "concise": f"{avg_turns:.1f} turns",
+        "kb_coverage": f"{kb_coverage:.0f}%",
+        "dominant_issues": issue_counts
+    }
+
+
+def _issue_counts(turns, where: str, params: list, limit: int) -> dict:
+    counts = _query(
+        turns,
+        f"""
+        SELECT issue, COUNT(*) AS n, MIN(seq) AS first_pos
+        FROM (
+            -- Exploded order: by row, then by position in the row's list
+            SELECT issue, row_number() OVER (ORDER BY pos, idx) AS seq
+            FROM (
+                SELECT unnest(issues) AS issue, generate_subscripts(issues, 1) AS idx, pos
+                FROM turns
+                WHERE {where}
+            )
+        )
+        GROUP BY issue
+        ORDER BY n DESC, first_pos
+        LIMIT ?
+        """,
+        params + [limit],
+    )
+    return {issue: int(n) for issue, n in zip(counts["issue"], counts["n"])}
+
+
+def get_top_conversations(turns, limit: int = 50):
+    # Most frequent topic per conversation; ties go to the topic seen first (pandas value_counts order)
+    conv_df = _query(
+        turns,
+        """
+        WITH topic_modes AS (
+            SELECT conv_id, topic_id
+            FROM (
+                SELECT conv_id, topic_id,
+                       row_number() OVER (
+                           PARTITION BY conv_id ORDER BY COUNT(*) DESC, MIN(turn_id)
+                       ) AS rk
+                FROM turns
+                WHERE topic_id IS NOT NULL
+                GROUP BY conv_id, topic_id
+            )
+            WHERE rk = 1
+        ),
+        convs AS (
+            SELECT conv_id,
+                   FSUM(satisfaction_score) FILTER (WHERE speaker = 'USER') / COUNT(satisfaction_score) FILTER (WHERE speaker = 'USER') AS mean_satisfaction,
+                   LIST(satisfaction_score ORDER BY pos) FILTER (WHERE speaker = 'USER' AND satisfaction_score IS NOT NULL) AS user_scores,
+                   MIN(satisfaction_score) FILTER (WHERE speaker = 'USER') AS min_satisfaction,
+                   MAX(satisfaction_score) FILTER (WHERE speaker = 'USER') AS max_satisfaction,
+                   CAST(MAX(turn_id) AS INTEGER) AS turn_count,
+                   COUNT(*) FILTER (WHERE speaker = 'USER') AS user_turns,
+                   COUNT(*) FILTER (WHERE speaker = 'SYSTEM') AS system_turns,
+                   CAST(SUM(CAST(low_satisfaction AS INTEGER)) FILTER (WHERE speaker = 'USER') AS BIGINT) AS low_sat_count
+            FROM turns
+            GROUP BY conv_id
+            HAVING COUNT(satisfaction_score) FILTER (WHERE speaker = 'USER') > 0
+        )
+        SELECT c.*,
+               1.0 - c.low_sat_count / c.user_turns AS success_rate,
+               COALESCE(m.topic_id, -1) AS topic_id,
+               (SELECT t.topic_label FROM turns t
+                WHERE t.conv_id = c.conv_id AND t.topic_id = m.topic_id AND t.topic_label IS NOT NULL
+                ORDER BY t.turn_id LIMIT 1) AS topic_label
+        FROM convs c
+        LEFT JOIN topic_modes m USING (conv_id)
+        ORDER BY ROUND(mean_satisfaction, ?) DESC, user_turns DESC, low_sat_count ASC, conv_id
+        LIMIT ?
+        """,
+        [RANK_PRECISION, limit],
+    )
+    if conv_df.empty:
+        return []
+    conv_df["mean_satisfaction"] = _pandas_means(conv_df.pop("user_scores"))
+
+    # Unclustered conversations get a theme inferred from their text, as in the pandas backend
+    needs_theme = conv_df["topic_label"].isna() | (conv_df["topic_id"] < 0)
+    if needs_theme.any():
+        theme_ids = conv_df.loc[needs_theme, "conv_id"].tolist()
+        theme_turns = _query(
+            turns,
+            "SELECT conv_id, turn_id, text FROM turns WHERE conv_id IN (SELECT unnest(?))",
+            [theme_ids],
+        )
+        themes = {
+            conv_id: infer_conversation_theme(group)
+            for conv_id, group in theme_turns.groupby("conv_id")
+        }
+        conv_df.loc[needs_theme, "topic_label"] = conv_df.loc[needs_theme, "conv_id"].map(themes)
+        conv_df.loc[needs_theme, "topic_id"] = -1
+
+    return conv_df.to_dict("records")
+
+
+def get_why_it_works_patterns(conv_list: list, turns) -> dict:
+    if not conv_list:
+        return {
+            "patterns": [],
+            "metrics": {}
+        }
+
+    conv_ids = [int(c["conv_id"]) for c in conv_list]
+    summary = _query(
+        turns,
+        """
+        SELECT COUNT(*) AS n_turns,
+               COUNT(*) FILTER (WHERE len(issues) > 0) AS n_with_issues,
+               COUNT(*) FILTER (WHERE list_contains(issues, 'UNSUPPORTED_INTENT')) AS n_unsupported
+        FROM turns
+        WHERE conv_id IN (SELECT unnest(?))
+        """,
+        [conv_ids],
+    ).iloc[0]
+
+    n_turns = summary["n_turns"]
+    clear_intent_pct = (1 - summary["n_with_issues"] / n_turns) * 100 if n_turns > 0 else 0
+    kb_alignment = (1 - summary["n_unsupported"] / n_turns) * 100 if n_turns > 0 else 0
+    issue_counts = _issue_counts(turns, "conv_id IN (SELECT unnest(?))", [conv_ids], limit=5)
+
+    return build_why_it_works_patterns(conv_list, clear_intent_pct, kb_alignment, issue_counts)
+
@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib decoder is used instead
+    orjson = None
+
+# ---- Fast JSON decoding ----
+# All data loaders decode through here: orjson when it is installed (several
+# times faster than the stdlib decoder), json otherwise, with the same results.
+# The turn log is written by pandas, which spells missing scores as a bare NaN;
+# orjson rejects that token, so those values are rewritten to null first.
+# NaN decodes to None on both paths.
+#
+# Turn logs are decoded straight into per-column buffers typed by TURN_SCHEMA,
+# so no list of per-turn dicts is kept and pandas does not re-infer dtypes.
+
+TURN_SCHEMA = {
+    "dataset": "str",
+    "conv_id": "int64",
+    "turn_id": "int64",
+    "speaker": "str",
+    "text": "str",
+    "satisfaction_score": "float64",
+    "low_satisfaction": "bool",
+    "issues": "object",
+    "severity": "str",
+    "reason": "str",
+    "topic_id": "int64",
+    "topic_label": "str",
+    "satisfaction_source": "str",
+}
+
+
+def parse_constant(name):
+    return None if name == "NaN" else float(name)
+
+
+def loads(data):
+    """Decode one JSON document (str or bytes). Raises json.JSONDecodeError on invalid input."""
+    if orjson is not None:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        # json.dumps/pandas write a missing object value as `"key": NaN`. Inside a
+        # string that byte sequence can only occur with the quote escaped (\"),
+        # so rewriting it is safe whenever no escaped form is present; other
+        # spellings make orjson fail and take the stdlib path below.
+        if b"NaN" in data and b'\\": NaN' not in data:
+            data = data.replace(b'": NaN', b'": null')
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data, parse_constant=parse_constant)
+
+
+def load(fp):
+    """Decode a whole JSON file opened in text or binary mode."""
+    return loads(fp.read())
+
+
+def read_turn_columns(lines) -> dict:
+    """
+    Decode JSONL turn lines into column buffers: {column: [value per turn]}.
+    Columns appear in first-seen order; turns missing a field get None.
+    """
+    columns = {}
+    n = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        record = loads(line)
+        for key, value in record.items():
+            buffer = columns.get(key)
+            if buffer is None:
+                buffer = columns[key] = [None] * n
+            buffer.append(value)
+        n += 1
+        if len(record) < len(columns):
+            for buffer in columns.values():
+                if len(buffer) < n:
+                    buffer.append(None)
+    return columns
+
+
+def _typed_column(values: list, dtype):
+    if dtype == "float64":
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            return pd.Series(values)
+    if dtype in ("int64", "bool"):
+        array = np.array(values)
+        # Any None or mixed value leaves an object array; let pandas infer those
+        if array.dtype.kind == ("i" if dtype == "int64" else "b"):
+            return array.astype(dtype)
+        return pd.Series(values)
+    if dtype == "str":
+        return pd.Series(values, dtype="str")
+    return pd.Series(values, dtype=object)
+
+
+def empty_turns_frame() -> pd.DataFrame:
+    """Zero-row frame with every TURN_SCHEMA column."""
+    return pd.DataFrame({key: _typed_column([], dtype) for key, dtype in TURN_SCHEMA.items()})
+
+
+def turns_frame(lines) -> pd.DataFrame:
+    """DataFrame of JSONL turn lines with TURN_SCHEMA dtypes (unknown columns inferred)."""
+    columns = read_turn_columns(lines)
+    return pd.DataFrame({
+        key: _typed_column(values, TURN_SCHEMA[key]) if key in TURN_SCHEMA else pd.Series(values)
+        for key, values in columns.items()
+    })
@@ -0,0 +1,171 @@
+import hashlib
+import os
+
+from logic import aggregations
+from logic.artifacts import live_tables, register_live_tables
+from logic.data_loader import TURNS_FILE, TURNS_PARTITION_DIR, append_turns, load_turns
+from logic.fastjson import turns_frame
+from logic.partitions import discover_parts, read_parts
+from logic.sampling import extend_kpi_sample
+from logic.streaming import build_kpi_cube, extend_kpi_cube
+
+# ---- Hot reload of the turn store ----
+# The app polls the turn sources (app.py, every POLL_SECONDS) and applies only
+# what changed:
+#
+#   single log:  bytes appended to dashboard_turns.jsonl are read from where the
+#                last read stopped (complete lines only)
+#   partitions:  parts that appeared under data/turns are read (writers should
+#                create parts atomically, e.g. write to a dot-file and rename)
+#
+# New turns are appended to the session's turn store, which bumps its
+# data_version, and the derived tables (KPI cube, conversation summary, topic
+# labels) are updated from the delta and registered under the new version, so
+# pages keep reading them through bundle_table. Anything that is not an append
+# (a rewritten/shrunk log, a changed or removed part, switching between the
+# single log and partitions) falls back to a full reload.
+
+POLL_SECONDS = 5
+# Bytes before the last read position that must be unchanged for the log to count as appended to
+TAIL_CHECK_BYTES = 4096
+
+
+def _tail_digest(path, size) -> str:
+    start = max(0, size - TAIL_CHECK_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(size - start)).hexdigest()
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def watch_state(turns_file=TURNS_FILE, partition_dir=TURNS_PARTITION_DIR) -> dict:
+    """
+    What the turn sources look like now, as load_turns reads them.
+
+    Returns dict with:
+    - mode: "parts" or "file"
+    - files: path -> (size, mtime_ns) of every source file
+    - parts: (parts mode) discover_parts result
+    - read_to: (file mode) bytes of the log already loaded
+    - tail: (file mode) digest of the bytes just before read_to
+    """
+    parts = discover_parts(partition_dir)
+    if parts:
+        return {"mode": "parts", "files": {part["path"]: _stat(part["path"]) for part in parts}, "parts": parts}
+    if not os.path.exists(turns_file):
+        return {"mode": "file", "files": {}, "read_to": 0, "tail": None}
+    size, mtime_ns = _stat(turns_file)
+    return {
+        "mode": "file",
+        "files": {turns_file: (size, mtime_ns)},
+        "read_to": size,
+        "tail": _tail_digest(turns_file, size),
+    }
+
+
+def _read_log_delta(state, path):
+    """(new turns, new state) for a grown single log, or None when it was not just appended to."""
+    size, mtime_ns = _stat(path)
+    read_to = state["read_to"]
+    if size < read_to or _tail_digest(path, read_to) != state["tail"]:
+        return None
+    with open(path, "rb") as f:
+        f.seek(read_to)
+        data = f.read(size - read_to)
+    # A writer may be mid-line; the rest is read on the next poll
+    complete = data.rfind(b"\n") + 1
+    new_turns = turns_frame(data[:complete].splitlines())
+    read_to += complete
+    return new_turns, {
+        "mode": "file",
+        "files": {path: (size, mtime_ns)},
+        "read_to": read_to,
+        "tail": _tail_digest(path, read_to),
+    }
+
+
+def _read_parts_delta(state, current):
+    """(new turns, new state) when parts were only added, or None."""
+    old_files = state["files"]
+    for path, stat in old_files.items():
+        if current["files"].get(path) != stat:
+            return None
+    added = [part for part in current["parts"] if part["path"] not in old_files]
+    return read_parts(added), current
+
+
+def build_live_tables(turns_df, topics_df) -> dict:
+    """The derived tables hot reload keeps current, computed from scratch."""
+    return {
+        "kpi_cube": build_kpi_cube(turns_df),
+        "conversation_summary": aggregations.summarize_conversations(turns_df),
+        "topic_label_index": aggregations.build_topic_label_index(turns_df, topics_df),
+    }
+
+
+def update_live_tables(tables: dict, turns_df, offset, topics_df) -> dict:
+    """Derived tables after turns_df.iloc[offset:] was appended to the store `tables` describe."""
+    new_turns = turns_df.iloc[offset:]
+    return {
+        "kpi_cube": extend_kpi_cube(tables["kpi_cube"], new_turns, offset),
+        "conversation_summary": aggregations.update_conversation_summary(
+            tables["conversation_summary"], turns_df, new_turns["conv_id"].unique()
+        ),
+        # Labels depend on every turn of a topic; cheap enough to rebuild from the store
+        "topic_label_index": aggregations.build_topic_label_index(turns_df, topics_df),
+    }
+
+
+def apply_turn_delta(turns_df, new_turns, topics_df):
+    """Append new turns to the store and register its updated derived tables; returns the new store."""
+    offset = len(turns_df)
+    combined = append_turns(turns_df, new_turns)
+
+    tables = live_tables(turns_df.attrs.get("data_version")) or {}
+    # Other tables may be registered for a version on their own (derived_table, exact KPIs)
+    if not {"kpi_cube", "conversation_summary", "topic_label_index"} <= tables.keys():
+        tables = build_live_tables(turns_df, topics_df)
+    register_live_tables(combined.attrs["data_version"], update_live_tables(tables, combined, offset, topics_df))
+    extend_kpi_sample(combined)
+    return combined
+
+
+def poll_turn_sources(state, turns_df, topics_df) -> dict:
+    """
+    Check the turn sources against `state` (from watch_state) and apply changes.
+
+    Returns dict with:
+    - mode: None (unchanged), "delta" or "full"
+    - turns_df: the (possibly updated) turn store
+    - state: watch state to pass to the next poll
+    - new_turns: number of turns added
+    """
+    current = watch_state()
+    if current["files"] == state["files"] and current["mode"] == state["mode"]:
+        return {"mode": None, "turns_df": turns_df, "state": state, "new_turns": 0}
+
+    delta = None
+    if current["mode"] == state["mode"] == "file" and current["files"]:
+        delta = _read_log_delta(state, TURNS_FILE)
+    elif current["mode"] == state["mode"] == "parts":
+        delta = _read_parts_delta(state, current)
+
+    if delta is None:
+        # Not an append: reload everything (turns added in this session, e.g. uploads, are dropped)
+        load_turns.clear()
+        reloaded = load_turns()
+        return {"mode": "full", "turns_df": reloaded, "state": current, "new_turns": len(reloaded) - len(turns_df)}
+
+    new_turns, state = delta
+    if new_turns.empty:
+        return {"mode": None, "turns_df": turns_df, "state": state, "new_turns": 0}
+    return {
+        "mode": "delta",
+        "turns_df": apply_turn_delta(turns_df, new_turns, topics_df),
+        "state": state,
+        "new_turns": len(new_turns),
+    }
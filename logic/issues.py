@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# ---- Issue bitmask encoding ----
+# Each turn's `issues` list is also stored as one integer (`issue_mask`), one bit
+# per issue type, so "has any issue", "has UNSUPPORTED_INTENT" and per-issue
+# counts are vectorized bit operations instead of Python walks over lists.
+# The list column is kept for display.
+#
+# Bits are assigned per store: its vocabulary (bit i = vocab[i]) starts with the
+# built-in types below, unseen types are appended in first-seen order, and it is
+# kept with the masks in turns_df.attrs["issue_vocab"] (and in the artifact
+# bundle). Masks are only ever decoded with the vocabulary they were encoded with.
+
+ISSUE_VOCAB = (
+    "MISSING_CONTEXT",
+    "UNSUPPORTED_INTENT",
+    "TONE_ISSUE",
+    "SUCCESS_BEST_PRACTICE",
+    "WRONG_FACT",
+    "LOOP",
+    "HANDOFF_REQUIRED",
+)
+MAX_ISSUE_TYPES = 63
+
+
+def encode_issues(issues, vocab=ISSUE_VOCAB):
+    """
+    Encode a column of issue lists into an int64 bitmask array (empty strings are
+    skipped). Returns (masks, vocab): `vocab` extended with the unseen types.
+    """
+    bits = {issue: 1 << i for i, issue in enumerate(vocab)}
+    vocab = list(vocab)
+    masks = np.zeros(len(issues), dtype=np.int64)
+    for i, issues_list in enumerate(issues):
+        if isinstance(issues_list, list):
+            for issue in issues_list:
+                if not issue:
+                    continue
+                bit = bits.get(issue)
+                if bit is None:
+                    if len(vocab) >= MAX_ISSUE_TYPES:
+                        raise ValueError(f"Too many issue types to encode (max {MAX_ISSUE_TYPES}): {issue}")
+                    vocab.append(issue)
+                    bit = bits[issue] = 1 << (len(vocab) - 1)
+                masks[i] |= bit
+    return masks, tuple(vocab)
+
+
+def encode_turn_issues(turns_df: pd.DataFrame, vocab=ISSUE_VOCAB) -> pd.DataFrame:
+    """Set the `issue_mask` column and its vocabulary (extending `vocab`) on a turn frame."""
+    turns_df["issue_mask"], turns_df.attrs["issue_vocab"] = encode_issues(turns_df["issues"], vocab)
+    return turns_df
+
+
+def issue_vocab(turns_df: pd.DataFrame) -> tuple:
+    """The vocabulary the frame's `issue_mask` column was encoded with."""
+    return turns_df.attrs.get("issue_vocab", ISSUE_VOCAB)
+
+
+def decode_issues(mask: int, vocab) -> list:
+    """Issue names set in one mask, in vocabulary order."""
+    return [issue for i, issue in enumerate(vocab) if mask & (1 << i)]
+
+
+def issue_masks(turns_df: pd.DataFrame):
+    """
+    (masks, vocab): the `issue_mask` column and its vocabulary, or an on-the-fly
+    encoding for frames loaded without it.
+    """
+    if "issue_mask" in turns_df.columns:
+        return turns_df["issue_mask"].to_numpy(dtype=np.int64), issue_vocab(turns_df)
+    return encode_issues(turns_df["issues"])
+
+
+def has_any_issue(masks: np.ndarray) -> np.ndarray:
+    return masks != 0
+
+
+def has_issue(masks: np.ndarray, issue: str, vocab) -> np.ndarray:
+    if issue not in vocab:
+        return np.zeros(len(masks), dtype=bool)
+    return (masks & (1 << vocab.index(issue))) != 0
+
+
+def count_issues(masks: np.ndarray, vocab, limit=None) -> dict:
+    """
+    Per-issue turn counts, most common first; ties keep first-seen order
+    (as value_counts over the exploded lists does).
+    """
+    counts = []
+    for i, issue in enumerate(vocab):
+        hits = (masks & (1 << i)) != 0
+        n = int(hits.sum())
+        if n:
+            counts.append((issue, n, int(hits.argmax())))
+    counts.sort(key=lambda c: (-c[1], c[2]))
+    return {issue: n for issue, n, _ in counts[:limit]}
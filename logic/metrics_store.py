@@ -0,0 +1,209 @@
+import sqlite3
+import time
+from datetime import datetime
+
+from logic.data_loader import DATA_DIR
+
+METRICS_DB = f"{DATA_DIR}/metrics_history.sqlite"
+
+METRIC_COLUMNS = [
+    "mean_sat",
+    "low_sat_rate",
+    "n_topics",
+    "low_sat_turns",
+    "avg_severity",
+    "total_turns",
+    "total_convs",
+]
+# Rates/means are averaged over a rollup bucket; the other metrics are counts
+AVERAGED_COLUMNS = ["mean_sat", "low_sat_rate", "avg_severity"]
+
+# Rollup resolutions (bucket width in seconds) and how long each is kept.
+# Raw snapshots are only needed for recent deltas; coarser buckets serve long ranges.
+ROLLUPS = {
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+}
+RETENTION = {
+    "raw": 2 * 24 * 60 * 60,
+    "minute": 30 * 24 * 60 * 60,
+    "hour": 365 * 24 * 60 * 60,
+    "day": None,
+}
+
+
+def _connect(db_path=None):
+    conn = sqlite3.connect(db_path or METRICS_DB)
+    conn.row_factory = sqlite3.Row
+    _ensure_schema(conn)
+    return conn
+
+
+def _ensure_schema(conn):
+    metric_defs = ", ".join(f"{c} REAL" for c in METRIC_COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS metrics_raw (ts INTEGER NOT NULL, {metric_defs})")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_raw_ts ON metrics_raw (ts)")
+
+    # Each rollup keeps a running sum and count of non-NULL values (for averages)
+    # and the last value (for point-in-time counts)
+    rollup_defs = ", ".join(f"sum_{c} REAL, last_{c} REAL" for c in METRIC_COLUMNS)
+    count_defs = ", ".join(f"count_{c} INTEGER NOT NULL DEFAULT 0" for c in AVERAGED_COLUMNS)
+    for name in ROLLUPS:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS metrics_{name} "
+            f"(bucket INTEGER PRIMARY KEY, n INTEGER NOT NULL, last_ts INTEGER NOT NULL, {rollup_defs}, {count_defs})"
+        )
+        # Rollups written before the counts existed: assume every snapshot of a bucket
+        # with a sum had a value (NULLs were only possible in all-NULL buckets then)
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info(metrics_{name})")}
+        for c in AVERAGED_COLUMNS:
+            if f"count_{c}" not in columns:
+                with conn:
+                    conn.execute(f"ALTER TABLE metrics_{name} ADD COLUMN count_{c} INTEGER NOT NULL DEFAULT 0")
+                    conn.execute(f"UPDATE metrics_{name} SET count_{c} = n WHERE sum_{c} IS NOT NULL")
+
+
+def _to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value  # NaN -> NULL
+
+
+def append_metrics(metrics: dict, ts=None, db_path=None):
+    """
+    Append one metrics snapshot and fold it into the minute/hour/day rollups.
+    `ts` is epoch seconds (defaults to now).
+    """
+    ts = int(ts if ts is not None else time.time())
+    values = [_to_float(metrics.get(c)) for c in METRIC_COLUMNS]
+
+    conn = _connect(db_path)
+    try:
+        with conn:
+            placeholders = ", ".join("?" for _ in METRIC_COLUMNS)
+            conn.execute(
+                f"INSERT INTO metrics_raw (ts, {', '.join(METRIC_COLUMNS)}) VALUES (?, {placeholders})",
+                [ts] + values,
+            )
+
+            sum_cols = ", ".join(f"sum_{c}, last_{c}" for c in METRIC_COLUMNS)
+            count_cols = ", ".join(f"count_{c}" for c in AVERAGED_COLUMNS)
+            updates = ", ".join(
+                f"sum_{c} = COALESCE(sum_{c}, 0) + COALESCE(excluded.sum_{c}, 0), last_{c} = excluded.last_{c}"
+                for c in METRIC_COLUMNS
+            )
+            count_updates = ", ".join(f"count_{c} = count_{c} + excluded.count_{c}" for c in AVERAGED_COLUMNS)
+            row_placeholders = ", ".join("?, ?" for _ in METRIC_COLUMNS)
+            count_placeholders = ", ".join("?" for _ in AVERAGED_COLUMNS)
+            row_values = [v for value in values for v in (value, value)]
+            count_values = [int(values[METRIC_COLUMNS.index(c)] is not None) for c in AVERAGED_COLUMNS]
+            for name, width in ROLLUPS.items():
+                conn.execute(
+                    f"INSERT INTO metrics_{name} (bucket, n, last_ts, {sum_cols}, {count_cols}) "
+                    f"VALUES (?, 1, ?, {row_placeholders}, {count_placeholders}) "
+                    f"ON CONFLICT(bucket) DO UPDATE SET n = n + 1, last_ts = excluded.last_ts, {updates}, {count_updates}",
+                    [ts - ts % width, ts] + row_values + count_values,
+                )
+
+            _prune(conn, ts)
+    finally:
+        conn.close()
+
+
+def _prune(conn, now):
+    for name, keep in RETENTION.items():
+        if keep is None:
+            continue
+        if name == "raw":
+            # Always keep the most recent snapshots so deltas survive long idle gaps
+            conn.execute(
+                "DELETE FROM metrics_raw WHERE ts < ? AND rowid NOT IN "
+                "(SELECT rowid FROM metrics_raw ORDER BY ts DESC LIMIT 10)",
+                (now - keep,),
+            )
+        else:
+            conn.execute(f"DELETE FROM metrics_{name} WHERE bucket < ?", (now - keep,))
+
+
+def pick_resolution(start, end):
+    """Choose the coarsest-enough rollup so a range returns a bounded number of points."""
+    span = end - start
+    if span <= RETENTION["raw"] / 2:
+        return "raw"
+    if span <= 7 * 24 * 60 * 60:
+        return "minute"
+    if span <= 90 * 24 * 60 * 60:
+        return "hour"
+    return "day"
+
+
+def query_metrics(start=None, end=None, resolution=None, db_path=None):
+    """
+    Return snapshots between `start` and `end` (epoch seconds), oldest first.
+    Each row has a `timestamp` (datetime) plus one value per metric: averages
+    for rates/means (over the snapshots that had a value) and the bucket's last
+    value for counts. Missing values are None.
+    """
+    end = int(end if end is not None else time.time())
+    start = int(start if start is not None else 0)
+    resolution = resolution or pick_resolution(start, end)
+
+    conn = _connect(db_path)
+    try:
+        if resolution == "raw":
+            rows = conn.execute(
+                f"SELECT ts, {', '.join(METRIC_COLUMNS)} FROM metrics_raw "
+                "WHERE ts >= ? AND ts <= ? ORDER BY ts",
+                (start, end),
+            ).fetchall()
+            return [
+                {"timestamp": datetime.fromtimestamp(r["ts"]), **{c: r[c] for c in METRIC_COLUMNS}}
+                for r in rows
+            ]
+
+        width = ROLLUPS[resolution]
+        rows = conn.execute(
+            f"SELECT * FROM metrics_{resolution} WHERE bucket >= ? AND bucket <= ? ORDER BY bucket",
+            (start - start % width, end),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    snapshots = []
+    for r in rows:
+        snapshot = {"timestamp": datetime.fromtimestamp(r["bucket"])}
+        for c in METRIC_COLUMNS:
+            if c in AVERAGED_COLUMNS:
+                snapshot[c] = r[f"sum_{c}"] / r[f"count_{c}"] if r[f"count_{c}"] else None
+            else:
+                snapshot[c] = r[f"last_{c}"]
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def latest_metrics(n=2, db_path=None):
+    """Return the `n` most recent raw snapshots, oldest first."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT ts, {', '.join(METRIC_COLUMNS)} FROM metrics_raw ORDER BY ts DESC, rowid DESC LIMIT ?",
+            (n,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {"timestamp": datetime.fromtimestamp(r["ts"]), **{c: r[c] for c in METRIC_COLUMNS}}
+        for r in reversed(rows)
+    ]
+
+
+def count_metrics(db_path=None):
+    """Total number of snapshots ever recorded (the day rollup is never pruned)."""
+    conn = _connect(db_path)
+    try:
+        return conn.execute("SELECT COALESCE(SUM(n), 0) FROM metrics_day").fetchone()[0]
+    finally:
+        conn.close()
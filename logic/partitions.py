@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from logic import fastjson
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .jsonl.zst parts
+    zstandard = None
+
+# ---- Partitioned turn logs ----
+# The production pipeline writes turns as hive-style partitions instead of one
+# dashboard_turns.jsonl:
+#
+#   data/turns/date=2024-05-01/part-0000.jsonl.gz
+#   data/turns/dataset=CCPE/date=2024-05-02/part-0001.jsonl.zst
+#
+# Every `key=value` directory on a part's path is a partition value. Parts are
+# discovered in path order, pruned by date range / dataset before anything is
+# read, and decoded in parallel (one part per task) across a process pool.
+# A partition value that is not a column of the part's turns (e.g. `date`) is
+# added as a column, so pruned loads stay filterable.
+
+PART_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+
+def _partition_values(relative_dir) -> dict:
+    values = {}
+    for segment in relative_dir.split(os.sep):
+        key, sep, value = segment.partition("=")
+        if sep and key:
+            values[key] = value
+    return values
+
+
+def discover_parts(root, start=None, end=None, datasets=None) -> list:
+    """
+    Turn parts under `root`, in path order, as [{"path", "partitions"}, ...].
+
+    Pruning uses partition values only (no file is opened):
+    - start / end: inclusive ISO dates ("2024-05-01" or date objects) on `date=`
+    - datasets: names kept on `dataset=`
+    Parts without the partition key cannot be pruned and are kept.
+    """
+    start = None if start is None else str(start)
+    end = None if end is None else str(end)
+    datasets = None if datasets is None else {str(d) for d in datasets}
+
+    parts = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        partitions = _partition_values(os.path.relpath(dirpath, root))
+        date = partitions.get("date")
+        if date is not None and ((start is not None and date < start) or (end is not None and date > end)):
+            dirnames.clear()
+            continue
+        dataset = partitions.get("dataset")
+        if dataset is not None and datasets is not None and dataset not in datasets:
+            dirnames.clear()
+            continue
+        for filename in sorted(filenames):
+            if filename.endswith(PART_SUFFIXES) and not filename.startswith("."):
+                parts.append({"path": os.path.join(dirpath, filename), "partitions": partitions})
+    parts.sort(key=lambda part: part["path"])
+    return parts
+
+
+def open_part(path):
+    """Binary file object over a part's decompressed JSONL."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"Reading {path} requires the 'zstandard' package (pip install zstandard).")
+        return zstandard.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_part(path, partitions=None) -> pd.DataFrame:
+    """One part decoded into a typed turn frame, with missing partition columns filled in."""
+    with open_part(path) as f:
+        turns_df = fastjson.turns_frame(f)
+    for key, value in (partitions or {}).items():
+        if key not in turns_df.columns:
+            turns_df[key] = pd.Series([value] * len(turns_df), dtype="str")
+    return turns_df
+
+
+def _read_part_task(part):
+    return read_part(part["path"], part["partitions"])
+
+
+def read_parts(parts, max_workers=None) -> pd.DataFrame:
+    """
+    Decode parts (across a process pool when there are several) and concatenate
+    them in part order.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(parts) > 1 and max_workers > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(parts))) as pool:
+            frames = list(pool.map(_read_part_task, parts))
+    else:
+        frames = [_read_part_task(part) for part in parts]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return fastjson.empty_turns_frame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def parts_data_version(parts, root, file_version) -> str:
+    """Content version of a set of parts: their relative paths and file hashes."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(f"{os.path.relpath(part['path'], root)}\0{file_version(part['path'])}\n".encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,115 @@
+import json
+import os
+
+import pandas as pd
+import streamlit as st
+
+from logic import aggregations, sharded
+from logic.data_loader import DATA_DIR, load_turns
+from logic.dedup import build_dedup_index, top_distinct_conversations
+
+# ---- Precomputed "What Works Well" artifacts ----
+# The dashboard_positive_*.json files hold exactly what render_positive_insights
+# computes from the turn log, stamped with the log's data version (content hash).
+# When the loaded turns still carry that version the page serves the artifacts;
+# any other version (edited log, uploads) falls back to live computation.
+#
+#   python -m logic.positives     # rebuild after the turn log changes
+
+POSITIVE_CONVERSATIONS = "dashboard_positive_conversations.json"
+POSITIVE_TOPICS = "dashboard_positive_topics.json"
+POSITIVE_INSIGHTS = "dashboard_positive_insights.json"
+TOP_N_CONVERSATIONS = 50
+TOP_N_TOPICS = 5
+
+
+def _json_default(value):
+    # numpy scalars from pandas aggregations
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def build_positive_artifacts(turns_df: pd.DataFrame, aggregate=None) -> dict:
+    """
+    The page's inputs, computed live with the pandas backend. With `aggregate` (a
+    sharded_aggregate result for turns_df) the conversation ranking and patterns
+    come from its per-shard summaries; the results are the same.
+
+    Returns dict with:
+    - top_conversations: ranked top conversations, near-duplicates collapsed
+    - top_topics: top performing topics table as records
+    - patterns: get_why_it_works_patterns result
+    """
+    conversation_summary = (
+        aggregations.summarize_conversations(turns_df) if aggregate is None else aggregate["conversations"]
+    )
+    top_conversations = top_distinct_conversations(
+        lambda n: aggregations.rank_conversations(conversation_summary, limit=n),
+        build_dedup_index(turns_df),
+        limit=TOP_N_CONVERSATIONS,
+    )
+    top_topics = aggregations.get_top_performing_topics_from_conversations(top_conversations, limit=TOP_N_TOPICS)
+    if aggregate is None:
+        patterns = aggregations.get_why_it_works_patterns(top_conversations, turns_df)
+    else:
+        patterns = sharded.get_why_it_works_patterns(top_conversations, aggregate)
+    return {
+        "top_conversations": top_conversations,
+        "top_topics": top_topics.to_dict("records"),
+        "patterns": patterns,
+    }
+
+
+def write_positive_artifacts(turns_df: pd.DataFrame, data_dir=DATA_DIR):
+    artifacts = build_positive_artifacts(turns_df)
+    payloads = {
+        POSITIVE_CONVERSATIONS: artifacts["top_conversations"],
+        POSITIVE_TOPICS: artifacts["top_topics"],
+        POSITIVE_INSIGHTS: {
+            "data_version": turns_df.attrs.get("data_version"),
+            "top_n_conversations": TOP_N_CONVERSATIONS,
+            "patterns": artifacts["patterns"],
+        },
+    }
+    for name, payload in payloads.items():
+        tmp = f"{data_dir}/{name}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False, default=_json_default)
+        os.replace(tmp, f"{data_dir}/{name}")
+
+
+@st.cache_data
+def load_positive_artifacts(data_dir=DATA_DIR):
+    """Artifacts plus their data_version, or None when missing or not stamped with a version."""
+    try:
+        with open(f"{data_dir}/{POSITIVE_INSIGHTS}", "r", encoding="utf-8") as f:
+            insights = json.load(f)
+        if not insights.get("data_version") or "patterns" not in insights:
+            return None
+        with open(f"{data_dir}/{POSITIVE_CONVERSATIONS}", "r", encoding="utf-8") as f:
+            top_conversations = json.load(f)
+        with open(f"{data_dir}/{POSITIVE_TOPICS}", "r", encoding="utf-8") as f:
+            top_topics = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return {
+        "data_version": insights["data_version"],
+        "top_conversations": top_conversations,
+        "top_topics": top_topics,
+        "patterns": insights["patterns"],
+    }
+
+
+def fresh_positive_artifacts(turns_df: pd.DataFrame):
+    """Artifacts if they were built from exactly this turn log, else None."""
+    artifacts = load_positive_artifacts()
+    if artifacts is None or artifacts["data_version"] != turns_df.attrs.get("data_version"):
+        return None
+    return artifacts
+
+
+if __name__ == "__main__":
+    turns_df = load_turns()
+    write_positive_artifacts(turns_df)
+    print(f"wrote positive artifacts for data version {turns_df.attrs.get('data_version')}")
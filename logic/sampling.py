@@ -0,0 +1,293 @@
+import math
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from logic.aggregations import (
+    build_issue_index,
+    build_severity_index,
+    build_topic_label_index,
+    severity_stats_from_counts,
+)
+from logic.artifacts import live_tables, register_live_tables
+from logic.data_loader import appended_rows
+from logic.issues import has_issue, issue_masks, issue_vocab
+from logic.streaming import build_kpi_cube
+
+# ---- Approximate KPIs ----
+# For very large turn stores the Overview first shows KPIs estimated from a
+# stratified reservoir sample (one reservoir of SAMPLE_PER_STRATUM row positions
+# per dataset, Algorithm R), with 95% confidence intervals, while the exact tables
+# it reads (KPI cube, issue index, topic labels, severity index) are computed in
+# a background thread; nothing scans the full store before the page renders.
+# Once they are registered for the store's data_version the page switches to
+# exact numbers.
+#
+# One sample is kept per process, stamped with the data_version it describes.
+# It is append-only like the store: when the store is appended to (uploads,
+# hot reload; see logic.data_loader.appended_rows) the new rows are fed through
+# the reservoirs instead of resampling, and anything else rebuilds it.
+
+APPROX_MIN_TURNS = 1_000_000
+SAMPLE_PER_STRATUM = 2_000
+Z_95 = 1.96
+
+
+def empty_sample(capacity=SAMPLE_PER_STRATUM, seed=0) -> dict:
+    return {
+        "capacity": capacity,
+        "rng": np.random.default_rng(seed),
+        # dataset -> {"seen": rows ingested, "positions": reservoir of row positions}
+        "strata": {},
+        "conv_ids": set(),
+        "n_rows": 0,
+        "data_version": None,
+    }
+
+
+def _reservoir_add(stratum, rows: np.ndarray, capacity, rng):
+    positions = stratum["positions"]
+    seen = stratum["seen"]
+    fill = min(max(capacity - len(positions), 0), len(rows))
+    if fill:
+        positions = np.concatenate([positions, rows[:fill]])
+    rest = rows[fill:]
+    if len(rest):
+        # Row i of the stream (1-based t) replaces a random slot with probability capacity / t;
+        # later replacements of the same slot win, as in the sequential algorithm
+        t = np.arange(seen + fill + 1, seen + len(rows) + 1)
+        slots = (rng.random(len(rest)) * t).astype(np.int64)
+        keep = slots < capacity
+        positions[slots[keep]] = rest[keep]
+    stratum["positions"] = positions
+    stratum["seen"] = seen + len(rows)
+
+
+def ingest(sample: dict, turns_df: pd.DataFrame, offset: int) -> dict:
+    """Feed turns_df.iloc[offset:] (rows appended since the last ingest) through the reservoirs."""
+    new_turns = turns_df.iloc[offset:]
+    for dataset, rows in new_turns.groupby("dataset", sort=True, observed=True).indices.items():
+        stratum = sample["strata"].setdefault(dataset, {"seen": 0, "positions": np.array([], dtype=np.int64)})
+        _reservoir_add(stratum, np.asarray(rows, dtype=np.int64) + offset, sample["capacity"], sample["rng"])
+    sample["conv_ids"].update(new_turns["conv_id"].unique().tolist())
+    sample["n_rows"] = len(turns_df)
+    return sample
+
+
+_sample = None
+_sample_lock = threading.Lock()
+
+
+def kpi_sample(turns_df: pd.DataFrame) -> dict:
+    """
+    The process-wide sample, brought up to this store version: extended with the
+    appended rows when the store descends from the sampled version, rebuilt otherwise.
+    """
+    global _sample
+    version = turns_df.attrs.get("data_version")
+    with _sample_lock:
+        sample = _sample
+        if sample is None or sample["data_version"] != version:
+            rows = None if sample is None else appended_rows(turns_df, sample["data_version"])
+            if rows is None or rows != sample["n_rows"]:
+                sample = empty_sample()
+            else:
+                # Copy on write: other sessions may still estimate from the previous version
+                sample = {
+                    **sample,
+                    "strata": {
+                        dataset: {"seen": stratum["seen"], "positions": stratum["positions"].copy()}
+                        for dataset, stratum in sample["strata"].items()
+                    },
+                    "conv_ids": set(sample["conv_ids"]),
+                }
+            ingest(sample, turns_df, sample["n_rows"])
+            sample["data_version"] = version
+            _sample = sample
+        return sample
+
+
+def extend_kpi_sample(turns_df: pd.DataFrame):
+    """Feed rows appended to a sampled store through the reservoirs (no-op when nothing is sampled)."""
+    if _sample is not None and appended_rows(turns_df, _sample["data_version"]) is not None:
+        kpi_sample(turns_df)
+
+
+def _stratified_total(strata):
+    """Estimated population total of y and its variance, from [(N_h, y sample array)]."""
+    total = 0.0
+    variance = 0.0
+    for n_pop, y in strata:
+        n = len(y)
+        if n == 0:
+            continue
+        total += n_pop * y.mean()
+        if n > 1:
+            variance += n_pop ** 2 * (1 - n / n_pop) * y.var(ddof=1) / n
+    return total, variance
+
+
+def _ratio(strata):
+    """Estimated ratio sum(y) / sum(x) and its CI half-width, from [(N_h, y, x)]."""
+    y_total, _ = _stratified_total([(n_pop, y) for n_pop, y, _ in strata])
+    x_total, _ = _stratified_total([(n_pop, x) for n_pop, _, x in strata])
+    if x_total == 0:
+        return float("nan"), float("nan")
+    ratio = y_total / x_total
+    _, variance = _stratified_total([(n_pop, y - ratio * x) for n_pop, y, x in strata])
+    return ratio, Z_95 * math.sqrt(variance) / x_total
+
+
+def _estimate_severity_index(arrays) -> dict:
+    """
+    build_severity_index-shaped failure stats of the sample, each sampled failure
+    turn counting for N_h / n_h turns of its stratum.
+    """
+    failures = pd.concat([
+        pd.DataFrame({
+            "topic_id": a["rows"]["topic_id"].to_numpy()[a["low"] > 0],
+            "severity": a["rows"]["severity"].astype(object).to_numpy()[a["low"] > 0],
+            "pos": a["positions"][a["low"] > 0],
+            "weight": a["n_pop"] / len(a["rows"]),
+        })
+        for a in arrays
+    ], ignore_index=True) if arrays else pd.DataFrame(columns=["topic_id", "severity", "pos", "weight"])
+    histogram = (
+        failures.dropna(subset=["severity"])
+        .groupby(["topic_id", "severity"])
+        .agg(count=("weight", "sum"), first_pos=("pos", "min"))
+        .reset_index()
+        .sort_values(["count", "first_pos"], ascending=[False, True])
+    )
+    counts = {}
+    for topic_id, label, n in zip(histogram["topic_id"].tolist(), histogram["severity"].tolist(), histogram["count"].tolist()):
+        counts.setdefault(topic_id, []).append((label, int(round(n))))
+    turn_counts = failures.groupby("topic_id", sort=False)["weight"].sum()
+    return {
+        "topics": {},
+        "failure_topics": {topic_id: severity_stats_from_counts(counts.get(topic_id, [])) for topic_id in turn_counts.index},
+        "failure_turn_counts": Counter({topic_id: int(round(n)) for topic_id, n in turn_counts.items()}),
+    }
+
+
+def estimate_overview_kpis(sample: dict, turns_df: pd.DataFrame, topics_df: pd.DataFrame) -> dict:
+    """
+    Overview KPIs estimated from the sample, named as in finalize_overview_kpis,
+    plus the sample's issue index, topic labels and failure severity.
+
+    Returns dict with:
+    - mean_sat, low_sat_rate, low_sat_turns, avg_severity: estimates
+    - total_turns, total_convs: exact
+    - issue_index: build_issue_index-shaped, counts and topic occurrences estimated
+    - topic_label_index: build_topic_label_index over the sampled turns
+    - severity_index: build_severity_index-shaped, failure_topics and failure_turn_counts estimated
+    - ci: 95% half-widths of mean_sat, low_sat_rate, low_sat_turns, avg_severity
+      and issue_counts (issue -> half-width)
+    - sample_size: sampled turns
+    """
+    total = sample["n_rows"]
+    arrays = []
+    for stratum in sample["strata"].values():
+        n_pop = stratum["seen"]
+        rows = turns_df.iloc[stratum["positions"]]
+        scores = rows["satisfaction_score"].to_numpy(dtype="float64")
+        scored = ~np.isnan(scores)
+        low = (rows["low_satisfaction"] == True).to_numpy()
+        arrays.append({
+            "n_pop": n_pop,
+            "scores": np.where(scored, scores, 0.0),
+            "scored": scored.astype("float64"),
+            "low": low.astype("float64"),
+            "low_scored": (low & scored).astype("float64"),
+            "masks": issue_masks(rows)[0],
+            "rows": rows,
+            "positions": stratum["positions"],
+        })
+
+    low_total, low_var = _stratified_total([(a["n_pop"], a["low"]) for a in arrays])
+    mean_sat, mean_sat_ci = _ratio([(a["n_pop"], a["scores"], a["scored"]) for a in arrays])
+    avg_severity, avg_severity_ci = _ratio([
+        (a["n_pop"], a["scores"] * a["low_scored"], a["low_scored"]) for a in arrays
+    ])
+
+    issue_counts = {}
+    issue_ci = {}
+    topics = {}
+    vocab = issue_vocab(turns_df)
+    for issue in vocab:
+        estimate, variance = _stratified_total([
+            (a["n_pop"], (has_issue(a["masks"], issue, vocab) & (a["low"] > 0)).astype("float64")) for a in arrays
+        ])
+        if estimate <= 0:
+            continue
+        issue_counts[issue] = int(round(estimate))
+        issue_ci[issue] = Z_95 * math.sqrt(variance)
+        occurrences = Counter()
+        for a in arrays:
+            hits = has_issue(a["masks"], issue, vocab) & (a["low"] > 0)
+            weight = a["n_pop"] / len(a["rows"])
+            for topic_id in a["rows"]["topic_id"].to_numpy()[hits].tolist():
+                if topic_id != -1:
+                    occurrences[topic_id] += weight
+        topics[issue] = [(topic_id, int(round(n))) for topic_id, n in occurrences.most_common(5)]
+    issue_counts = dict(sorted(issue_counts.items(), key=lambda item: -item[1]))
+
+    low_sat_ci = Z_95 * math.sqrt(low_var)
+    return {
+        "mean_sat": mean_sat,
+        "low_sat_rate": low_total / total if total else float("nan"),
+        "low_sat_turns": int(round(low_total)),
+        "avg_severity": avg_severity,
+        "total_turns": total,
+        "total_convs": len(sample["conv_ids"]),
+        "issue_index": {"counts": issue_counts, "topics": topics},
+        "topic_label_index": build_topic_label_index(
+            turns_df.iloc[np.sort(np.concatenate([a["positions"] for a in arrays]))] if arrays else turns_df.iloc[:0],
+            topics_df,
+        ),
+        "severity_index": _estimate_severity_index(arrays),
+        "ci": {
+            "mean_sat": mean_sat_ci,
+            "low_sat_rate": low_sat_ci / total if total else float("nan"),
+            "low_sat_turns": low_sat_ci,
+            "avg_severity": avg_severity_ci,
+            "issue_counts": issue_ci,
+        },
+        "sample_size": sum(len(a["rows"]) for a in arrays),
+    }
+
+
+# ---- Background refinement ----
+
+MAX_JOBS = 8
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exact-kpis")
+_exact_jobs = {}
+
+
+def _compute_exact(turns_df: pd.DataFrame, topics_df: pd.DataFrame):
+    exact = {
+        "kpi_cube": build_kpi_cube(turns_df),
+        "issue_index": build_issue_index(turns_df),
+        "topic_label_index": build_topic_label_index(turns_df, topics_df),
+        "severity_index": build_severity_index(turns_df),
+    }
+    version = turns_df.attrs.get("data_version")
+    tables = dict(live_tables(version) or {})
+    tables.update(exact)
+    register_live_tables(version, tables)
+
+
+def refine_exact_kpis(turns_df: pd.DataFrame, topics_df: pd.DataFrame):
+    """
+    Start computing the exact tables the Overview reads (KPI cube, issue index,
+    topic labels, severity index) for this store version, once.
+    """
+    version = turns_df.attrs.get("data_version")
+    if version not in _exact_jobs:
+        _exact_jobs[version] = _executor.submit(_compute_exact, turns_df, topics_df)
+        while len(_exact_jobs) > MAX_JOBS:
+            del _exact_jobs[next(iter(_exact_jobs))]
+    return _exact_jobs[version]
@@ -0,0 +1,154 @@
+import html
+import re
+
+import pandas as pd
+
+from logic.data_loader import appended_rows
+
+# ---- Full-text search ----
+# Inverted index over turn text: token -> {row: [token positions]}, where `row`
+# is the turn's position in turns_df. Positions make quoted phrase queries exact.
+# Turns are append-only, so the index is extended with new rows rather than rebuilt.
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+
+def tokenize(text) -> list:
+    """Lowercased word tokens of one turn."""
+    if not isinstance(text, str):
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def empty_search_index():
+    return {
+        "postings": {},
+        "n_rows": 0,
+        # data_version of the store the rows were indexed from
+        "data_version": None,
+    }
+
+
+def extend_search_index(index: dict, new_turns: pd.DataFrame) -> dict:
+    """Add turns appended after the rows already indexed (row numbers continue from `n_rows`)."""
+    postings = index["postings"]
+    offset = index["n_rows"]
+    # Repeated texts ("Okay.", bot templates) are tokenized once
+    token_cache = {}
+    for i, text in enumerate(new_turns["text"]):
+        tokens = token_cache.get(text)
+        if tokens is None:
+            tokens = token_cache[text] = tokenize(text)
+        row = offset + i
+        for pos, token in enumerate(tokens):
+            postings.setdefault(token, {}).setdefault(row, []).append(pos)
+    index["n_rows"] = offset + len(new_turns)
+    return index
+
+
+def build_search_index(turns_df: pd.DataFrame) -> dict:
+    index = extend_search_index(empty_search_index(), turns_df)
+    index["data_version"] = turns_df.attrs.get("data_version")
+    return index
+
+
+def sync_search_index(index, turns_df: pd.DataFrame) -> dict:
+    """
+    Bring an index up to date with the turn store: only new turns are indexed when
+    the store was appended to since, anything else (e.g. a full reload) rebuilds it.
+    """
+    rows = None if index is None else appended_rows(turns_df, index.get("data_version"))
+    if rows is None or rows != index["n_rows"]:
+        return build_search_index(turns_df)
+    if rows < len(turns_df):
+        extend_search_index(index, turns_df.iloc[rows:])
+    index["data_version"] = turns_df.attrs.get("data_version")
+    return index
+
+
+def parse_query(query: str):
+    """Split a query into quoted phrases (token lists) and bare terms."""
+    phrases = [tokenize(p) for p in PHRASE_PATTERN.findall(query)]
+    terms = tokenize(PHRASE_PATTERN.sub(" ", query))
+    return [p for p in phrases if p], terms
+
+
+def _phrase_rows(postings: dict, phrase: list) -> set:
+    """Rows where the phrase tokens appear at consecutive positions."""
+    first = postings.get(phrase[0], {})
+    rows = set(first)
+    for token in phrase[1:]:
+        rows &= set(postings.get(token, {}))
+    matches = set()
+    for row in rows:
+        positions = [set(postings[token][row]) for token in phrase]
+        if any(all(start + k in positions[k] for k in range(1, len(phrase))) for start in positions[0]):
+            matches.add(row)
+    return matches
+
+
+def search(index: dict, turns_df: pd.DataFrame, query: str, limit: int = 20) -> dict:
+    """
+    Find turns containing every term and phrase in `query`, grouped by conversation.
+
+    Returns dict with:
+    - total_conversations: number of matching conversations
+    - total_turns: number of matching turns
+    - terms: all query tokens (for highlighting)
+    - results: up to `limit` dicts (conv_id, dataset, n_hits, hits), most hits first
+    """
+    phrases, terms = parse_query(query)
+    all_terms = sorted({t for p in phrases for t in p} | set(terms))
+    empty = {"total_conversations": 0, "total_turns": 0, "terms": all_terms, "results": []}
+    if not phrases and not terms:
+        return empty
+
+    postings = index["postings"]
+    rows = None
+    # Rarest clause first keeps the intersections small
+    for term in sorted(terms, key=lambda t: len(postings.get(t, {}))):
+        term_rows = set(postings.get(term, {}))
+        rows = term_rows if rows is None else rows & term_rows
+        if not rows:
+            return empty
+    for phrase in phrases:
+        phrase_rows = _phrase_rows(postings, phrase)
+        rows = phrase_rows if rows is None else rows & phrase_rows
+        if not rows:
+            return empty
+
+    hits = turns_df.iloc[sorted(rows)][["conv_id", "dataset", "turn_id", "speaker", "text"]]
+    results = []
+    for conv_id, conv_hits in hits.groupby("conv_id", sort=True):
+        conv_hits = conv_hits.sort_values("turn_id")
+        results.append({
+            "conv_id": conv_id,
+            "dataset": conv_hits["dataset"].iloc[0],
+            "n_hits": len(conv_hits),
+            "hits": conv_hits[["turn_id", "speaker", "text"]].to_dict("records"),
+        })
+    results.sort(key=lambda r: -r["n_hits"])
+
+    return {
+        "total_conversations": len(results),
+        "total_turns": len(hits),
+        "terms": all_terms,
+        "results": results[:limit],
+    }
+
+
+def highlight(text, terms: list) -> str:
+    """HTML-escaped text with query tokens wrapped in <mark>."""
+    if not isinstance(text, str):
+        return ""
+    terms = set(terms)
+    parts = []
+    last = 0
+    for match in re.finditer(TOKEN_PATTERN.pattern, text, re.IGNORECASE):
+        if match.group().lower() in terms:
+            parts.append(html.escape(text[last:match.start()]))
+            parts.append(f"<mark>{html.escape(text[match.start():match.end()])}</mark>")
+            last = match.end()
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
@@ -0,0 +1,96 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from logic.datasets import slice_datasets
+
+# ---- Turn selections ----
+# The global filter bar (app.py) compiles to a boolean row mask over the turn
+# store. Masks are cached per (data_version, filter signature), one per column
+# predicate and one for their conjunction, so changing one filter reuses the
+# other predicates and switching pages under the same filters reuses the
+# selected frame itself.
+#
+# The dataset filter is applied first through logic.datasets, which keeps the
+# per-dataset summaries; the remaining filters select rows of that slice.
+
+# Multi-value filters: filter key -> turn column
+VALUE_FILTERS = {
+    "severity": "severity",
+    "speaker": "speaker",
+    "satisfaction_source": "satisfaction_source",
+    "topics": "topic_id",
+}
+MAX_CACHED = 32
+_masks = {}
+_selections = {}
+
+
+def _remember(cache: dict, key, value):
+    cache[key] = value
+    while len(cache) > MAX_CACHED:
+        del cache[next(iter(cache))]
+    return value
+
+
+def filter_signature(filters: dict) -> tuple:
+    """
+    Canonical, hashable form of the active row filters (datasets excluded).
+    Empty selections and a missing satisfaction range are inactive.
+    """
+    signature = []
+    for key in VALUE_FILTERS:
+        values = filters.get(key)
+        if values:
+            signature.append((key, tuple(sorted(values, key=str))))
+    score_range = filters.get("satisfaction_range")
+    if score_range is not None:
+        signature.append(("satisfaction_range", (float(score_range[0]), float(score_range[1]))))
+    return tuple(signature)
+
+
+def _predicate_mask(turns_df: pd.DataFrame, key, arg) -> np.ndarray:
+    if key == "satisfaction_range":
+        scores = turns_df["satisfaction_score"].to_numpy(dtype="float64")
+        # Unscored turns (NaN) fall outside every range
+        return (scores >= arg[0]) & (scores <= arg[1])
+    return turns_df[VALUE_FILTERS[key]].isin(arg).to_numpy()
+
+
+def selection_mask(turns_df: pd.DataFrame, signature: tuple) -> np.ndarray:
+    """Rows of turns_df matching every predicate in `signature` (cached)."""
+    version = turns_df.attrs.get("data_version")
+    cached = _masks.get((version, signature))
+    if cached is not None:
+        return cached
+
+    mask = np.ones(len(turns_df), dtype=bool)
+    for key, arg in signature:
+        predicate = _masks.get((version, ((key, arg),)))
+        if predicate is None:
+            predicate = _remember(_masks, (version, ((key, arg),)), _predicate_mask(turns_df, key, arg))
+        mask &= predicate
+    return _remember(_masks, (version, signature), mask)
+
+
+def select_turns(turns_df: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """
+    Turns matching the filter bar, in store order. Without active filters the
+    store (or dataset slice) itself is returned; a filtered frame carries its own
+    data_version and attrs["filters"].
+    """
+    base = slice_datasets(turns_df, filters.get("datasets") or None)
+    signature = filter_signature(filters)
+    if not signature:
+        return base
+
+    base_version = base.attrs.get("data_version")
+    selected = _selections.get((base_version, signature))
+    if selected is not None:
+        return selected
+
+    selected = base[selection_mask(base, signature)].reset_index(drop=True)
+    selected.attrs["data_version"] = hashlib.sha256(f"{base_version}|{signature!r}".encode("utf-8")).hexdigest()
+    selected.attrs["filters"] = signature
+    return _remember(_selections, (base_version, signature), selected)
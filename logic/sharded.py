@@ -0,0 +1,141 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from logic.aggregations import (
+    build_why_it_works_patterns,
+    rank_conversations,
+    summarize_conversations,
+)
+from logic.issues import count_issues, has_any_issue, has_issue, issue_masks
+from logic.streaming import (
+    empty_partial,
+    finalize_severity_stats,
+    finalize_top_success_topics,
+    merge_partials,
+    partial_from_chunk,
+)
+
+# ---- Sharded aggregation ----
+# Turns are partitioned by a hash of conv_id, so every conversation lives in
+# exactly one shard. Each worker computes per-conversation summaries and a
+# per-topic partial for its shard; the parent only concatenates and merges.
+# Shards are shipped to the workers once; no per-task re-serialization of the
+# full turn log.
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+def shard_turns(turns_df: pd.DataFrame, n_shards: int) -> list:
+    """Split turns into `n_shards` frames by conv_id hash, preserving row order inside each."""
+    shard_ids = pd.util.hash_pandas_object(turns_df["conv_id"], index=False) % n_shards
+    return [turns_df[(shard_ids == i).to_numpy()] for i in range(n_shards)]
+
+
+def _conversation_issue_stats(turns_df: pd.DataFrame) -> pd.DataFrame:
+    """Per-conversation turn and issue counts consumed by get_why_it_works_patterns."""
+    masks, vocab = issue_masks(turns_df)
+    stats = pd.DataFrame({
+        "conv_id": turns_df["conv_id"].to_numpy(),
+        "n_turns": 1,
+        "has_issues": has_any_issue(masks),
+        "has_unsupported": has_issue(masks, "UNSUPPORTED_INTENT", vocab),
+        "issue_mask": masks,
+    })
+    grouped = stats.groupby("conv_id")
+    counts = grouped.agg(
+        n_turns=("n_turns", "sum"),
+        n_with_issues=("has_issues", "sum"),
+        n_unsupported=("has_unsupported", "sum"),
+    )
+    counts["issue_counts"] = pd.Series({
+        conv_id: Counter(count_issues(group.to_numpy(), vocab))
+        for conv_id, group in grouped["issue_mask"]
+    })
+    return counts
+
+
+def _aggregate_shard(shard: pd.DataFrame) -> dict:
+    """Worker task: everything the refresh needs from one shard."""
+    return {
+        "conversations": summarize_conversations(shard),
+        "issue_stats": _conversation_issue_stats(shard),
+        # Index is the row position in the full log, keeping severity ties in first-seen order
+        "topic_partial": partial_from_chunk(shard, offset=shard.index[0]),
+    }
+
+
+def sharded_aggregate(turns_df: pd.DataFrame, n_workers=None) -> dict:
+    """
+    Run the per-shard aggregates in a process pool and merge them.
+
+    Returns dict with:
+    - conversations: summarize_conversations table for the whole log (conv_id order)
+    - issue_stats: per-conversation issue counts
+    - topic_partial: merged streaming partial (per-topic satisfaction and severity)
+    """
+    n_workers = n_workers or DEFAULT_WORKERS
+    turns_df = turns_df.reset_index(drop=True)
+    shards = [s for s in shard_turns(turns_df, n_workers) if not s.empty]
+
+    if n_workers == 1 or len(shards) <= 1:
+        results = [_aggregate_shard(s) for s in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_aggregate_shard, shards))
+
+    conversations = [r["conversations"] for r in results if not r["conversations"].empty]
+    conv_df = pd.concat(conversations, ignore_index=True) if conversations else pd.DataFrame()
+    if not conv_df.empty:
+        # Same row order as the serial groupby so ranking ties break identically
+        conv_df = conv_df.sort_values("conv_id", kind="stable").reset_index(drop=True)
+
+    issue_frames = [r["issue_stats"] for r in results]
+    issue_stats = pd.concat(issue_frames) if issue_frames else pd.DataFrame()
+
+    topic_partial = empty_partial()
+    for r in results:
+        topic_partial = merge_partials(topic_partial, r["topic_partial"])
+
+    return {
+        "conversations": conv_df,
+        "issue_stats": issue_stats,
+        "topic_partial": topic_partial,
+    }
+
+
+def get_top_conversations(aggregate: dict, limit: int = 50):
+    """Sharded equivalent of aggregations.get_top_conversations."""
+    return rank_conversations(aggregate["conversations"], limit=limit)
+
+
+def get_why_it_works_patterns(conv_list: list, aggregate: dict) -> dict:
+    """Sharded equivalent of aggregations.get_why_it_works_patterns."""
+    if not conv_list:
+        return {
+            "patterns": [],
+            "metrics": {}
+        }
+
+    conv_ids = [c["conv_id"] for c in conv_list]
+    stats = aggregate["issue_stats"]
+    stats = stats[stats.index.isin(conv_ids)]
+    n_turns = stats["n_turns"].sum()
+
+    clear_intent_pct = (1 - stats["n_with_issues"].sum() / n_turns) * 100 if n_turns > 0 else 0
+    kb_alignment = (1 - stats["n_unsupported"].sum() / n_turns) * 100 if n_turns > 0 else 0
+    issue_counts = dict(sum(stats["issue_counts"], Counter()).most_common(5))
+
+    return build_why_it_works_patterns(conv_list, clear_intent_pct, kb_alignment, issue_counts)
+
+
+def get_top_success_topics_detailed(aggregate: dict, topics_df: pd.DataFrame, top_n=5):
+    """Sharded equivalent of aggregations.get_top_success_topics_detailed."""
+    return finalize_top_success_topics(aggregate["topic_partial"], topics_df, top_n=top_n)
+
+
+def compute_severity_stats(aggregate: dict, topic_id=None):
+    """Sharded equivalent of aggregations.compute_severity_stats for one topic."""
+    return finalize_severity_stats(aggregate["topic_partial"], topic_id)
@@ -0,0 +1,266 @@
+import argparse
+import json
+from collections import Counter
+
+import pandas as pd
+
+from logic.aggregations import severity_stats_from_histogram
+from logic.data_loader import DATA_DIR, load_topics
+from logic.fastjson import turns_frame
+from logic.issues import count_issues, issue_masks
+
+# ---- Out-of-core aggregation ----
+# The turn log is read in fixed-size chunks. Each chunk is reduced to a small
+# "partial" (sums and counts, never rows), partials merge associatively, and the
+# final numbers are derived from the merged partial. Memory is bounded by the
+# chunk size plus the number of topics/conversations, not by the log size.
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def iter_turn_chunks(path=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield the turn log as DataFrames of at most `chunksize` rows."""
+    path = path or f"{DATA_DIR}/dashboard_turns.jsonl"
+    lines = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            lines.append(line)
+            if len(lines) >= chunksize:
+                yield turns_frame(lines)
+                lines = []
+    if lines:
+        yield turns_frame(lines)
+
+
+def empty_partial():
+    return {
+        "rows_seen": 0,
+        "kpis": {
+            "total_turns": 0,
+            "sat_sum": 0.0,
+            "sat_count": 0,
+            "low_sat_turns": 0,
+            "low_sat_sat_sum": 0.0,
+            "low_sat_sat_count": 0,
+            "conv_ids": set(),
+            "issue_counts": Counter(),
+        },
+        "topics": pd.DataFrame(columns=["sat_sum", "sat_count", "low_sat_count"], dtype="float64"),
+        "severity": pd.DataFrame(columns=["count", "first_pos"], dtype="float64"),
+    }
+
+
+def partial_from_chunk(chunk: pd.DataFrame, offset=0):
+    """
+    Reduce one chunk of turns to a mergeable partial.
+    `offset` is the chunk's starting row in the full log, used to keep
+    first-seen order for severity ties (matching pandas value_counts).
+    """
+    partial = empty_partial()
+    partial["rows_seen"] = len(chunk)
+    if chunk.empty:
+        return partial
+
+    low_sat = chunk["low_satisfaction"] == True
+    scores = chunk["satisfaction_score"]
+    kpis = partial["kpis"]
+    kpis["total_turns"] = len(chunk)
+    kpis["sat_sum"] = float(scores.sum())
+    kpis["sat_count"] = int(scores.notna().sum())
+    kpis["low_sat_turns"] = int(low_sat.sum())
+    kpis["low_sat_sat_sum"] = float(scores[low_sat].sum())
+    kpis["low_sat_sat_count"] = int(scores[low_sat].notna().sum())
+    kpis["conv_ids"] = set(chunk["conv_id"].unique().tolist())
+    masks, vocab = issue_masks(chunk)
+    kpis["issue_counts"] = Counter(count_issues(masks[low_sat.to_numpy()], vocab))
+
+    # Per-topic satisfaction rollup over scored USER turns (get_top_success_topics_detailed)
+    user_turns = chunk[(chunk["speaker"] == "USER") & scores.notna()]
+    if not user_turns.empty:
+        partial["topics"] = (
+            user_turns
+            .groupby("topic_id")
+            .agg(
+                sat_sum=("satisfaction_score", "sum"),
+                sat_count=("satisfaction_score", "count"),
+                low_sat_count=("low_satisfaction", "sum"),
+            )
+            .astype("float64")
+        )
+
+    # Per-topic severity histogram with first-seen position (compute_severity_stats)
+    severities = chunk[["topic_id", "severity"]].dropna(subset=["severity"]).astype({"severity": object})
+    if not severities.empty:
+        severities["pos"] = severities.index.to_numpy() - chunk.index[0] + offset
+        partial["severity"] = (
+            severities
+            .groupby(["topic_id", "severity"])
+            .agg(count=("pos", "size"), first_pos=("pos", "min"))
+            .astype("float64")
+        )
+
+    return partial
+
+
+def merge_partials(a, b):
+    """Combine two partials; the operation is associative and commutative."""
+    kpis = {
+        key: a["kpis"][key] + b["kpis"][key]
+        for key in ("total_turns", "sat_sum", "sat_count", "low_sat_turns", "low_sat_sat_sum", "low_sat_sat_count")
+    }
+    kpis["conv_ids"] = a["kpis"]["conv_ids"] | b["kpis"]["conv_ids"]
+    kpis["issue_counts"] = a["kpis"]["issue_counts"] + b["kpis"]["issue_counts"]
+
+    topics = a["topics"].add(b["topics"], fill_value=0)
+
+    if a["severity"].empty or b["severity"].empty:
+        severity = b["severity"] if a["severity"].empty else a["severity"]
+    else:
+        joined = a["severity"].join(b["severity"], how="outer", lsuffix="_a", rsuffix="_b")
+        severity = pd.DataFrame({
+            "count": joined["count_a"].fillna(0) + joined["count_b"].fillna(0),
+            "first_pos": joined[["first_pos_a", "first_pos_b"]].min(axis=1),
+        })
+
+    return {
+        "rows_seen": a["rows_seen"] + b["rows_seen"],
+        "kpis": kpis,
+        "topics": topics,
+        "severity": severity,
+    }
+
+
+def stream_partial(path=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Single bounded-memory pass over the turn log, returning the merged partial."""
+    partial = empty_partial()
+    for chunk in iter_turn_chunks(path, chunksize):
+        partial = merge_partials(partial, partial_from_chunk(chunk, offset=partial["rows_seen"]))
+    return partial
+
+
+def finalize_overview_kpis(partial, n_topics=None):
+    """Overview KPIs, named as in render_overview's current_metrics."""
+    kpis = partial["kpis"]
+    total = kpis["total_turns"]
+    return {
+        "mean_sat": kpis["sat_sum"] / kpis["sat_count"] if kpis["sat_count"] else float("nan"),
+        "low_sat_rate": kpis["low_sat_turns"] / total if total else float("nan"),
+        "n_topics": n_topics,
+        "low_sat_turns": kpis["low_sat_turns"],
+        "avg_severity": (
+            kpis["low_sat_sat_sum"] / kpis["low_sat_sat_count"] if kpis["low_sat_sat_count"] else float("nan")
+        ),
+        "total_turns": total,
+        "total_convs": len(kpis["conv_ids"]),
+        "issue_counts": dict(kpis["issue_counts"].most_common()),
+    }
+
+
+def finalize_top_success_topics(partial, topics_df: pd.DataFrame, top_n=5):
+    """Same table as get_top_success_topics_detailed, built from the merged partial."""
+    topics = partial["topics"]
+    if topics.empty:
+        return pd.DataFrame()
+
+    by_topic = pd.DataFrame({
+        "topic_id": topics.index.astype("int64"),
+        "mean_satisfaction": (topics["sat_sum"] / topics["sat_count"]).to_numpy(),
+        "successful_turns": topics["sat_count"].astype("int64").to_numpy(),
+        "low_sat_count": topics["low_sat_count"].astype("int64").to_numpy(),
+    })
+    by_topic["low_satisfaction_rate"] = by_topic["low_sat_count"] / by_topic["successful_turns"]
+
+    result = by_topic.merge(
+        topics_df[["topic_id", "topic_label", "n_examples"]],
+        on="topic_id",
+        how="left"
+    )
+    return result.sort_values(
+        by=["low_satisfaction_rate", "mean_satisfaction"],
+        ascending=[True, False]
+    ).head(top_n)
+
+
+def finalize_severity_stats(partial, topic_id=None):
+    """Same dict as compute_severity_stats, for one topic or (topic_id=None) the whole log."""
+    severity = partial["severity"]
+    if severity.empty:
+        counts = pd.DataFrame(columns=["count", "first_pos"])
+    elif topic_id is None:
+        counts = severity.groupby(level="severity").agg(count=("count", "sum"), first_pos=("first_pos", "min"))
+    elif topic_id in severity.index.get_level_values("topic_id"):
+        counts = severity.xs(topic_id, level="topic_id")
+    else:
+        counts = pd.DataFrame(columns=["count", "first_pos"])
+    return severity_stats_from_histogram(counts)
+
+
+def stream_aggregate(topics_df: pd.DataFrame, path=None, chunksize=DEFAULT_CHUNKSIZE, top_n=5):
+    """
+    Summarize a turn log of any size in one pass.
+
+    Returns dict with:
+    - overview: Overview KPIs (see finalize_overview_kpis)
+    - top_success_topics: get_top_success_topics_detailed equivalent
+    - severity_by_topic: compute_severity_stats per topic_id in topics_df
+    """
+    partial = stream_partial(path, chunksize)
+    return {
+        "overview": finalize_overview_kpis(partial, n_topics=len(topics_df)),
+        "top_success_topics": finalize_top_success_topics(partial, topics_df, top_n=top_n),
+        "severity_by_topic": {
+            topic_id: finalize_severity_stats(partial, topic_id)
+            for topic_id in topics_df["topic_id"].tolist()
+        },
+    }
+
+
+# ---- KPI cube ----
+# One partial per dataset over an in-memory turn log. Partials merge, so the
+# KPIs of any set of datasets come from merging their cells, never from rows.
+
+def build_kpi_cube(turns_df: pd.DataFrame) -> dict:
+    """dataset -> partial (positions in first_pos are the turn log's row positions)."""
+    return extend_kpi_cube({}, turns_df, offset=0)
+
+
+def extend_kpi_cube(cube: dict, new_turns: pd.DataFrame, offset: int) -> dict:
+    """
+    Cube of the log after appending `new_turns` at row `offset`: touched cells are
+    merged with the new turns' partials, the others are shared with `cube`.
+    """
+    cube = dict(cube)
+    positions = pd.RangeIndex(offset, offset + len(new_turns))
+    for dataset, rows in new_turns.groupby("dataset", sort=True, observed=True).indices.items():
+        chunk = new_turns.iloc[rows].set_axis(positions[rows])
+        partial = partial_from_chunk(chunk, offset=offset + int(rows[0]))
+        cube[dataset] = merge_partials(cube[dataset], partial) if dataset in cube else partial
+    return cube
+
+
+def rollup_kpi_cube(cube: dict, datasets=None):
+    """Merged partial over `datasets` (default: every dataset in the cube)."""
+    partial = empty_partial()
+    for dataset in sorted(cube if datasets is None else datasets):
+        if dataset in cube:
+            partial = merge_partials(partial, cube[dataset])
+    return partial
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m logic.streaming",
+        description="Overview KPIs and topic rollups of a turn log of any size, in one bounded-memory pass.",
+    )
+    parser.add_argument("--turns", default=f"{DATA_DIR}/dashboard_turns.jsonl")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--top-n", type=int, default=5)
+    args = parser.parse_args()
+
+    summary = stream_aggregate(load_topics(), args.turns, args.chunksize, args.top_n)
+    print(json.dumps(summary["overview"], indent=2, default=float))
+    print(summary["top_success_topics"].to_string(index=False))
+    for topic_id, stats in summary["severity_by_topic"].items():
+        print(f"topic {topic_id}: dominant {stats['dominant_severity']}, avg {stats['avg_severity']}")
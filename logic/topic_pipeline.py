@@ -0,0 +1,485 @@
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from logic import fastjson
+from logic.topic_assign import N_FEATURES, turn_features
+
+# ---- Offline topic clustering ----
+# Regenerates dashboard_topics.json from dashboard_turns.jsonl:
+#   1. featurize: low-satisfaction USER turns -> hashed unigram/bigram counts
+#      (same features as logic.topic_assign), document frequencies, and a
+#      uniform training sample (smallest random keys), in parallel over chunks
+#   2. train: spherical minibatch k-means on the sample (k-means++ init)
+#   3. assign: every turn to its nearest centroid, in parallel, reduced to
+#      mergeable per-topic stats; optionally rewrites topic ids in the turn log
+# A checkpoint keeps IDF, centroids, per-center counts, topic stats and the byte
+# offset reached, so --incremental only reads and clusters turns appended since.
+#
+#   python -m logic.topic_pipeline --k 6 --workers 8 [--write-turns] [--incremental]
+
+DEFAULT_TURNS = "data/dashboard_turns.jsonl"
+DEFAULT_TOPICS = "data/dashboard_topics.json"
+DEFAULT_CHECKPOINT = "data/topic_pipeline_checkpoint.npz"
+CHUNK_LINES = 20_000
+TRAIN_SAMPLE = 200_000
+BATCH_SIZE = 4_096
+EPOCHS = 3
+N_EXAMPLES = 3
+NOT_CLUSTERABLE = -2
+COPY_BLOCK = 1 << 20
+# Chunks submitted to the pool ahead of the one being consumed, per worker
+CHUNKS_IN_FLIGHT = 2
+
+
+def _is_clusterable(turn: dict) -> bool:
+    return turn.get("speaker") == "USER" and turn.get("low_satisfaction") is True
+
+
+def _turn_counts(turn: dict):
+    features = turn_features(turn.get("text"), turn.get("reason") or "", turn.get("issues"))
+    return list(features.keys()), list(features.values())
+
+
+def _pack_rows(rows):
+    """(indices, counts) lists -> compact CSR-style arrays (lengths, indices, counts)."""
+    lengths = np.array([len(indices) for indices, _ in rows], dtype=np.int64)
+    indices = np.fromiter((i for r in rows for i in r[0]), dtype=np.int32, count=int(lengths.sum()))
+    counts = np.fromiter((c for r in rows for c in r[1]), dtype=np.float32, count=int(lengths.sum()))
+    return lengths, indices, counts
+
+
+def _take_rows(packed, rows: np.ndarray):
+    """Select rows (by position) from packed arrays."""
+    lengths, indices, counts = packed
+    starts = np.concatenate([[0], np.cumsum(lengths)])[rows]
+    positions = np.concatenate([np.arange(start, start + n) for start, n in zip(starts, lengths[rows])]) if len(rows) else []
+    return lengths[rows], indices[positions], counts[positions]
+
+
+def _top_examples(examples):
+    """Highest-similarity examples, one per distinct text."""
+    top, seen = [], set()
+    for example in sorted(examples, key=lambda e: -e[0]):
+        if example[1] not in seen:
+            seen.add(example[1])
+            top.append(example)
+            if len(top) == N_EXAMPLES:
+                break
+    return top
+
+
+def _iter_line_chunks(path, offset=0, chunk_lines=CHUNK_LINES):
+    """Yield lists of raw (bytes) lines starting at byte `offset`."""
+    # Binary mode: offsets are file sizes (bytes), which text-mode seek does not accept
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _bounded_map(pool, fn, items, workers):
+    """
+    pool.map(fn, items) in order, but reading `items` only as results are consumed:
+    at most CHUNKS_IN_FLIGHT * workers tasks (and their chunks) are held at once.
+    """
+    window = CHUNKS_IN_FLIGHT * workers
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# ---- Pass 1: featurize ----
+
+def _featurize_chunk(task):
+    """Worker: document frequencies and keyed rows for one chunk of lines."""
+    lines, seed = task
+    rng = random.Random(seed)
+    rows = []
+    for line in lines:
+        if not line.strip():
+            continue
+        turn = fastjson.loads(line)
+        if not _is_clusterable(turn):
+            continue
+        indices, counts = _turn_counts(turn)
+        if indices:
+            rows.append((indices, counts))
+    packed = _pack_rows(rows)
+    # Feature indices are unique within a row, so a bincount is the document frequency
+    doc_freq = np.bincount(packed[1], minlength=N_FEATURES)
+    keys = np.array([rng.random() for _ in rows])
+    return doc_freq, keys, packed
+
+
+def featurize(path, offset=0, workers=1, seed=0, sample_size=TRAIN_SAMPLE):
+    """
+    Returns (doc_freq, n_docs, sample) over the clusterable turns after `offset`,
+    where sample holds at most `sample_size` of their rows as packed (lengths,
+    indices, counts) arrays, kept by smallest random key.
+    """
+    doc_freq = np.zeros(N_FEATURES, dtype=np.int64)
+    n_docs = 0
+    sample_keys = np.zeros(0)
+    sample = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+    tasks = ((chunk, seed * 1_000_003 + i) for i, chunk in enumerate(_iter_line_chunks(path, offset)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_freq, keys, packed in _bounded_map(pool, _featurize_chunk, tasks, workers):
+            doc_freq += chunk_freq
+            n_docs += len(keys)
+            sample_keys = np.concatenate([sample_keys, keys])
+            sample = tuple(np.concatenate([a, b]) for a, b in zip(sample, packed))
+            if len(sample_keys) > sample_size:
+                keep = np.sort(np.argpartition(sample_keys, sample_size)[:sample_size])
+                sample_keys = sample_keys[keep]
+                sample = _take_rows(sample, keep)
+    return doc_freq, n_docs, sample
+
+
+def compute_idf(doc_freq: np.ndarray, n_docs: int) -> np.ndarray:
+    return np.log((1 + n_docs) / (1 + doc_freq)) + 1
+
+
+# ---- Sparse helpers ----
+
+def _to_csr(packed, idf):
+    """Packed (lengths, indices, counts) rows -> L2-normalized TF-IDF CSR arrays."""
+    lengths, indices, counts = packed
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indices = indices.astype(np.int64)
+    data = (1 + np.log(counts.astype(np.float64))) * idf[indices]
+    row_of = np.repeat(np.arange(len(lengths)), lengths)
+    norms = np.sqrt(np.bincount(row_of, weights=data ** 2, minlength=len(lengths)))
+    data /= norms[row_of]
+    return indptr, indices, data
+
+
+def _scores(centroids, indptr, indices, data):
+    """Cosine similarity (n_rows, k) of CSR rows (no empty rows) to unit centroids."""
+    gathered = centroids[:, indices] * data
+    return np.add.reduceat(gathered, indptr[:-1], axis=1).T
+
+
+# ---- Pass 2: train ----
+
+def _kmeans_plus_plus(indptr, indices, data, k, rng):
+    n = len(indptr) - 1
+    centroids = np.zeros((k, N_FEATURES))
+    first = rng.randrange(n)
+    np.add.at(centroids[0], indices[indptr[first]:indptr[first + 1]], data[indptr[first]:indptr[first + 1]])
+    best = _scores(centroids[:1], indptr, indices, data)[:, 0]
+    for c in range(1, k):
+        distance = np.clip(1 - best, 0, None)
+        total = distance.sum()
+        pick = rng.randrange(n) if total <= 0 else int(np.searchsorted(np.cumsum(distance), rng.random() * total))
+        pick = min(pick, n - 1)
+        np.add.at(centroids[c], indices[indptr[pick]:indptr[pick + 1]], data[indptr[pick]:indptr[pick + 1]])
+        best = np.maximum(best, _scores(centroids[c:c + 1], indptr, indices, data)[:, 0])
+    return centroids
+
+
+def train(sample, idf, k, centroids=None, center_counts=None, seed=0, batch_size=BATCH_SIZE, epochs=EPOCHS):
+    """
+    Spherical minibatch k-means. Each center is the running mean of the rows
+    assigned to it (per-center learning rate 1/count), re-normalized after
+    every batch. Passing `centroids`/`center_counts` continues from a checkpoint.
+    """
+    rng = random.Random(seed)
+    indptr, indices, data = _to_csr(sample, idf)
+    n = len(indptr) - 1
+    if centroids is None:
+        centroids = _kmeans_plus_plus(indptr, indices, data, k, rng)
+        center_counts = np.zeros(k)
+    k = len(centroids)
+
+    order = list(range(n))
+    for _ in range(epochs):
+        rng.shuffle(order)
+        for start in range(0, n, batch_size):
+            batch = np.sort(np.array(order[start:start + batch_size]))
+            lengths = indptr[batch + 1] - indptr[batch]
+            positions = np.concatenate([np.arange(indptr[r], indptr[r + 1]) for r in batch])
+            b_indptr = np.concatenate([[0], np.cumsum(lengths)])
+            b_indices, b_data = indices[positions], data[positions]
+
+            labels = _scores(centroids, b_indptr, b_indices, b_data).argmax(axis=1)
+            label_of_entry = np.repeat(labels, lengths)
+            batch_sum = np.bincount(
+                label_of_entry * N_FEATURES + b_indices, weights=b_data, minlength=k * N_FEATURES
+            ).reshape(k, N_FEATURES)
+            batch_counts = np.bincount(labels, minlength=k)
+
+            updated = batch_counts > 0
+            totals = center_counts + batch_counts
+            centroids[updated] = (
+                centroids[updated] * center_counts[updated, None] + batch_sum[updated]
+            ) / totals[updated, None]
+            center_counts = totals
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids = np.divide(centroids, norms, out=np.zeros_like(centroids), where=norms > 0)
+
+    return centroids, center_counts
+
+
+# ---- Pass 3: assign ----
+
+_worker_model = {}
+
+
+def _init_assign_worker(centroids, idf):
+    _worker_model["centroids"] = centroids
+    _worker_model["idf"] = idf
+
+
+def empty_topic_stats():
+    return {"n": 0, "sat_sum": 0.0, "sat_count": 0, "low_sat": 0, "issues": Counter(), "examples": []}
+
+
+def merge_topic_stats(a, b):
+    return {
+        "n": a["n"] + b["n"],
+        "sat_sum": a["sat_sum"] + b["sat_sum"],
+        "sat_count": a["sat_count"] + b["sat_count"],
+        "low_sat": a["low_sat"] + b["low_sat"],
+        "issues": a["issues"] + b["issues"],
+        # Most central turns (highest similarity) across both sides
+        "examples": _top_examples(a["examples"] + b["examples"]),
+    }
+
+
+def _assign_chunk(lines):
+    """Worker: topic per line (None when not clusterable) and per-topic stats."""
+    centroids, idf = _worker_model["centroids"], _worker_model["idf"]
+    turns, rows, positions = [], [], []
+    labels = [None] * len(lines)
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        turn = fastjson.loads(line)
+        if not _is_clusterable(turn):
+            continue
+        indices, counts = _turn_counts(turn)
+        labels[i] = -1
+        if not indices:
+            continue
+        turns.append(turn)
+        rows.append((indices, counts))
+        positions.append(i)
+
+    stats = {}
+    if rows:
+        scores = _scores(centroids, *_to_csr(_pack_rows(rows), idf))
+        best = scores.argmax(axis=1)
+        for turn, pos, topic, score in zip(turns, positions, best, scores[np.arange(len(best)), best]):
+            topic = int(topic)
+            labels[pos] = topic
+            s = stats.setdefault(topic, empty_topic_stats())
+            s["n"] += 1
+            sat = turn.get("satisfaction_score")
+            if isinstance(sat, (int, float)) and sat == sat:
+                s["sat_sum"] += sat
+                s["sat_count"] += 1
+            s["low_sat"] += 1
+            s["issues"].update(i for i in (turn.get("issues") or []) if i)
+            s["examples"] = _top_examples(
+                s["examples"] + [(float(score), turn.get("text") or "", turn.get("reason") or "")]
+            )
+    return labels, stats
+
+
+def assign(path, centroids, idf, offset=0, workers=1):
+    """
+    Assign every clusterable turn after `offset`.
+    Returns (stats, line_topics): merged per-topic stats, and one int16 per line
+    (topic id, -1 for an unmatched clusterable turn, NOT_CLUSTERABLE otherwise).
+    """
+    stats = {}
+    line_topics = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_assign_worker, initargs=(centroids, idf)) as pool:
+        for labels, chunk_stats in _bounded_map(pool, _assign_chunk, _iter_line_chunks(path, offset), workers):
+            for topic, s in chunk_stats.items():
+                stats[topic] = merge_topic_stats(stats.get(topic, empty_topic_stats()), s)
+            line_topics.append(np.array([NOT_CLUSTERABLE if t is None else t for t in labels], dtype=np.int16))
+    line_topics = np.concatenate(line_topics) if line_topics else np.zeros(0, dtype=np.int16)
+    return stats, line_topics
+
+
+def rewrite_turn_topics(path, offset, line_topics, labels: dict):
+    """Rewrite topic_id/topic_label of clustered turns after `offset`; earlier bytes are copied as-is."""
+    tmp = f"{path}.tmp"
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        remaining = offset
+        while remaining:
+            block = src.read(min(remaining, COPY_BLOCK))
+            if not block:
+                break
+            dst.write(block)
+            remaining -= len(block)
+        for line, topic in zip(src, line_topics):
+            if topic == NOT_CLUSTERABLE:
+                dst.write(line)
+                continue
+            turn = json.loads(line)
+            turn["topic_id"] = int(topic)
+            turn["topic_label"] = labels.get(str(topic), "UNCLUSTERED")
+            dst.write((json.dumps(turn, ensure_ascii=False) + "\n").encode("utf-8"))
+    os.replace(tmp, path)
+
+
+# ---- Output ----
+
+def topic_label(topic_id, issues: Counter) -> str:
+    top = [issue for issue, _ in issues.most_common(2)]
+    return f"Topic {topic_id}: {' / '.join(top) if top else 'GENERAL'}"
+
+
+def build_topics(stats: dict, labels=None) -> list:
+    """dashboard_topics.json records, largest topic first."""
+    labels = labels or {}
+    topics = []
+    for topic_id, s in sorted(stats.items(), key=lambda item: (-item[1]["n"], item[0])):
+        if s["n"] == 0:
+            continue
+        reasons = [reason for _, _, reason in s["examples"] if reason]
+        topics.append({
+            "topic_id": int(topic_id),
+            "topic_label": labels.get(str(topic_id)) or topic_label(topic_id, s["issues"]),
+            "n_examples": s["n"],
+            "top_issues": [issue for issue, _ in s["issues"].most_common(3)],
+            "example_texts": [text for _, text, _ in s["examples"]],
+            "example_reason": reasons[0] if reasons else "",
+            "n_user_turns": s["n"],
+            "low_satisfaction_rate": s["low_sat"] / s["n"],
+            "avg_satisfaction": s["sat_sum"] / s["sat_count"] if s["sat_count"] else None,
+        })
+    return topics
+
+
+def _stats_to_json(stats):
+    return {
+        str(topic): {**s, "issues": dict(s["issues"]), "examples": [list(e) for e in s["examples"]]}
+        for topic, s in stats.items()
+    }
+
+
+def _stats_from_json(data):
+    return {
+        int(topic): {**s, "issues": Counter(s["issues"]), "examples": [tuple(e) for e in s["examples"]]}
+        for topic, s in data.items()
+    }
+
+
+def save_checkpoint(path, centroids, center_counts, idf, stats, labels, offset, n_docs):
+    meta = {"stats": _stats_to_json(stats), "labels": labels, "offset": offset, "n_docs": n_docs}
+    tmp = f"{path}.tmp.npz"
+    np.savez_compressed(tmp, centroids=centroids, center_counts=center_counts, idf=idf, meta=np.array(json.dumps(meta)))
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with np.load(path, allow_pickle=False) as ckpt:
+        meta = json.loads(str(ckpt["meta"]))
+        return {
+            "centroids": ckpt["centroids"],
+            "center_counts": ckpt["center_counts"],
+            "idf": ckpt["idf"],
+            "stats": _stats_from_json(meta["stats"]),
+            "labels": meta["labels"],
+            "offset": meta["offset"],
+            "n_docs": meta["n_docs"],
+        }
+
+
+def _write_json_atomic(path, payload):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def run(turns_path=DEFAULT_TURNS, topics_path=DEFAULT_TOPICS, checkpoint_path=DEFAULT_CHECKPOINT,
+        k=6, workers=None, seed=0, incremental=False, write_turns=False):
+    """
+    Full or incremental re-clustering. Returns the topic records written.
+
+    Incremental runs keep IDF, topic ids and labels from the checkpoint: only turns
+    after the checkpointed byte offset are featurized, folded into the centroids
+    and assigned; earlier assignments are left as they are.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    ckpt = load_checkpoint(checkpoint_path) if incremental and os.path.exists(checkpoint_path) else None
+    offset = ckpt["offset"] if ckpt else 0
+    if ckpt and offset > os.path.getsize(turns_path):
+        raise ValueError(f"{turns_path} is shorter than the checkpoint offset; run a full refresh")
+
+    doc_freq, n_docs, sample = featurize(turns_path, offset, workers=workers, seed=seed)
+    print(f"featurized {n_docs} turns in {time.perf_counter() - started:.1f}s")
+
+    if ckpt:
+        idf, centroids, center_counts = ckpt["idf"], ckpt["centroids"].copy(), ckpt["center_counts"].copy()
+        if n_docs:
+            centroids, center_counts = train(sample, idf, len(centroids), centroids, center_counts, seed=seed)
+    else:
+        if not n_docs:
+            raise ValueError(f"No low-satisfaction USER turns in {turns_path}")
+        idf = compute_idf(doc_freq, n_docs)
+        centroids, center_counts = train(sample, idf, min(k, len(sample[0])), seed=seed)
+    print(f"trained {len(centroids)} topics in {time.perf_counter() - started:.1f}s")
+
+    new_stats, line_topics = assign(turns_path, centroids, idf, offset, workers=workers)
+    stats = dict(ckpt["stats"]) if ckpt else {}
+    for topic, s in new_stats.items():
+        stats[topic] = merge_topic_stats(stats.get(topic, empty_topic_stats()), s)
+    labels = dict(ckpt["labels"]) if ckpt else {}
+    for topic, s in stats.items():
+        labels.setdefault(str(topic), topic_label(topic, s["issues"]))
+    print(f"assigned {int((line_topics >= 0).sum())} turns in {time.perf_counter() - started:.1f}s")
+
+    if write_turns:
+        rewrite_turn_topics(turns_path, offset, line_topics, labels)
+
+    topics = build_topics(stats, labels)
+    _write_json_atomic(topics_path, topics)
+    save_checkpoint(
+        checkpoint_path, centroids, center_counts, idf, stats, labels,
+        offset=os.path.getsize(turns_path), n_docs=(ckpt["n_docs"] if ckpt else 0) + n_docs,
+    )
+    print(f"wrote {len(topics)} topics to {topics_path} in {time.perf_counter() - started:.1f}s")
+    return topics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate dashboard_topics.json by clustering low-satisfaction turns.")
+    parser.add_argument("--turns", default=DEFAULT_TURNS)
+    parser.add_argument("--out", default=DEFAULT_TOPICS)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--k", type=int, default=6, help="number of topics (full refresh only)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--incremental", action="store_true", help="only cluster turns appended since the checkpoint")
+    parser.add_argument("--write-turns", action="store_true", help="rewrite topic_id/topic_label in the turn log")
+    args = parser.parse_args(argv)
+    run(args.turns, args.out, args.checkpoint, k=args.k, workers=args.workers, seed=args.seed,
+        incremental=args.incremental, write_turns=args.write_turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import hashlib
+import mmap
+import os
+import re
+
+import numpy as np
+
+from logic import fastjson
+from logic.data_loader import DATA_DIR
+
+# ---- Random access into the turn log ----
+# A sidecar index next to dashboard_turns.jsonl maps each conv_id to the byte
+# spans of its lines, sorted by conv_id, so one conversation is read straight
+# from a memory-mapped log without loading the rest:
+#
+#   python -m logic.turn_index      # build / refresh data/dashboard_turns.jsonl.idx.npz
+#
+# The log is append-only: a grown log is indexed from where the index stopped,
+# anything else (shrunk or rewritten log) rebuilds it. The index is optional;
+# without it transcripts are filtered from the in-memory turns.
+
+DEFAULT_TURNS = f"{DATA_DIR}/dashboard_turns.jsonl"
+INDEX_SUFFIX = ".idx.npz"
+# Bytes before the indexed end that must be unchanged for the index to still apply
+TAIL_CHECK_BYTES = 4096
+
+# Keys are never escaped, and a quote inside a string always is
+_CONV_ID = re.compile(rb'(?<!\\)"conv_id":\s*(-?\d+)')
+
+
+def index_path(path):
+    return f"{path}{INDEX_SUFFIX}"
+
+
+def _tail_digest(mm, size) -> str:
+    return hashlib.sha256(mm[max(0, size - TAIL_CHECK_BYTES):size]).hexdigest()
+
+
+def _scan(mm, start, end):
+    """(conv_ids, offsets, lengths) of the lines in mm[start:end], in file order."""
+    conv_ids, offsets, lengths = [], [], []
+    pos = start
+    while pos < end:
+        newline = mm.find(b"\n", pos, end)
+        line_end = end if newline < 0 else newline
+        line = mm[pos:line_end]
+        if line.strip():
+            match = _CONV_ID.search(line)
+            conv_id = int(match.group(1)) if match else fastjson.loads(line)["conv_id"]
+            conv_ids.append(conv_id)
+            offsets.append(pos)
+            lengths.append(line_end - pos)
+        pos = line_end + 1
+    return (
+        np.array(conv_ids, dtype=np.int64),
+        np.array(offsets, dtype=np.int64),
+        np.array(lengths, dtype=np.int64),
+    )
+
+
+def _sorted_index(conv_ids, offsets, lengths, mm, size) -> dict:
+    # Stable: a conversation's lines stay in file order
+    order = np.argsort(conv_ids, kind="stable")
+    return {
+        "conv_ids": conv_ids[order],
+        "offsets": offsets[order],
+        "lengths": lengths[order],
+        "size": size,
+        "tail_digest": _tail_digest(mm, size),
+    }
+
+
+def build_turn_index(mm, size) -> dict:
+    return _sorted_index(*_scan(mm, 0, size), mm, size)
+
+
+def extend_turn_index(index, mm, size) -> dict:
+    """Index lines appended after index["size"]."""
+    conv_ids, offsets, lengths = _scan(mm, index["size"], size)
+    return _sorted_index(
+        np.concatenate([index["conv_ids"], conv_ids]),
+        np.concatenate([index["offsets"], offsets]),
+        np.concatenate([index["lengths"], lengths]),
+        mm, size,
+    )
+
+
+def save_turn_index(index, path):
+    tmp = f"{index_path(path)}.tmp.npz"
+    np.savez(
+        tmp,
+        conv_ids=index["conv_ids"], offsets=index["offsets"], lengths=index["lengths"],
+        size=np.int64(index["size"]), tail_digest=np.array(index["tail_digest"]),
+    )
+    os.replace(tmp, index_path(path))
+
+
+def load_turn_index(path):
+    try:
+        with np.load(index_path(path)) as f:
+            return {
+                "conv_ids": f["conv_ids"],
+                "offsets": f["offsets"],
+                "lengths": f["lengths"],
+                "size": int(f["size"]),
+                "tail_digest": str(f["tail_digest"]),
+            }
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+
+
+def refresh_turn_index(index, mm, size):
+    """Index brought up to date with the log, or None when it no longer applies (rebuild)."""
+    if index is None or index["size"] > size or _tail_digest(mm, index["size"]) != index["tail_digest"]:
+        return None
+    if index["size"] < size:
+        return extend_turn_index(index, mm, size)
+    return index
+
+
+# ---- Reader ----
+
+_readers = {}
+
+
+def turn_log_reader(path=DEFAULT_TURNS, create=False):
+    """
+    Memory-mapped log plus its index, kept open per path and refreshed when the
+    log grows or changes. Returns None when there is no index (unless `create`)
+    or the log is missing/empty.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    size = stat.st_size
+    reader = _readers.get(path)
+    if reader is not None and reader["mtime_ns"] == stat.st_mtime_ns and reader["index"]["size"] == size:
+        return reader
+    if size == 0:
+        return None
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    index = reader["index"] if reader is not None else load_turn_index(path)
+    if index is None and not create:
+        mm.close()
+        return None
+
+    refreshed = refresh_turn_index(index, mm, size)
+    if refreshed is None:
+        refreshed = build_turn_index(mm, size)
+    if refreshed is not index:
+        save_turn_index(refreshed, path)
+
+    if reader is not None:
+        reader["mm"].close()
+    reader = {"mm": mm, "index": refreshed, "mtime_ns": stat.st_mtime_ns}
+    _readers[path] = reader
+    return reader
+
+
+def read_conversation_lines(reader, conv_id) -> list:
+    """Raw JSONL lines of one conversation, in file order."""
+    index = reader["index"]
+    lo, hi = np.searchsorted(index["conv_ids"], [conv_id, conv_id + 1])
+    mm = reader["mm"]
+    return [mm[o:o + n] for o, n in zip(index["offsets"][lo:hi].tolist(), index["lengths"][lo:hi].tolist())]
+
+
+def read_conversation(conv_id, path=DEFAULT_TURNS):
+    """
+    One conversation's turns read from disk, sorted by turn_id, or None when the
+    log has no index or does not contain the conversation.
+    """
+    reader = turn_log_reader(path)
+    if reader is None:
+        return None
+    lines = read_conversation_lines(reader, int(conv_id))
+    if not lines:
+        return None
+    return fastjson.turns_frame(lines).sort_values("turn_id")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the conv_id -> byte span index of a turn log.")
+    parser.add_argument("--turns", default=DEFAULT_TURNS)
+    args = parser.parse_args()
+    reader = turn_log_reader(args.turns, create=True)
+    if reader is None:
+        print(f"{args.turns} is missing or empty")
+    else:
+        index = reader["index"]
+        n_convs = len(np.unique(index["conv_ids"]))
+        print(f"indexed {len(index['conv_ids'])} lines, {n_convs} conversations -> {index_path(args.turns)}")
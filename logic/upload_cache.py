@@ -0,0 +1,37 @@
+import hashlib
+from collections import OrderedDict
+
+# ---- Parse-once upload cache ----
+# Streamlit reruns the whole page on every widget interaction, so an upload that
+# sits in the file uploader would otherwise be decoded and parsed again each time.
+# Parsed uploads are kept by content digest in a small LRU; the same bytes (a
+# rerun, or the same file uploaded again) map to the same entry.
+
+UPLOAD_CACHE_SIZE = 8
+
+
+def upload_digest(fileobj) -> str:
+    """sha256 of a binary file object, read in blocks from the start."""
+    fileobj.seek(0)
+    return hashlib.file_digest(fileobj, "sha256").hexdigest()
+
+
+def empty_upload_cache() -> OrderedDict:
+    return OrderedDict()
+
+
+def get_or_parse(cache: OrderedDict, digest, parse, max_entries=UPLOAD_CACHE_SIZE):
+    """
+    Cached parse result for `digest`, calling `parse()` only on a miss.
+    The entry becomes most recently used; the least recently used entries are
+    evicted beyond `max_entries`.
+    """
+    if digest in cache:
+        cache.move_to_end(digest)
+        return cache[digest]
+
+    parsed = parse()
+    cache[digest] = parsed
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+    return parsed
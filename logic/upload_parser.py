@@ -0,0 +1,206 @@
+import io
+import json
+
+from logic import fastjson
+
+# ---- Streaming upload parser ----
+# Uploaded conversations are either a JSON array of turn objects or JSONL (one
+# turn object per line). The format is sniffed from the first non-blank
+# character, then records are decoded one at a time from the binary buffer
+# through an incremental text decoder, so the file is never held as one decoded
+# string or one parsed document. Each record is checked against the turn schema
+# as it is read; bad records are skipped and reported with their line number.
+
+READ_CHUNK_CHARS = 1 << 20
+# A single turn larger than this is treated as malformed rather than read on
+MAX_RECORD_CHARS = 1 << 20
+MAX_REPORTED_ERRORS = 20
+
+# NaN decodes to None, as in logic.fastjson
+_decoder = json.JSONDecoder(parse_constant=fastjson.parse_constant)
+_WHITESPACE = " \t\r\n"
+
+
+def validate_turn(record):
+    """Error message if `record` is not a usable turn object, else None."""
+    if not isinstance(record, dict):
+        return f"expected a turn object, got {type(record).__name__}"
+    if not isinstance(record.get("text"), str):
+        return "missing 'text'" if "text" not in record else "'text' must be a string"
+    if "speaker" in record and not isinstance(record["speaker"], str):
+        return "'speaker' must be a string"
+    score = record.get("satisfaction_score")
+    if score is not None and (isinstance(score, bool) or not isinstance(score, (int, float))):
+        return "'satisfaction_score' must be a number"
+    issues = record.get("issues")
+    if issues is not None and not isinstance(issues, list):
+        return "'issues' must be a list"
+    topic_id = record.get("topic_id")
+    if topic_id is not None and (isinstance(topic_id, bool) or not isinstance(topic_id, int)):
+        return "'topic_id' must be an integer"
+    return None
+
+
+def sniff_format(head: str) -> str:
+    """"array" when the first non-blank character opens a JSON array, else "jsonl"."""
+    stripped = head.lstrip(_WHITESPACE)
+    return "array" if stripped.startswith("[") else "jsonl"
+
+
+def _may_be_truncated(error: json.JSONDecodeError) -> bool:
+    # The decoder failed at the end of the buffer (possibly inside a cut-off number
+    # or literal), or inside an open string that may close in the next chunk
+    return len(error.doc) - error.pos <= 64 or error.msg.startswith("Unterminated string")
+
+
+def _iter_records(text, head, fmt):
+    """
+    Yield (line_no, record, error) for each top-level value, reading `text` in
+    chunks as needed. JSONL values are whitespace-separated (a pretty-printed
+    object spanning lines still reads as one record) and a bad record is skipped
+    up to the next line; array elements are comma-separated and a bad element
+    ends the array, since there is no reliable point to resume from.
+    """
+    buf = head
+    pos = 0
+    line_no = 1
+    eof = False
+
+    def refill():
+        nonlocal buf, pos, eof
+        chunk = text.read(READ_CHUNK_CHARS)
+        if not chunk:
+            eof = True
+        # Drop the consumed prefix so the buffer stays about one record long
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos, line_no
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                if buf[pos] == "\n":
+                    line_no += 1
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            refill()
+
+    is_array = fmt == "array"
+    expect_value = True
+    if is_array:
+        skip_whitespace()
+        pos += 1  # the opening "["
+
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            if is_array:
+                yield line_no, None, "unexpected end of file (missing ']')"
+            return
+
+        if is_array:
+            if buf[pos] == "]":
+                return
+            if buf[pos] == "," and not expect_value:
+                expect_value = True
+                pos += 1
+                continue
+            if not expect_value:
+                yield line_no, None, "expected ',' or ']' between turns"
+                return
+
+        if not is_array:
+            # Fast path: the rest of the line is one record
+            newline = buf.find("\n", pos)
+            if newline >= 0:
+                try:
+                    record = fastjson.loads(buf[pos:newline])
+                except json.JSONDecodeError:
+                    pass  # pretty-printed or bad record: decode incrementally below
+                else:
+                    yield line_no, record, None
+                    pos = newline
+                    expect_value = False
+                    continue
+
+        # Decode one value, reading more while it may just be incomplete
+        while True:
+            try:
+                record, end = _decoder.raw_decode(buf, pos)
+                error = None
+                break
+            except json.JSONDecodeError as e:
+                if _may_be_truncated(e) and not eof and len(buf) - pos <= MAX_RECORD_CHARS:
+                    refill()
+                    continue
+                error = f"invalid JSON ({e.msg})"
+                break
+
+        if error is None:
+            yield line_no, record, None
+            line_no += buf.count("\n", pos, end)
+            pos = end
+            expect_value = False
+            continue
+
+        yield line_no, None, error
+        if is_array:
+            return
+        # Resume at the next line
+        while "\n" not in buf[pos:] and not eof:
+            refill()
+        newline = buf.find("\n", pos)
+        pos = len(buf) if newline < 0 else newline
+
+
+def _parse_text(text) -> dict:
+    head = text.read(READ_CHUNK_CHARS)
+    fmt = sniff_format(head)
+
+    turns = []
+    errors = []
+    n_errors = 0
+    n_records = 0
+    for line_no, record, error in _iter_records(text, head, fmt):
+        if error is None:
+            n_records += 1
+            error = validate_turn(record)
+        if error is None:
+            turns.append(record)
+            continue
+        n_errors += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append((line_no, error))
+
+    return {
+        "format": fmt,
+        "turns": turns,
+        "n_records": n_records,
+        "errors": errors,
+        "n_errors": n_errors,
+    }
+
+
+def parse_upload(fileobj) -> dict:
+    """
+    Stream turn records out of an uploaded JSON array / JSONL file.
+
+    Returns dict with:
+    - format: "array" or "jsonl"
+    - turns: valid turn records, in file order
+    - n_records: records that were valid JSON
+    - errors: [(line_no, message), ...] for the first MAX_REPORTED_ERRORS bad records
+    - n_errors: total bad records (invalid JSON or failing the turn schema)
+    """
+    # UTF-8 (with or without BOM); files that are not valid UTF-8 are read as Latin-1
+    for encoding in ("utf-8-sig", "latin-1"):
+        fileobj.seek(0)
+        text = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+        try:
+            return _parse_text(text)
+        except UnicodeDecodeError:
+            continue
+        finally:
+            # Leave the caller's buffer open
+            text.detach()
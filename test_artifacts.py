@@ -0,0 +1,33 @@
+import pandas as pd
+
+from logic import artifacts
+from logic.artifacts import derived_table, live_tables, load_bundle, register_live_tables, source_versions, write_bundle
+from logic.issues import ISSUE_VOCAB
+
+
+def _write(bundle_dir, data_version, sources=None):
+    tables = {"turns": pd.DataFrame({"conv_id": [1]}), "issue_vocab": list(ISSUE_VOCAB), "repairs": {}}
+    return write_bundle(tables, sources or source_versions(), data_version, str(bundle_dir))
+
+
+def test_rebuilt_and_stale_bundles_are_rechecked(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "BUNDLE_CHECK_SECONDS", 0)
+    _write(tmp_path, "a" * 64)
+    assert load_bundle(str(tmp_path))["data_version"] == "a" * 64
+
+    _write(tmp_path, "b" * 64)
+    assert load_bundle(str(tmp_path))["data_version"] == "b" * 64
+
+    _write(tmp_path, "c" * 64, sources={**source_versions(), "topics": "edited"})
+    assert load_bundle(str(tmp_path)) is None
+
+
+def test_view_tables_do_not_evict_the_store_live_tables():
+    register_live_tables("store-version", {"kpi_cube": {}})
+    for i in range(artifacts.MAX_VIEW_VERSIONS + artifacts.MAX_LIVE_VERSIONS):
+        view = pd.DataFrame({"conv_id": [i]})
+        view.attrs["data_version"] = f"view-{i}"
+        assert derived_table(view, "n_rows", len) == 1
+    assert live_tables("store-version") == {"kpi_cube": {}}
+    assert live_tables("view-0") is None
+    assert live_tables(f"view-{artifacts.MAX_VIEW_VERSIONS + artifacts.MAX_LIVE_VERSIONS - 1}") == {"n_rows": 1}
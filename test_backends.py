@@ -0,0 +1,79 @@
+import random
+
+import pandas as pd
+import pytest
+
+from logic import aggregations, fastjson
+from logic.data_loader import load_topics, load_turns
+from logic.issues import encode_turn_issues
+
+duckdb_backend = pytest.importorskip("logic.duckdb_backend")
+pytest.importorskip("duckdb")
+
+TURNS_FILE = "data/dashboard_turns.jsonl"
+
+
+@pytest.fixture(scope="module")
+def turns_df():
+    return load_turns()
+
+
+@pytest.fixture(scope="module", params=["frame", "file"])
+def source(request, turns_df):
+    """The duckdb backend reads the loaded frame or scans the log itself."""
+    return turns_df if request.param == "frame" else TURNS_FILE
+
+
+def test_severity_stats(turns_df, source):
+    assert duckdb_backend.compute_severity_stats(source) == aggregations.compute_severity_stats(turns_df)
+    for topic_id in turns_df["topic_id"].unique().tolist():
+        expected = aggregations.compute_severity_stats(turns_df[turns_df["topic_id"] == topic_id])
+        assert duckdb_backend.compute_severity_stats(source, topic_id) == expected
+
+
+def test_topic_rollups(turns_df, source):
+    topics_df = load_topics()
+    pd.testing.assert_frame_equal(
+        duckdb_backend.get_top_success_topics_detailed(source, topics_df, top_n=50).reset_index(drop=True),
+        aggregations.get_top_success_topics_detailed(turns_df, topics_df, top_n=50).reset_index(drop=True),
+        check_dtype=False, check_exact=True,
+    )
+    pd.testing.assert_frame_equal(
+        duckdb_backend.get_success_topics(source, top_n=50).reset_index(drop=True),
+        aggregations.get_success_topics(turns_df, top_n=50).reset_index(drop=True),
+        check_dtype=False, check_exact=True,
+    )
+
+
+def test_conversations(turns_df, source):
+    # Exact equality: mean_satisfaction must match to the last bit
+    assert duckdb_backend.get_top_conversations(source) == aggregations.get_top_conversations(turns_df)
+    for topic_id in turns_df["topic_id"].unique().tolist():
+        assert (
+            duckdb_backend.get_successful_conversations(source, topic_id, limit=50)
+            == aggregations.get_successful_conversations(turns_df, topic_id, limit=50)
+        )
+        assert (
+            duckdb_backend.get_success_insights_for_topic(source, topic_id)
+            == aggregations.get_success_insights_for_topic(turns_df, topic_id)
+        )
+
+
+def test_first_seen_ties_follow_row_order(tmp_path):
+    # Shuffled rows: tie-breaks must follow the frame's/file's row order, not (conv_id, turn_id)
+    with open(TURNS_FILE, "rb") as f:
+        lines = [line for line in f if line.strip()]
+    random.Random(0).shuffle(lines)
+    path = tmp_path / "shuffled.jsonl"
+    path.write_bytes(b"".join(lines))
+    with open(path, "rb") as f:
+        shuffled = encode_turn_issues(fastjson.turns_frame(f))
+
+    for source in (shuffled, str(path)):
+        assert duckdb_backend.compute_severity_stats(source) == aggregations.compute_severity_stats(shuffled)
+        assert duckdb_backend.get_top_conversations(source) == aggregations.get_top_conversations(shuffled)
+        conv_list = aggregations.get_top_conversations(shuffled, limit=10)
+        assert (
+            duckdb_backend.get_why_it_works_patterns(conv_list, source)
+            == aggregations.get_why_it_works_patterns(conv_list, shuffled)
+        )
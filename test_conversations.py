@@ -0,0 +1,66 @@
+import json
+
+from logic import fastjson, turn_index
+from ui import conversations
+
+
+def _turn(conv_id, turn_id, text):
+    return {
+        "dataset": "CCPE", "conv_id": conv_id, "turn_id": turn_id, "speaker": "USER", "text": text,
+        "satisfaction_score": 3.0, "low_satisfaction": False, "issues": [], "severity": "NONE",
+        "reason": "", "topic_id": -1, "topic_label": "UNCLUSTERED", "satisfaction_source": "dataset",
+    }
+
+
+def _write_log(path, turns):
+    with open(path, "w", encoding="utf-8") as f:
+        for turn in turns:
+            f.write(json.dumps(turn) + "\n")
+
+
+def _build_index(path):
+    return turn_index.turn_log_reader(path, create=True) is not None
+
+
+def _use_log(monkeypatch, path):
+    monkeypatch.setattr(conversations, "read_conversation", lambda conv_id: turn_index.read_conversation(conv_id, path))
+
+
+LOG_TURNS = [_turn(1, 2, "b"), _turn(2, 1, "café"), _turn(1, 1, "a"), _turn(2, 2, "d")]
+
+
+def test_get_conversation_from_index(tmp_path, monkeypatch):
+    path = str(tmp_path / "turns.jsonl")
+    _write_log(path, LOG_TURNS)
+    assert _build_index(path)
+    _use_log(monkeypatch, path)
+    turns_df = fastjson.turns_frame([json.dumps(t) for t in LOG_TURNS])
+
+    conv = conversations.get_conversation(turns_df, 2)
+    assert conv["turn_id"].tolist() == [1, 2]
+    assert conv["text"].tolist() == ["café", "d"]
+
+
+def test_get_conversation_without_index(tmp_path, monkeypatch):
+    path = str(tmp_path / "turns.jsonl")
+    _write_log(path, LOG_TURNS)
+    _use_log(monkeypatch, path)
+    turns_df = fastjson.turns_frame([json.dumps(t) for t in LOG_TURNS])
+
+    # No .idx.npz sidecar: falls back to the in-memory turns
+    conv = conversations.get_conversation(turns_df, 1)
+    assert conv["turn_id"].tolist() == [1, 2]
+    assert conv["text"].tolist() == ["a", "b"]
+
+
+def test_get_conversation_uploaded(tmp_path, monkeypatch):
+    path = str(tmp_path / "turns.jsonl")
+    _write_log(path, LOG_TURNS)
+    assert _build_index(path)
+    _use_log(monkeypatch, path)
+    uploaded = [_turn(7, 2, "y"), _turn(7, 1, "x")]
+    turns_df = fastjson.turns_frame([json.dumps(t) for t in LOG_TURNS + uploaded])
+
+    # Only in memory: not in the indexed log
+    conv = conversations.get_conversation(turns_df, 7)
+    assert conv["text"].tolist() == ["x", "y"]
@@ -0,0 +1,111 @@
+import pandas as pd
+
+from logic.data_loader import append_turns
+from logic.dedup import (
+    build_dedup_index,
+    cluster_of,
+    collapse_near_duplicates,
+    sync_dedup_index,
+    top_distinct_conversations,
+)
+
+TEMPLATE = [
+    "hi i would like to book a table at an italian restaurant in san jose tonight",
+    "sure which time would you like the reservation for and how many people",
+    "seven thirty for four people please and somewhere with outdoor seating",
+    "your table for four at seven thirty is booked enjoy your dinner",
+]
+
+
+def _turns(conversations: dict, version):
+    rows = [
+        (conv_id, turn_id, text)
+        for conv_id, texts in conversations.items()
+        for turn_id, text in enumerate(texts, start=1)
+    ]
+    turns_df = pd.DataFrame(rows, columns=["conv_id", "turn_id", "text"])
+    turns_df.attrs["data_version"] = version
+    return turns_df
+
+
+CONVERSATIONS = {
+    1: TEMPLATE,
+    # Same template, one word changed: a near duplicate of 1
+    2: TEMPLATE[:3] + ["your table for four at seven thirty is booked enjoy your meal"],
+    3: ["what movies do you like", "mostly horror films and some comedies from the nineties"],
+}
+
+
+def test_near_duplicate_pair_collapses():
+    index = build_dedup_index(_turns(CONVERSATIONS, "v1"))
+    assert cluster_of(index, 2) == cluster_of(index, 1) == 1
+    assert cluster_of(index, 3) == 3
+
+    ranked = [{"conv_id": 2}, {"conv_id": 3}, {"conv_id": 1}]
+    collapsed = collapse_near_duplicates(ranked, index)
+    assert collapsed == [{"conv_id": 2, "n_near_duplicates": 1}, {"conv_id": 3, "n_near_duplicates": 0}]
+
+
+def test_sync_extends_appended_store_and_rebuilds_reloaded_one():
+    turns_df = _turns(CONVERSATIONS, "v1")
+    index = build_dedup_index(turns_df)
+
+    appended = append_turns(turns_df, _turns({4: TEMPLATE}, "unused"))
+    synced = sync_dedup_index(index, appended)
+    assert synced is index and synced["n_rows"] == len(appended)
+    assert cluster_of(synced, 4) == 1
+
+    # Same length, different rows and a new version: rebuilt, no stale signatures
+    reloaded = _turns({5: TEMPLATE, 6: CONVERSATIONS[3], 7: ["a b c d"] * 8}, "v2")
+    assert len(reloaded) == len(appended)
+    rebuilt = sync_dedup_index(synced, reloaded)
+    assert rebuilt is not synced
+    assert sorted(rebuilt["signatures"]) == [5, 6, 7]
+
+
+LATER_TURNS = [
+    "actually cancel that i need a flight from boston to denver next friday morning",
+    "there is a nonstop at eight fifteen arriving at ten forty local time",
+    "book the window seat and add one checked bag to the reservation",
+]
+
+
+def _clusters(index):
+    return {conv_id: cluster_of(index, conv_id) for conv_id in sorted(index["signatures"])}
+
+
+def test_sync_resignatures_conversations_continued_in_an_append():
+    # Conversation 2 starts as a copy of 1 and diverges once its later turns arrive;
+    # conversation 3's later turns make it a copy of 1
+    turns_df = _turns({1: TEMPLATE, 2: TEMPLATE, 3: TEMPLATE[:1]}, "v1")
+    index = build_dedup_index(turns_df)
+    assert cluster_of(index, 2) == 1 and cluster_of(index, 3) == 3
+
+    later = pd.DataFrame(
+        [(2, 5 + i, text) for i, text in enumerate(LATER_TURNS * 3)]
+        + [(3, 2 + i, text) for i, text in enumerate(TEMPLATE[1:])],
+        columns=["conv_id", "turn_id", "text"],
+    )
+    appended = append_turns(turns_df, later)
+    synced = sync_dedup_index(index, appended)
+    fresh = build_dedup_index(appended)
+
+    assert synced is index and synced["n_rows"] == len(appended)
+    assert _clusters(synced) == _clusters(fresh) == {1: 1, 2: 2, 3: 1}
+    for conv_id, signature in fresh["signatures"].items():
+        assert (synced["signatures"][conv_id] == signature).all()
+    assert {k: sorted(v) for k, v in synced["buckets"].items() if v} == {k: sorted(v) for k, v in fresh["buckets"].items()}
+
+
+def test_collapsed_duplicates_let_the_next_distinct_conversation_in():
+    index = build_dedup_index(_turns(CONVERSATIONS, "v1"))
+    ranking = [{"conv_id": 1}, {"conv_id": 2}, {"conv_id": 3}]
+    asked = []
+
+    def rank(n):
+        asked.append(n)
+        return ranking[:n]
+
+    top = top_distinct_conversations(rank, index, limit=2)
+    assert [conv["conv_id"] for conv in top] == [1, 3]
+    assert asked == [2, 4]
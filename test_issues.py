@@ -0,0 +1,83 @@
+import pandas as pd
+
+from logic.artifacts import build_bundle, load_bundle, source_versions, write_bundle
+from logic.data_loader import append_turns, load_repair_index, load_topics, load_turns
+from logic.issues import (
+    ISSUE_VOCAB,
+    count_issues,
+    decode_issues,
+    encode_issues,
+    has_any_issue,
+    has_issue,
+    issue_masks,
+    issue_vocab,
+)
+
+
+def test_masks_round_trip():
+    issues = [["LOOP", "MISSING_CONTEXT"], [], None, ["TONE_ISSUE", "", "TONE_ISSUE"], ["WRONG_FACT"]]
+    masks, vocab = encode_issues(issues)
+    assert vocab == ISSUE_VOCAB
+    assert [decode_issues(int(m), vocab) for m in masks] == [
+        ["MISSING_CONTEXT", "LOOP"], [], [], ["TONE_ISSUE"], ["WRONG_FACT"],
+    ]
+    assert has_any_issue(masks).tolist() == [True, False, False, True, True]
+    assert has_issue(masks, "LOOP", vocab).tolist() == [True, False, False, False, False]
+    assert not has_issue(masks, "NOT_AN_ISSUE", vocab).any()
+
+
+def test_unseen_issue_types_extend_the_returned_vocabulary():
+    masks, vocab = encode_issues([["TEST_ONLY_ISSUE"], ["LOOP"]])
+    assert vocab == ISSUE_VOCAB + ("TEST_ONLY_ISSUE",)
+    assert "TEST_ONLY_ISSUE" not in ISSUE_VOCAB
+    assert decode_issues(int(masks[0]), vocab) == ["TEST_ONLY_ISSUE"]
+    assert has_issue(masks, "TEST_ONLY_ISSUE", vocab).tolist() == [True, False]
+
+
+def _new_turns(issue):
+    return pd.DataFrame({
+        "conv_id": [-1], "turn_id": [1], "speaker": ["USER"], "text": ["it loops"],
+        "issues": [[issue, "LOOP"]], "topic_id": [-1],
+    })
+
+
+def test_appends_extend_each_store_vocabulary():
+    turns_df = load_turns()
+    first = append_turns(turns_df, _new_turns("ISSUE_A"))
+    second = append_turns(turns_df, _new_turns("ISSUE_B"))
+    both = append_turns(first, _new_turns("ISSUE_B"))
+
+    # The same bit means a different issue in sibling stores, decoded with each one's vocabulary
+    assert issue_vocab(first)[-1] == "ISSUE_A" and issue_vocab(second)[-1] == "ISSUE_B"
+    assert int(first["issue_mask"].iloc[-1]) == int(second["issue_mask"].iloc[-1])
+    assert decode_issues(int(first["issue_mask"].iloc[-1]), issue_vocab(first)) == ["LOOP", "ISSUE_A"]
+    assert decode_issues(int(second["issue_mask"].iloc[-1]), issue_vocab(second)) == ["LOOP", "ISSUE_B"]
+    assert issue_vocab(both)[-2:] == ("ISSUE_A", "ISSUE_B")
+    assert count_issues(*issue_masks(both.iloc[-2:])) == {"LOOP": 2, "ISSUE_A": 1, "ISSUE_B": 1}
+    assert issue_vocab(turns_df) == ISSUE_VOCAB
+
+
+def test_bundle_keeps_the_vocabulary_of_its_masks(tmp_path):
+    turns_df = append_turns(load_turns(), _new_turns("BUNDLE_ONLY_ISSUE"))
+    tables = build_bundle(turns_df, load_topics(), load_repair_index())
+    # Only the issue_vocab table, not frame attrs, carries the vocabulary to the reader
+    tables["turns"] = turns_df.copy()
+    tables["turns"].attrs = {}
+    write_bundle(tables, source_versions(), turns_df.attrs["data_version"], str(tmp_path))
+
+    loaded = load_bundle(str(tmp_path))["turns"]
+    assert issue_vocab(loaded) == issue_vocab(turns_df)
+    assert decode_issues(int(loaded["issue_mask"].iloc[-1]), issue_vocab(loaded)) == ["LOOP", "BUNDLE_ONLY_ISSUE"]
+
+
+def test_masks_match_issue_lists_on_the_turn_log():
+    turns_df = load_turns()
+    masks, vocab = issue_masks(turns_df)
+    for issues, mask in zip(turns_df["issues"], masks.tolist()):
+        assert set(decode_issues(mask, vocab)) == {issue for issue in issues or [] if issue}
+
+    # Same counts and order as value_counts over the exploded lists
+    exploded = turns_df["issues"].explode()
+    expected = exploded[exploded.notna() & (exploded != "")].value_counts()
+    assert count_issues(masks, vocab) == {issue: int(n) for issue, n in expected.items()}
+    assert list(count_issues(masks, vocab, limit=2)) == list(expected.index[:2])
@@ -0,0 +1,49 @@
+import math
+import sqlite3
+
+from logic.metrics_store import METRIC_COLUMNS, append_metrics, latest_metrics, query_metrics
+from ui.overview import _history_value
+
+T0 = 1_700_000_000 - 1_700_000_000 % 86_400
+
+
+def _metrics(mean_sat, total_turns=10):
+    return {"mean_sat": mean_sat, "low_sat_rate": 0.5, "n_topics": 3, "low_sat_turns": 5,
+            "avg_severity": float("nan"), "total_turns": total_turns, "total_convs": 2}
+
+
+def test_rollups_average_over_non_null_values(tmp_path):
+    db = str(tmp_path / "metrics.sqlite")
+    append_metrics(_metrics(4.0), ts=T0, db_path=db)
+    append_metrics(_metrics(float("nan"), total_turns=0), ts=T0 + 1, db_path=db)
+    append_metrics(_metrics(2.0), ts=T0 + 2, db_path=db)
+
+    assert [s["mean_sat"] for s in latest_metrics(n=3, db_path=db)] == [4.0, None, 2.0]
+    for resolution in ("minute", "hour", "day"):
+        (bucket,) = query_metrics(T0, T0 + 10, resolution=resolution, db_path=db)
+        assert bucket["mean_sat"] == 3.0
+        assert bucket["low_sat_rate"] == 0.5
+        assert bucket["avg_severity"] is None
+        assert bucket["total_turns"] == 10
+
+
+def test_rollups_written_before_the_counts_are_migrated(tmp_path):
+    db = str(tmp_path / "metrics.sqlite")
+    conn = sqlite3.connect(db)
+    rollup_defs = ", ".join(f"sum_{c} REAL, last_{c} REAL" for c in METRIC_COLUMNS)
+    conn.execute(f"CREATE TABLE metrics_hour (bucket INTEGER PRIMARY KEY, n INTEGER NOT NULL, last_ts INTEGER NOT NULL, {rollup_defs})")
+    conn.execute("INSERT INTO metrics_hour (bucket, n, last_ts, sum_mean_sat, sum_low_sat_rate) VALUES (?, 2, ?, 7.0, 1.0)", (T0, T0))
+    conn.commit()
+    conn.close()
+
+    (bucket,) = query_metrics(T0, T0 + 10, resolution="hour", db_path=db)
+    assert bucket["mean_sat"] == 3.5 and bucket["low_sat_rate"] == 0.5 and bucket["avg_severity"] is None
+    append_metrics(_metrics(5.0), ts=T0 + 1, db_path=db)
+    (bucket,) = query_metrics(T0, T0 + 10, resolution="hour", db_path=db)
+    assert math.isclose(bucket["mean_sat"], 4.0)
+
+
+def test_history_table_shows_null_metrics_as_a_dash():
+    assert _history_value(None, "{:.2f}") == "—"
+    assert _history_value(0.25, "{:.1f}", scale=100) == "25.0"
+    assert _history_value(12.0, "{:.0f}") == "12"
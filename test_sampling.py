@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic import sampling
+from logic.aggregations import build_severity_index, build_topic_label_index
+from logic.data_loader import append_turns, load_topics, load_turns
+from logic.sampling import empty_sample, estimate_overview_kpis, extend_kpi_sample, ingest, kpi_sample
+
+NO_TOPICS = pd.DataFrame(columns=["topic_id", "topic_label", "n_examples"])
+
+
+def _store(n_rows, version, seed=0):
+    """Synthetic store: two datasets with different satisfaction levels."""
+    rng = np.random.default_rng(seed)
+    dataset = np.where(np.arange(n_rows) % 3 == 0, "CCPE", "SGD")
+    scores = np.where(dataset == "CCPE", rng.normal(2.5, 1.0, n_rows), rng.normal(4.0, 0.5, n_rows)).round(1)
+    turns_df = pd.DataFrame({
+        "dataset": dataset,
+        "conv_id": np.arange(n_rows) // 4,
+        "turn_id": np.arange(n_rows) % 4 + 1,
+        "satisfaction_score": scores,
+        "low_satisfaction": scores < 3.0,
+        "issues": [[] for _ in range(n_rows)],
+        "issue_mask": np.zeros(n_rows, dtype=np.int64),
+        "topic_id": -1,
+        "severity": None,
+    })
+    turns_df.attrs["data_version"] = version
+    return turns_df
+
+
+@pytest.fixture(autouse=True)
+def no_process_sample(monkeypatch):
+    monkeypatch.setattr(sampling, "_sample", None)
+
+
+def test_reservoirs_are_capped_per_stratum():
+    turns_df = _store(5_000, "v1")
+    sample = ingest(empty_sample(capacity=100), turns_df, 0)
+    assert {dataset: len(s["positions"]) for dataset, s in sample["strata"].items()} == {"CCPE": 100, "SGD": 100}
+    assert {dataset: s["seen"] for dataset, s in sample["strata"].items()} == {"CCPE": 1_667, "SGD": 3_333}
+    for dataset, stratum in sample["strata"].items():
+        assert len(set(stratum["positions"].tolist())) == 100
+        assert (turns_df["dataset"].to_numpy()[stratum["positions"]] == dataset).all()
+
+
+def test_reservoir_inclusion_is_uniform():
+    # Every row, early or late, in one ingest or appended later, is kept with probability capacity / N
+    n_rows, capacity, runs = 200, 20, 2_000
+    turns_df = _store(n_rows, "v1")
+    turns_df["dataset"] = "SGD"
+    hits = np.zeros(n_rows)
+    for seed in range(runs):
+        sample = ingest(empty_sample(capacity=capacity, seed=seed), turns_df.iloc[:120], 0)
+        ingest(sample, turns_df, 120)
+        hits[sample["strata"]["SGD"]["positions"]] += 1
+    expected = runs * capacity / n_rows
+    assert np.abs(hits - expected).max() < 5 * np.sqrt(expected)
+    assert abs(hits[:100].mean() - hits[100:].mean()) < 0.05 * expected
+
+
+def test_confidence_intervals_cover_the_exact_values():
+    turns_df = _store(20_000, "v1")
+    exact_mean = turns_df["satisfaction_score"].mean()
+    exact_low = int(turns_df["low_satisfaction"].sum())
+    runs = 200
+    covered = {"mean_sat": 0, "low_sat_turns": 0}
+    for seed in range(runs):
+        approx = estimate_overview_kpis(ingest(empty_sample(capacity=200, seed=seed), turns_df, 0), turns_df, NO_TOPICS)
+        covered["mean_sat"] += abs(approx["mean_sat"] - exact_mean) <= approx["ci"]["mean_sat"]
+        covered["low_sat_turns"] += abs(approx["low_sat_turns"] - exact_low) <= approx["ci"]["low_sat_turns"]
+    for kpi, n in covered.items():
+        assert 0.9 <= n / runs <= 0.99, kpi
+
+
+def test_sample_follows_the_append_lineage():
+    turns_df = _store(1_000, "v1")
+    sample = kpi_sample(turns_df)
+    assert kpi_sample(turns_df) is sample
+
+    appended = append_turns(turns_df, _store(500, "unused", seed=1))
+    extend_kpi_sample(appended)
+    extended = sampling._sample
+    assert extended is not sample and extended["data_version"] == appended.attrs["data_version"]
+    assert extended["n_rows"] == 1_500
+    assert sum(s["seen"] for s in extended["strata"].values()) == 1_500
+    # The previous version's sample is left as it was for sessions still reading it
+    assert sample["n_rows"] == 1_000
+
+    # A reload at the same length is not an append: resampled from scratch
+    reloaded = _store(1_500, "v2", seed=2)
+    extend_kpi_sample(reloaded)
+    assert sampling._sample is extended
+    rebuilt = kpi_sample(reloaded)
+    assert rebuilt["data_version"] == "v2"
+    assert sum(s["seen"] for s in rebuilt["strata"].values()) == 1_500
+
+
+def test_full_sample_estimates_labels_and_severity_exactly():
+    # With every row sampled each weight is 1, so the estimates are the exact tables
+    turns_df, topics_df = load_turns(), load_topics()
+    approx = estimate_overview_kpis(ingest(empty_sample(capacity=len(turns_df)), turns_df, 0), turns_df, topics_df)
+    assert approx["topic_label_index"] == build_topic_label_index(turns_df, topics_df)
+    exact = build_severity_index(turns_df)
+    assert approx["severity_index"]["failure_topics"] == exact["failure_topics"]
+    assert approx["severity_index"]["failure_turn_counts"] == exact["failure_turn_counts"]
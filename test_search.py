@@ -0,0 +1,54 @@
+import pandas as pd
+
+from logic.data_loader import append_turns
+from logic.search import build_search_index, search, sync_search_index
+
+
+def _turns(rows, version):
+    turns_df = pd.DataFrame(rows, columns=["conv_id", "turn_id", "text"])
+    turns_df["dataset"] = "CCPE"
+    turns_df["speaker"] = "USER"
+    turns_df.attrs["data_version"] = version
+    return turns_df
+
+
+STORE = [
+    (1, 1, "I need a table for 2 tonight"),
+    (1, 2, "Sure, for 2 at which table?"),
+    (2, 1, "Table for two please, a table for 2 by the window"),
+    (3, 1, "Nothing relevant here"),
+]
+
+
+def _conv_ids(found):
+    return sorted(r["conv_id"] for r in found["results"])
+
+
+def test_phrase_and_term_hits():
+    turns_df = _turns(STORE, "v1")
+    index = build_search_index(turns_df)
+
+    # Bare terms match in any order; the phrase needs consecutive tokens
+    assert _conv_ids(search(index, turns_df, "table 2")) == [1, 2]
+    found = search(index, turns_df, '"table for 2"')
+    assert _conv_ids(found) == [1, 2]
+    assert found["total_turns"] == 2
+    assert search(index, turns_df, '"for 2 table"')["results"] == []
+    assert _conv_ids(search(index, turns_df, 'window "table for 2"')) == [2]
+
+
+def test_sync_extends_appended_store_and_rebuilds_reloaded_one():
+    turns_df = _turns(STORE, "v1")
+    index = build_search_index(turns_df)
+
+    appended = append_turns(turns_df, _turns([(4, 1, "another table for 2")], "unused"))
+    synced = sync_search_index(index, appended)
+    assert synced is index and synced["n_rows"] == 5
+    assert _conv_ids(search(synced, appended, '"table for 2"')) == [1, 2, 4]
+
+    # A reload with different rows (and a new version) at the same length is not an append
+    reloaded = _turns([(9, 1, "windows"), (9, 2, "a"), (9, 3, "b"), (9, 4, "c"), (9, 5, "table for 2")], "v2")
+    rebuilt = sync_search_index(synced, reloaded)
+    assert rebuilt is not synced
+    assert _conv_ids(search(rebuilt, reloaded, '"table for 2"')) == [9]
+    assert search(rebuilt, reloaded, "window")["results"] == []
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from logic import aggregations
+from logic.artifacts import build_bundle
+from logic.data_loader import load_repair_index, load_topics, load_turns
+from logic.positives import build_positive_artifacts
+from logic.sharded import compute_severity_stats, get_top_success_topics_detailed, sharded_aggregate
+
+
+@pytest.fixture(scope="module")
+def turns_df():
+    return load_turns()
+
+
+@pytest.fixture(scope="module")
+def aggregate(turns_df):
+    # Several shards through the process pool, as `build --workers N` runs them
+    return sharded_aggregate(turns_df, n_workers=3)
+
+
+def test_conversation_summary_matches_serial(turns_df, aggregate):
+    pd.testing.assert_frame_equal(
+        aggregate["conversations"], aggregations.summarize_conversations(turns_df), check_exact=True,
+    )
+
+
+def test_positives_match_serial(turns_df, aggregate):
+    assert build_positive_artifacts(turns_df, aggregate) == build_positive_artifacts(turns_df)
+
+
+def test_topic_aggregates_match_serial(turns_df, aggregate):
+    topics_df = load_topics()
+    pd.testing.assert_frame_equal(
+        get_top_success_topics_detailed(aggregate, topics_df, top_n=50).reset_index(drop=True),
+        aggregations.get_top_success_topics_detailed(turns_df, topics_df, top_n=50).reset_index(drop=True),
+        check_dtype=False,
+    )
+    for topic_id in turns_df["topic_id"].unique().tolist():
+        expected = aggregations.compute_severity_stats(turns_df[turns_df["topic_id"] == topic_id])
+        assert compute_severity_stats(aggregate, topic_id) == expected
+
+
+def test_bundle_tables_match_serial(turns_df):
+    topics_df, repairs = load_topics(), load_repair_index()
+    serial = build_bundle(turns_df, topics_df, repairs)
+    sharded = build_bundle(turns_df, topics_df, repairs, workers=2)
+    pd.testing.assert_frame_equal(sharded["conversation_summary"], serial["conversation_summary"], check_exact=True)
+    assert sharded["positives"] == serial["positives"]
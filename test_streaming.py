@@ -0,0 +1,25 @@
+import pandas as pd
+
+from logic import aggregations
+from logic.data_loader import load_topics, load_turns
+from logic.streaming import stream_aggregate
+
+
+def test_stream_aggregate_matches_in_memory():
+    turns_df, topics_df = load_turns(), load_topics()
+    # Small chunks, so partials from many chunks are merged
+    summary = stream_aggregate(topics_df, "data/dashboard_turns.jsonl", chunksize=97, top_n=50)
+
+    overview = summary["overview"]
+    assert overview["total_turns"] == len(turns_df)
+    assert overview["total_convs"] == turns_df["conv_id"].nunique()
+    assert overview["low_sat_turns"] == int(turns_df["low_satisfaction"].sum())
+    assert abs(overview["mean_sat"] - turns_df["satisfaction_score"].mean()) < 1e-12
+
+    pd.testing.assert_frame_equal(
+        summary["top_success_topics"].reset_index(drop=True),
+        aggregations.get_top_success_topics_detailed(turns_df, topics_df, top_n=50).reset_index(drop=True),
+        check_dtype=False,
+    )
+    for topic_id, stats in summary["severity_by_topic"].items():
+        assert stats == aggregations.compute_severity_stats(turns_df[turns_df["topic_id"] == topic_id])
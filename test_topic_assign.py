@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from logic.data_loader import append_turns, base_version, load_turns
+from logic.topic_assign import MIN_SIMILARITY, build_topic_centroids, calibrate_min_similarity
+from ui.upload_lab_fixed import topic_model
+
+
+def test_min_similarity_is_calibrated_on_held_out_turns():
+    calibration = calibrate_min_similarity(load_turns())
+    assert calibration["min_similarity"] == MIN_SIMILARITY
+    # Most turns no failure topic fits stay unassigned
+    assert calibration["left_unassigned"] > 0.9
+
+
+def _upload(conv_id):
+    return pd.DataFrame({
+        "conv_id": [conv_id], "turn_id": [1], "speaker": ["USER"], "text": ["the movie had too many special effects"],
+        "issues": [[]], "topic_id": [1], "topic_label": ["Movies"],
+    })
+
+
+def test_topic_model_is_shared_across_uploads_to_a_store():
+    turns_df = load_turns()
+    first = append_turns(turns_df, _upload(-1))
+    second = append_turns(first, _upload(-2))
+    assert base_version(second) == (turns_df.attrs["data_version"], len(turns_df))
+
+    model = topic_model(second)
+    assert topic_model(first) is model
+    assert np.allclose(model["centroids"], build_topic_centroids(turns_df)["centroids"])
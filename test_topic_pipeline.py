@@ -0,0 +1,62 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from logic import topic_pipeline
+
+
+def _accented(line):
+    turn = json.loads(line)
+    turn["text"] = f"café naïve — {turn['text']}"
+    return json.dumps(turn, ensure_ascii=False) + "\n"
+
+
+def test_incremental_refresh_with_non_ascii_text(tmp_path):
+    with open("data/dashboard_turns.jsonl", "r", encoding="utf-8") as f:
+        lines = [_accented(line) for line in f if line.strip()]
+    half = len(lines) // 2
+    turns = tmp_path / "turns.jsonl"
+    paths = {
+        "turns_path": str(turns),
+        "topics_path": str(tmp_path / "topics.json"),
+        "checkpoint_path": str(tmp_path / "checkpoint.npz"),
+        "workers": 1,
+        "write_turns": True,
+    }
+    turns.write_text("".join(lines[:half]), encoding="utf-8")
+    topic_pipeline.run(**paths)
+    prefix = turns.read_bytes()
+
+    with open(turns, "a", encoding="utf-8") as f:
+        f.write("".join(lines[half:]))
+    topic_pipeline.run(incremental=True, **paths)
+
+    # Bytes before the checkpoint are copied unchanged; of the appended turns only
+    # the clusterable ones are rewritten, with a topic
+    data = turns.read_bytes()
+    assert data.startswith(prefix)
+    appended = data[len(prefix):].decode("utf-8").splitlines(keepends=True)
+    assert len(appended) == len(lines) - half
+    for line, original in zip(appended, lines[half:]):
+        turn = json.loads(original)
+        if turn["speaker"] == "USER" and turn["low_satisfaction"] is True:
+            assert json.loads(line)["text"] == turn["text"]
+            assert json.loads(line)["topic_id"] >= 0
+        else:
+            assert line == original
+
+
+def test_chunks_are_read_only_as_results_are_consumed():
+    read = []
+
+    def chunks():
+        for i in range(50):
+            read.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = topic_pipeline._bounded_map(pool, lambda i: i * i, chunks(), workers=2)
+        window = topic_pipeline.CHUNKS_IN_FLIGHT * 2
+        for n, result in enumerate(results):
+            assert result == n * n
+            assert len(read) <= n + window
+    assert len(read) == 50
@@ -1,7 +1,30 @@
 import streamlit as st
+from logic.turn_index import read_conversation
 
 PAGE_SIZE = 1
 
+
+def get_conversation(turns_df, conv_id):
+    """
+    All turns of one conversation, sorted by turn_id. Read directly from the
+    indexed turn log when it has the conversation; uploaded conversations only
+    exist in memory and are filtered from turns_df.
+    """
+    conv = read_conversation(conv_id)
+    if conv is None:
+        conv = turns_df[turns_df["conv_id"] == conv_id].sort_values("turn_id")
+    return conv
+
+
+def render_transcript(conv):
+    """Render a conversation's turns (already sorted by turn_id)."""
+    for _, row in conv.iterrows():
+        if row["speaker"] == "USER":
+            st.markdown(f"🧑 **User:** {row['text']}")
+        else:
+            st.markdown(f"🤖 **Assistant:** {row['text']}")
+
+
 def render_conversations(turns_df, topic_id):
     # Find conv_ids that have at least one turn with the given topic_id
     relevant_conv_ids = turns_df[turns_df["topic_id"] == topic_id]["conv_id"].unique()
@@ -14,7 +37,7 @@ def render_conversations(turns_df, topic_id):
 
     for conv_id in relevant_conv_ids[start:end]:
         # Get all turns for this conv_id, regardless of topic_id
-        conv = turns_df[turns_df["conv_id"] == conv_id].sort_values("turn_id")
+        conv = get_conversation(turns_df, conv_id)
 
         # Pull failure details for this specific topic within the conversation
         failed = conv[(conv["low_satisfaction"] == True) & (conv["topic_id"] == topic_id)]
@@ -43,11 +66,7 @@ def render_conversations(turns_df, topic_id):
                 )
 
             # Conversation turns
-            for _, row in conv.iterrows():
-                if row["speaker"] == "USER":
-                    st.markdown(f"🧑 **User:** {row['text']}")
-                else:
-                    st.markdown(f"🤖 **Assistant:** {row['text']}")
+            render_transcript(conv)
 
     if end < len(relevant_conv_ids):
         st.markdown('<div class="topic-page-buttons">', unsafe_allow_html=True)
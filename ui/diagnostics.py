@@ -1,7 +1,8 @@
 import streamlit as st
 from logic.aggregations import rank_topics
 from logic.aggregations import compute_severity_stats
-from logic.aggregations import infer_conversation_theme
+from logic.aggregations import build_topic_label_index
+from logic.artifacts import bundle_table
 from ui.conversations import render_conversations
 from ui.repairs import render_repair
 
@@ -54,7 +55,7 @@ from ui.repairs import render_repair
 import streamlit as st
 from ui.topic_page import render_topic_page
 
-def render_diagnostics(turns_df, topics_df, repairs_df):
+def render_diagnostics(turns_df, topics_df, repairs):
     if "selected_topic" not in st.session_state:
         st.session_state.selected_topic = None
 
@@ -203,25 +204,12 @@ def render_diagnostics(turns_df, topics_df, repairs_df):
         </style>
         """, unsafe_allow_html=True)
 
-        used_failure_labels = set()
+        # Human-friendly themes inferred from each topic's conversations, made distinct
+        # from success titles and from each other (shared with the Overview page)
+        label_index = bundle_table(turns_df, "topic_label_index") or build_topic_label_index(turns_df, topics_df)
 
         for idx, (_, row) in enumerate(topics_df.iterrows(), 1):
-            # Infer a human-friendly theme from the topic's conversations
-            topic_turns = turns_df[turns_df["topic_id"] == row["topic_id"]]
-            theme_label = row["topic_label"]
-            if not topic_turns.empty:
-                inferred = infer_conversation_theme(topic_turns)
-                if inferred:
-                    theme_label = inferred
-
-            # Ensure failure titles are distinct from success titles and from each other
-            base_label = f"Failure - {theme_label}"
-            unique_label = base_label
-            suffix = 1
-            while unique_label in used_failure_labels:
-                suffix += 1
-                unique_label = f"{base_label} #{suffix}"
-            used_failure_labels.add(unique_label)
+            unique_label = label_index["labels"][row["topic_id"]]
             
             # Create columns for card and arrow button
             col1, col2 = st.columns([0.95, 0.05])
@@ -290,7 +278,7 @@ def render_diagnostics(turns_df, topics_df, repairs_df):
             render_topic_page(
                 turns_df,
                 topics_df,
-                repairs_df,
+                repairs,
                 st.session_state.selected_topic
             )
 
@@ -0,0 +1,81 @@
+import math
+
+import streamlit as st
+from logic.datasets import dataset_store
+
+FILTER_KEYS = ("datasets", "severity", "speaker", "satisfaction_source", "topics", "satisfaction_range")
+
+
+def _persisted(key):
+    """
+    Widget key for filter `key`. Streamlit drops a widget's state on pages that
+    don't render it, so the value is kept under `filter_<key>` and restored here.
+    """
+    widget_key = f"filter_bar_{key}"
+    if widget_key not in st.session_state and f"filter_{key}" in st.session_state:
+        st.session_state[widget_key] = st.session_state[f"filter_{key}"]
+    return widget_key
+
+
+def _store(key, value):
+    st.session_state[f"filter_{key}"] = value
+    return value
+
+
+def _options(turns_df, column):
+    values = turns_df[column]
+    if hasattr(values, "cat"):
+        return list(values.cat.categories)
+    return sorted(values.dropna().unique().tolist())
+
+
+def render_filter_bar(turns_df, topics_df) -> dict:
+    """Global filters shared by the analysis pages; returns {filter key: value} (see logic.selection)."""
+    filters = {}
+    active = sum(bool(st.session_state.get(f"filter_{key}")) for key in FILTER_KEYS)
+    with st.expander(f"Filters ({active} active)" if active else "Filters", expanded=False):
+        col_datasets, col_severity, col_speaker, col_source = st.columns(4)
+        with col_datasets:
+            filters["datasets"] = _store("datasets", st.multiselect(
+                "Datasets", sorted(dataset_store(turns_df)["positions"]),
+                key=_persisted("datasets"), placeholder="All datasets",
+            ))
+        with col_severity:
+            filters["severity"] = _store("severity", st.multiselect(
+                "Severity", _options(turns_df, "severity"), key=_persisted("severity"), placeholder="Any",
+            ))
+        with col_speaker:
+            filters["speaker"] = _store("speaker", st.multiselect(
+                "Speaker", _options(turns_df, "speaker"), key=_persisted("speaker"), placeholder="Any",
+            ))
+        with col_source:
+            filters["satisfaction_source"] = _store("satisfaction_source", st.multiselect(
+                "Satisfaction source", _options(turns_df, "satisfaction_source"),
+                key=_persisted("satisfaction_source"), placeholder="Any",
+            ))
+
+        col_topics, col_range = st.columns([3, 1])
+        with col_topics:
+            topic_labels = dict(zip(topics_df["topic_id"], topics_df["topic_label"])) if not topics_df.empty else {}
+            filters["topics"] = _store("topics", st.multiselect(
+                "Topics", _options(turns_df, "topic_id"), key=_persisted("topics"), placeholder="All topics",
+                format_func=lambda topic_id: topic_labels.get(topic_id, "Unclustered" if topic_id == -1 else f"Topic {topic_id}"),
+            ))
+        with col_range:
+            scores = turns_df["satisfaction_score"]
+            low, high = scores.min(), scores.max()
+            filters["satisfaction_range"] = None
+            if not (math.isnan(low) or low == high):
+                low, high = math.floor(low * 4) / 4, math.ceil(high * 4) / 4
+                widget_key = _persisted("satisfaction_range")
+                # Keep a restored range inside the current bounds (uploads can move them)
+                lo, hi = st.session_state.get(widget_key) or (low, high)
+                st.session_state[widget_key] = (float(min(max(lo, low), high)), float(max(min(hi, high), low)))
+                score_range = st.slider(
+                    "Satisfaction", min_value=float(low), max_value=float(high), step=0.25, key=widget_key,
+                )
+                # The full range selects everything, including unscored turns
+                full = score_range == (low, high)
+                filters["satisfaction_range"] = None if full else score_range
+                _store("satisfaction_range", None if full else score_range)
+    return filters
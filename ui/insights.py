@@ -1,13 +1,11 @@
 import streamlit as st
 import pandas as pd
-from logic.aggregations import (
-    get_top_success_topics_detailed,
-    get_successful_conversations,
-    get_success_insights_for_topic,
-    get_top_conversations,
-    get_top_performing_topics_from_conversations,
-    get_why_it_works_patterns
-)
+from logic.aggregations import rank_conversations
+from logic.artifacts import bundle_table
+from logic.backends import get_aggregation_backend
+from logic.dedup import sync_dedup_index, top_distinct_conversations
+from logic.positives import fresh_positive_artifacts
+from ui.conversations import get_conversation
 
 
 def render_positive_insights(turns_df, topics_df):
@@ -88,9 +86,45 @@ def render_positive_insights(turns_df, topics_df):
 
     # Page header
     st.markdown('<h1 class="page-header">✅ What Works Well</h1>', unsafe_allow_html=True)
+
+    agg = get_aggregation_backend()
     
-    # Step 1: Get top conversations (capped at 50 for performance)
-    top_conversations = get_top_conversations(turns_df, limit=50)
+    # Precomputed artifacts serve the page when they match this turn log
+    # (artifact bundle first, then the dashboard_positive_*.json files; see logic/positives.py)
+    artifacts = bundle_table(turns_df, "positives") or fresh_positive_artifacts(turns_df)
+
+    # Step 1: Get top conversations (capped at 50 for performance).
+    # The ranking is kept in session state; uploads fold new conversations into it
+    # (see upload_lab_fixed._add_conversation_to_data) instead of re-ranking everything.
+    if artifacts is not None:
+        top_conversations = artifacts["top_conversations"]
+    else:
+        # A precomputed conversation summary (hot reload, dataset slices) only needs ranking
+        conversation_summary = bundle_table(turns_df, "conversation_summary")
+
+        def rank(limit):
+            if conversation_summary is not None:
+                return rank_conversations(conversation_summary, limit=limit)
+            return agg.get_top_conversations(turns_df, limit=limit)
+
+        if st.session_state.get("top_conversations_version") == turns_df.attrs.get("data_version"):
+            ranked = st.session_state.top_conversations
+        else:
+            ranked = rank(50)
+            st.session_state.top_conversations = ranked
+            st.session_state.top_conversations_version = turns_df.attrs.get("data_version")
+
+        # Near-duplicate conversations (e.g. templated dialogues) collapse to their best-ranked member,
+        # ranking past the cached top 50 when collapsed duplicates leave room.
+        # The index covers the whole turn store (append-only), also when a dataset slice is shown
+        store_df = st.session_state.get("turns_df", turns_df)
+        st.session_state.dedup_index = sync_dedup_index(st.session_state.get("dedup_index"), store_df)
+        top_conversations = top_distinct_conversations(
+            # A cached ranking shorter than 50 already holds every ranked conversation
+            lambda n: ranked[:n] if n <= len(ranked) or len(ranked) < 50 else rank(n),
+            st.session_state.dedup_index,
+            limit=50,
+        )
     
     if not top_conversations:
         st.info("📊 No successful conversations found. Add more data to see patterns.")
@@ -99,7 +133,10 @@ def render_positive_insights(turns_df, topics_df):
     st.markdown("### 📊 Top Performing Topics")
     
     # Step 2: Build top performing topics table
-    top_topics = get_top_performing_topics_from_conversations(top_conversations, limit=5)
+    if artifacts is not None:
+        top_topics = pd.DataFrame(artifacts["top_topics"])
+    else:
+        top_topics = agg.get_top_performing_topics_from_conversations(top_conversations, limit=5)
 
     # Build a curated set of positive labels so "What Works Well" does not repeat failure topic names
     failure_labels = set(topics_df["topic_label"].tolist()) if not topics_df.empty else set()
@@ -183,7 +220,10 @@ def render_positive_insights(turns_df, topics_df):
     st.markdown("### 💡 Why These Interactions Work Well")
     st.markdown("*Patterns extracted from analysis of successful conversations:*")
     
-    patterns_data = get_why_it_works_patterns(top_conversations, turns_df)
+    if artifacts is not None:
+        patterns_data = artifacts["patterns"]
+    else:
+        patterns_data = agg.get_why_it_works_patterns(top_conversations, turns_df)
     
     if patterns_data["patterns"]:
         for pattern in patterns_data["patterns"]:
@@ -224,6 +264,8 @@ def render_positive_insights(turns_df, topics_df):
         conv_id_key = int(conv['conv_id'])
         # For sample conversation cards, allow the same curated label without suffixes
         success_display_label = make_positive_label_no_suffix(conv["topic_label"])
+        n_similar = conv.get("n_near_duplicates", 0)
+        similar_note = f" · {n_similar} near-duplicate conversation{'s' if n_similar != 1 else ''} hidden" if n_similar else ""
         
         # Create columns for card and button
         col1, col2 = st.columns([0.95, 0.05])
@@ -242,7 +284,7 @@ def render_positive_insights(turns_df, topics_df):
                     <div style="font-weight:800; font-size:1.12rem; color:#1e40af;">Example {i}: Conversation #{conv_id_key}</div>
                     <div style="font-size:0.98rem; color:#3b82f6; font-weight:700;">{one_line_reason}</div>
                 </div>
-                <div style="margin:0.6rem 0 0.6rem 0; color:#64748b; font-size:1.0rem; font-weight:600;">Topic: {success_display_label}</div>
+                <div style="margin:0.6rem 0 0.6rem 0; color:#64748b; font-size:1.0rem; font-weight:600;">Topic: {success_display_label}{similar_note}</div>
                 <div style="display:grid; grid-template-columns: repeat(3, minmax(0,1fr)); gap:0.75rem;">
                     <div style="background:#ffffff; border:1px solid #e2e8f0; border-radius:10px; padding:10px 12px; text-align:center;">
                         <div style="font-size:1.6rem; font-weight:800; color:#0f172a;">{conv['mean_satisfaction']:.2f}</div>
@@ -270,7 +312,7 @@ def render_positive_insights(turns_df, topics_df):
         # Show conversation if expanded
         if st.session_state.expanded_conversations.get(conv_id_key, False):
             # Get all turns for this conversation
-            conv_turns = turns_df[turns_df["conv_id"] == conv_id_key].sort_values("turn_id")
+            conv_turns = get_conversation(turns_df, conv_id_key)
             
             if not conv_turns.empty:
                 with st.container(border=True):
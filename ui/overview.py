@@ -2,19 +2,65 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 from datetime import datetime, timedelta
-from logic.aggregations import infer_conversation_theme
+from logic.aggregations import build_issue_index, build_severity_index, build_topic_label_index
+from logic.artifacts import bundle_table, derived_table
+from logic.metrics_store import append_metrics, count_metrics, latest_metrics, query_metrics
+from logic.sampling import APPROX_MIN_TURNS, estimate_overview_kpis, kpi_sample, refine_exact_kpis
+from logic.streaming import finalize_overview_kpis, rollup_kpi_cube
+
+
+@st.fragment(run_every=1)
+def _await_exact_kpis(job):
+    """Rerun the page once the background exact computation has finished."""
+    if job.done():
+        st.rerun()
+    st.caption("⏳ Refining to exact numbers in the background…")
+
+
+def _ci_note(half_width, fmt):
+    return f"± {fmt.format(half_width)} (95% CI)" if pd.notna(half_width) else ""
+
+
+def _history_value(value, fmt, scale=1):
+    # Metrics stored as NULL (e.g. the mean of an empty selection) show as a dash
+    return fmt.format(value * scale) if value is not None else "—"
+
 
 def render_overview(turns_df, topics_df):
-    # Initialize metrics history in session state
-    if "metrics_history" not in st.session_state:
-        st.session_state.metrics_history = []
-    
-    # Calculate current metrics
-    mean_sat = turns_df["satisfaction_score"].mean()
-    low_sat_rate = turns_df["low_satisfaction"].mean()
+    # Calculate current metrics (from the artifact bundle's KPI cube when it matches this turn log)
     n_topics = len(topics_df)
-    low_sat_turns = (turns_df["low_satisfaction"] == True).sum()
-    avg_severity_low_sat = turns_df[turns_df["low_satisfaction"] == True]["satisfaction_score"].mean()
+    kpi_cube = bundle_table(turns_df, "kpi_cube")
+
+    # Very large unfiltered stores start from a stratified sample (logic/sampling.py)
+    # while the exact cube is computed in the background
+    approx = None
+    is_filtered = bool(turns_df.attrs.get("datasets") or turns_df.attrs.get("filters"))
+    if kpi_cube is None and len(turns_df) >= APPROX_MIN_TURNS and not is_filtered:
+        exact_job = refine_exact_kpis(turns_df, topics_df)
+        if not exact_job.done():
+            approx = estimate_overview_kpis(kpi_sample(turns_df), turns_df, topics_df)
+        else:
+            kpi_cube = bundle_table(turns_df, "kpi_cube")
+
+    if approx is not None:
+        mean_sat = approx["mean_sat"]
+        low_sat_rate = approx["low_sat_rate"]
+        low_sat_turns = approx["low_sat_turns"]
+        avg_severity_low_sat = approx["avg_severity"]
+        total_convs = approx["total_convs"]
+    elif kpi_cube is not None:
+        kpis = finalize_overview_kpis(rollup_kpi_cube(kpi_cube), n_topics=n_topics)
+        mean_sat = kpis["mean_sat"]
+        low_sat_rate = kpis["low_sat_rate"]
+        low_sat_turns = kpis["low_sat_turns"]
+        avg_severity_low_sat = kpis["avg_severity"]
+        total_convs = kpis["total_convs"]
+    else:
+        mean_sat = turns_df["satisfaction_score"].mean()
+        low_sat_rate = turns_df["low_satisfaction"].mean()
+        low_sat_turns = (turns_df["low_satisfaction"] == True).sum()
+        avg_severity_low_sat = turns_df[turns_df["low_satisfaction"] == True]["satisfaction_score"].mean()
+        total_convs = turns_df["conv_id"].nunique()
     
     current_metrics = {
         "mean_sat": mean_sat,
@@ -23,19 +69,22 @@ def render_overview(turns_df, topics_df):
         "low_sat_turns": low_sat_turns,
         "avg_severity": avg_severity_low_sat,
         "total_turns": len(turns_df),
-        "total_convs": turns_df["conv_id"].nunique(),
+        "total_convs": total_convs,
         "timestamp": datetime.now()
     }
     
-    # Check if metrics changed (data updated)
-    if not st.session_state.metrics_history or st.session_state.metrics_history[-1]["total_turns"] != current_metrics["total_turns"]:
-        st.session_state.metrics_history.append(current_metrics)
-        # Keep only last 10 snapshots
-        if len(st.session_state.metrics_history) > 10:
-            st.session_state.metrics_history = st.session_state.metrics_history[-10:]
+    # Persist a snapshot only when the data changed since the last recorded one.
+    # The history tracks the whole turn store: a filtered selection is neither
+    # recorded nor compared against it, and estimates are neither recorded nor
+    # compared against exact snapshots
+    last_snapshots = latest_metrics(n=1)
+    if not is_filtered and approx is None and (not last_snapshots or last_snapshots[-1]["total_turns"] != current_metrics["total_turns"]):
+        append_metrics(current_metrics)
+    n_snapshots = count_metrics()
     
     # Calculate deltas if we have previous data
-    prev_metrics = st.session_state.metrics_history[-2] if len(st.session_state.metrics_history) > 1 else None
+    recent_snapshots = latest_metrics(n=2)
+    prev_metrics = recent_snapshots[0] if len(recent_snapshots) > 1 and not is_filtered and approx is None else None
     
     st.markdown(
         """
@@ -86,7 +135,7 @@ def render_overview(turns_df, topics_df):
     with st.container():
         col_compare, col_spacer, col_history = st.columns([1.2, 0.3, 1])
         with col_compare:
-            if len(st.session_state.metrics_history) > 1:
+            if n_snapshots > 1:
                 st.markdown("**Show Changes**")
                 show_comparison = st.toggle("", value=True, help="Compare with previous snapshot", label_visibility="collapsed")
             else:
@@ -99,7 +148,7 @@ def render_overview(turns_df, topics_df):
                 )
         
         with col_history:
-            if len(st.session_state.metrics_history) > 1:
+            if n_snapshots > 1:
                 st.markdown("**📅 Time Period**")
                 history_view = st.selectbox(
                     "View Period",
@@ -111,6 +160,11 @@ def render_overview(turns_df, topics_df):
                 history_view = "Past Day"
     
     st.markdown('<h2 class="page-subheader">📌 Key Metrics</h2>', unsafe_allow_html=True)
+    if approx is not None:
+        st.caption(
+            f"Estimated from a stratified sample of {approx['sample_size']:,} of {len(turns_df):,} turns."
+        )
+        _await_exact_kpis(exact_job)
 
     st.markdown(
         """
@@ -248,38 +302,24 @@ hr {
         unsafe_allow_html=True,
     )
 
-    # Build labels that mirror the Diagnostics page (inferred themes + unique prefixes)
-    diagnostics_labels = {}
-    diagnostics_ranks = {}  # Store rank for each topic
-    used_labels = set()
-    for rank, (_, topic_row) in enumerate(topics_df.sort_values("n_examples", ascending=False).iterrows(), 1):
-        topic_turns = turns_df[turns_df["topic_id"] == topic_row["topic_id"]]
-        theme_label = topic_row["topic_label"]
-        if not topic_turns.empty:
-            inferred = infer_conversation_theme(topic_turns)
-            if inferred:
-                theme_label = inferred
-
-        base_label = f"Failure - {theme_label}"
-        unique_label = base_label
-        suffix = 1
-        while unique_label in used_labels:
-            suffix += 1
-            unique_label = f"{base_label} #{suffix}"
-
-        used_labels.add(unique_label)
-        diagnostics_labels[topic_row["topic_id"]] = unique_label
-        diagnostics_ranks[topic_row["topic_id"]] = rank
+    # Labels that mirror the Diagnostics page (inferred themes + unique prefixes)
+    if approx is not None:
+        label_index = approx["topic_label_index"]
+    else:
+        label_index = bundle_table(turns_df, "topic_label_index") or build_topic_label_index(turns_df, topics_df)
+    diagnostics_labels = label_index["labels"]
+    diagnostics_ranks = label_index["ranks"]  # Rank for each topic
 
     avg_severity_display = f"{avg_severity_low_sat:.2f}" if pd.notna(avg_severity_low_sat) else "N/A"
     
     # Calculate deltas for display
     if show_comparison and prev_metrics:
-        delta_low_sat_rate = ((low_sat_rate - prev_metrics["low_sat_rate"]) * 100)
-        delta_low_sat_turns = low_sat_turns - prev_metrics["low_sat_turns"]
-        delta_mean_sat = mean_sat - prev_metrics["mean_sat"]
+        # Snapshot metrics stored as NULL come back as None: no delta against them
+        delta_low_sat_rate = ((low_sat_rate - prev_metrics["low_sat_rate"]) * 100) if pd.notna(low_sat_rate) and pd.notna(prev_metrics["low_sat_rate"]) else 0
+        delta_low_sat_turns = low_sat_turns - prev_metrics["low_sat_turns"] if pd.notna(prev_metrics["low_sat_turns"]) else 0
+        delta_mean_sat = mean_sat - prev_metrics["mean_sat"] if pd.notna(mean_sat) and pd.notna(prev_metrics["mean_sat"]) else 0
         delta_severity = avg_severity_low_sat - prev_metrics["avg_severity"] if pd.notna(avg_severity_low_sat) and pd.notna(prev_metrics["avg_severity"]) else 0
-        delta_topics = n_topics - prev_metrics["n_topics"]
+        delta_topics = n_topics - prev_metrics["n_topics"] if pd.notna(prev_metrics["n_topics"]) else 0
         
         # Format deltas with arrows - Green for good, Red for bad
         def format_delta(value, is_percentage=False, inverse=False):
@@ -315,28 +355,36 @@ hr {
         delta_html_severity = ""
         delta_html_topics = ""
 
+    if approx is not None:
+        ci_low_sat_rate = _ci_note(approx["ci"]["low_sat_rate"] * 100, "{:.2f}pp")
+        ci_low_sat_turns = _ci_note(approx["ci"]["low_sat_turns"], "{:,.0f}")
+        ci_mean_sat = _ci_note(approx["ci"]["mean_sat"], "{:.3f}")
+        ci_severity = _ci_note(approx["ci"]["avg_severity"], "{:.3f}")
+    else:
+        ci_low_sat_rate = ci_low_sat_turns = ci_mean_sat = ci_severity = ""
+
     st.markdown(
         f"""
 <div class="kpi-grid">
     <div class="kpi-card card-amber">
         <div class="kpi-head"><span class="dot dot-amber"></span>Low Satisfaction Rate (&lt;3)</div>
         <div class="kpi-value">{low_sat_rate*100:.1f}% {delta_html_low_sat_rate}</div>
-        <div class="kpi-sub">share of all turns</div>
+        <div class="kpi-sub">share of all turns {ci_low_sat_rate}</div>
     </div>
     <div class="kpi-card card-red">
         <div class="kpi-head"><span class="dot dot-red"></span>Failure Volume (low-sat turns)</div>
         <div class="kpi-value">{low_sat_turns} {delta_html_low_sat_turns}</div>
-        <div class="kpi-sub">total low-satisfaction turns</div>
+        <div class="kpi-sub">total low-satisfaction turns {ci_low_sat_turns}</div>
     </div>
     <div class="kpi-card card-green">
         <div class="kpi-head"><span class="dot dot-green"></span>Satisfaction Mean (CSAT proxy)</div>
         <div class="kpi-value">{mean_sat:.2f} {delta_html_mean_sat}</div>
-        <div class="kpi-sub">average satisfaction</div>
+        <div class="kpi-sub">average satisfaction {ci_mean_sat}</div>
     </div>
     <div class="kpi-card card-green">
         <div class="kpi-head"><span class="dot dot-green"></span>Avg Severity (low-sat only)</div>
         <div class="kpi-value">{avg_severity_display} {delta_html_severity}</div>
-        <div class="kpi-sub">out of 5</div>
+        <div class="kpi-sub">out of 5 {ci_severity}</div>
     </div>
     <div class="kpi-card card-red">
         <div class="kpi-head"><span class="dot dot-amber"></span>Failure Topics</div>
@@ -359,22 +407,22 @@ hr {
         with st.container(border=True):
             st.markdown("**� Failure Root Causes Breakdown**")
             
-            # Get all failure turns and extract issues
-            failure_turns = turns_df[turns_df["low_satisfaction"] == True].copy()
-            
-            # Explode the issues list to count individual issue types
-            issue_counts = {}
-            for issues_list in failure_turns["issues"]:
-                if isinstance(issues_list, list):
-                    for issue in issues_list:
-                        if issue:  # Skip empty strings
-                            issue_counts[issue] = issue_counts.get(issue, 0) + 1
+            # Issue counts over failure turns, and the topics each issue appears in
+            if approx is not None:
+                issue_index = approx["issue_index"]
+            else:
+                issue_index = bundle_table(turns_df, "issue_index") or build_issue_index(turns_df)
+            issue_counts = issue_index["counts"]
             
             if issue_counts:
                 issue_df = pd.DataFrame([
                     {"Issue Type": issue, "Count": count}
-                    for issue, count in sorted(issue_counts.items(), key=lambda x: x[1], reverse=True)
+                    for issue, count in issue_counts.items()
                 ])
+                issue_tooltip = ["Issue Type", "Count"]
+                if approx is not None:
+                    issue_df["± 95% CI"] = [round(approx["ci"]["issue_counts"][issue]) for issue in issue_df["Issue Type"]]
+                    issue_tooltip.append("± 95% CI")
                 
                 # Create selection for interactivity
                 issue_click = alt.selection_point(fields=['Issue Type'], name='issue_select')
@@ -383,7 +431,7 @@ hr {
                     x=alt.X("Count:Q", title="Number of Occurrences"),
                     y=alt.Y("Issue Type:N", title="", sort="-x"),
                     opacity=alt.condition(issue_click, alt.value(1), alt.value(0.5)),
-                    tooltip=["Issue Type", "Count"]
+                    tooltip=issue_tooltip
                 ).add_params(issue_click).properties(height=300)
                 
                 issue_chart_selection = st.altair_chart(chart, use_container_width=True, on_select="rerun", key="issue_chart")
@@ -394,19 +442,10 @@ hr {
                     if selected_points:
                         selected_issue = selected_points[0]["Issue Type"]
                         
-                        # Find topics with this issue type
-                        topics_with_issue = []
-                        for _, turn in failure_turns.iterrows():
-                            if isinstance(turn["issues"], list) and selected_issue in turn["issues"]:
-                                if turn["topic_id"] != -1:
-                                    topics_with_issue.append(turn["topic_id"])
+                        # Topics with this issue type, most occurrences first
+                        top_topics = issue_index["topics"].get(selected_issue, [])
                         
-                        if topics_with_issue:
-                            # Count occurrences
-                            from collections import Counter
-                            topic_counts = Counter(topics_with_issue)
-                            top_topics = topic_counts.most_common(5)
-                            
+                        if top_topics:
                             st.markdown(f"**Topics with {selected_issue}:**")
                             for topic_id, count in top_topics:
                                 # Use diagnostics label mapping
@@ -428,8 +467,8 @@ hr {
             success_dist = pd.DataFrame({
                 "Status": ["Successful", "Failed"],
                 "Count": [
-                    (turns_df["low_satisfaction"] == False).sum(),
-                    (turns_df["low_satisfaction"] == True).sum()
+                    len(turns_df) - low_sat_turns,
+                    low_sat_turns
                 ]
             })
             
@@ -514,16 +553,15 @@ hr {
         with st.container(border=True):
             st.markdown("**⚠️ Failure Severity Distribution**")
             
-            # Get severity distribution for failed turns
-            failure_turns = turns_df[turns_df["low_satisfaction"] == True].copy()
+            # Severity stats of failed turns per topic
+            if approx is not None:
+                severity_index = approx["severity_index"]
+            else:
+                severity_index = derived_table(turns_df, "severity_index", build_severity_index)
 
             # Compute counts by dominant severity per topic to align with topic pages
-            from logic.aggregations import compute_severity_stats, get_topic_turns
-            topic_ids = failure_turns["topic_id"].dropna().unique().tolist()
             dominant_counts = {"HIGH": 0, "MEDIUM": 0, "LOW": 0, "NONE": 0}
-            for tid in topic_ids:
-                topic_df = get_topic_turns(failure_turns, tid)
-                stats = compute_severity_stats(topic_df)
+            for stats in severity_index["failure_topics"].values():
                 dom = stats.get("dominant_severity")
                 if dom in dominant_counts:
                     dominant_counts[dom] += 1
@@ -608,17 +646,11 @@ hr {
                         selected_severity = selected_points[0]["Severity"]
                         
                         # Find topics where DOMINANT severity matches selected severity
-                        from logic.aggregations import compute_severity_stats, get_topic_turns
-                        
-                        matching_topics = []
-                        for topic_id in failure_turns["topic_id"].unique():
-                            topic_turns = get_topic_turns(failure_turns, topic_id)
-                            severity_stats = compute_severity_stats(topic_turns)
-                            
-                            # Only include topics where dominant severity matches selection
-                            if severity_stats["dominant_severity"] == selected_severity:
-                                turn_count = len(topic_turns)
-                                matching_topics.append((topic_id, turn_count))
+                        matching_topics = [
+                            (topic_id, severity_index["failure_turn_counts"][topic_id])
+                            for topic_id, severity_stats in severity_index["failure_topics"].items()
+                            if severity_stats["dominant_severity"] == selected_severity
+                        ]
                         
                         if matching_topics:
                             # Sort by turn count descending
@@ -684,7 +716,7 @@ hr {
     # History tracking section
     st.markdown('<h2 class="page-subheader">📈 Metrics History</h2>', unsafe_allow_html=True)
 
-    if len(st.session_state.metrics_history) > 1:
+    if n_snapshots > 1:
         # Determine which snapshots to display based on view period
         now = datetime.now()
         if history_view == "Past Day":
@@ -694,21 +726,21 @@ hr {
         elif history_view == "Past Month":
             cutoff = now - timedelta(days=30)
         else:  # All History
-            cutoff = datetime.min
+            cutoff = None
         
-        display_history = [s for s in st.session_state.metrics_history if s["timestamp"] >= cutoff]
+        # The store picks a raw/minute/hour/day rollup so long ranges stay small
+        display_history = query_metrics(start=cutoff.timestamp() if cutoff else None, end=now.timestamp())
         
         # Create history visualization
         history_data = []
-        for idx, snapshot in enumerate(display_history):
-            abs_idx = len(st.session_state.metrics_history) - len(display_history) + idx
+        for snapshot in display_history:
             history_data.append({
-                "Snapshot": f"#{abs_idx + 1}",
-                "Total Turns": snapshot["total_turns"],
-                "Conversations": snapshot["total_convs"],
-                "Satisfaction Mean": f"{snapshot['mean_sat']:.2f}",
-                "Low Sat Rate (%)": f"{snapshot['low_sat_rate'] * 100:.1f}",
-                "Low Sat Turns": snapshot["low_sat_turns"]
+                "Snapshot": snapshot["timestamp"].strftime("%Y-%m-%d %H:%M"),
+                "Total Turns": _history_value(snapshot["total_turns"], "{:.0f}"),
+                "Conversations": _history_value(snapshot["total_convs"], "{:.0f}"),
+                "Satisfaction Mean": _history_value(snapshot["mean_sat"], "{:.2f}"),
+                "Low Sat Rate (%)": _history_value(snapshot["low_sat_rate"], "{:.1f}", scale=100),
+                "Low Sat Turns": _history_value(snapshot["low_sat_turns"], "{:.0f}")
             })
         
         history_df = pd.DataFrame(history_data)
@@ -722,14 +754,11 @@ hr {
         with col2:
             st.markdown("**Satisfaction Trend**")
             # Prepare trend data with numeric values
-            trend_data = []
-            for idx, snapshot in enumerate(display_history):
-                abs_idx = len(st.session_state.metrics_history) - len(display_history) + idx
-                trend_data.append({
-                    "Snapshot": f"#{abs_idx + 1}",
-                    "Satisfaction Mean": snapshot["mean_sat"]
-                })
-            trend_df = pd.DataFrame(trend_data)
+            trend_df = pd.DataFrame([
+                {"Timestamp": snapshot["timestamp"], "Satisfaction Mean": snapshot["mean_sat"]}
+                for snapshot in display_history
+                if snapshot["mean_sat"] is not None
+            ])
             
             # Create trend chart
             if len(trend_df) > 0:
@@ -745,9 +774,8 @@ hr {
                     .mark_line(point=True, color="#3b82f6", size=2)
                     .encode(
                         x=alt.X(
-                            "Snapshot:N",
+                            "Timestamp:T",
                             title="Timeline",
-                            sort=list(range(len(trend_df))),
                             axis=alt.Axis(labelPadding=6),
                         ),
                         y=alt.Y(
@@ -756,7 +784,7 @@ hr {
                             scale=alt.Scale(domain=[y_min, y_max]),
                             axis=alt.Axis(format=".2f", tickCount=6, labelPadding=6),
                         ),
-                        tooltip=["Snapshot", alt.Tooltip("Satisfaction Mean:Q", format=".2f")],
+                        tooltip=[alt.Tooltip("Timestamp:T"), alt.Tooltip("Satisfaction Mean:Q", format=".2f")],
                     )
                     .properties(height=260)
                     .add_params(zoom)
@@ -1,4 +1,13 @@
+import html
+
 import streamlit as st
+from logic.data_loader import load_sandbox_index
+
+DIFF_STYLES = {
+    "equal": ("#f8fafc", "#475569", "&nbsp;"),
+    "removed": ("#fef2f2", "#991b1b", "−"),
+    "added": ("#f0fdf4", "#166534", "+"),
+}
 
 # def repair_page(df_topics, df_repairs):
 #     topic_id = st.session_state.get("selected_topic")
@@ -30,37 +39,24 @@ import streamlit as st
 #         st.session_state["page"] = "diagnostics"
 
 
-def render_repair(repairs_df, topic_id):
-    repair = repairs_df[repairs_df["topic_id"] == topic_id]
+def render_repair(repairs, topic_id):
+    """`repairs` is the load_repair_index() mapping; everything shown is preformatted."""
+    r = repairs.get(topic_id)
 
-    if repair.empty:
+    if r is None:
         st.info("No repair package available.")
         return
 
-    r = repair.iloc[0]
-
     with st.expander("View Repair Package", expanded=False):
         # Root Cause
         st.markdown("### 🔍 Root Cause")
-        st.markdown(
-            f"""
-            <div style="background: #fef2f2; border-left: 4px solid #dc2626; border-radius: 8px; padding: 1rem; margin: 0.5rem 0;">
-                <p style="margin: 0; font-size: 1rem; line-height: 1.6; color: #1e293b;">{r['root_cause']}</p>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        st.markdown(r["root_cause_html"], unsafe_allow_html=True)
         
         st.markdown("---")
         
         # Suggested Prompt Changes
         st.markdown("### 📝 Suggested Prompt Changes")
-        prompt_changes = r["suggested_prompt_changes"]
-        if isinstance(prompt_changes, list):
-            formatted_text = "\n".join(prompt_changes)
-        else:
-            formatted_text = prompt_changes
-        st.code(formatted_text, language=None)
+        st.code(r["prompt_changes_code"], language=None)
 
         st.markdown("---")
         
@@ -72,5 +68,47 @@ def render_repair(repairs_df, topic_id):
         
         # Guardrails
         st.markdown("### 🛡️ Guardrails")
-        for idx, g in enumerate(r["guardrail_rules"], 1):
-            st.markdown(f"{idx}. {g}")
+        if r["guardrails_markdown"]:
+            st.markdown(r["guardrails_markdown"])
+
+    render_sandbox_comparison(topic_id)
+
+
+def render_sandbox_comparison(topic_id):
+    """Baseline vs. repaired system prompt for the topic's sandbox case."""
+    case = load_sandbox_index().get(topic_id)
+    if case is None:
+        return
+
+    with st.expander("Compare Baseline vs. Repaired Prompt", expanded=False):
+        col_before, col_after = st.columns(2, gap="medium")
+        with col_before:
+            st.markdown("**Baseline system prompt**")
+            st.code(case.get("baseline_system_prompt", ""), language=None)
+        with col_after:
+            st.markdown("**Repaired system prompt**")
+            st.code(case.get("repaired_system_prompt", ""), language=None)
+
+        st.markdown("### 🔀 What Changed")
+        rows = []
+        for segment in case["prompt_diff"]:
+            background, color, marker = DIFF_STYLES[segment["op"]]
+            rows.append(
+                f'<div style="background: {background}; color: {color}; padding: 0.3rem 0.6rem; '
+                f'border-radius: 6px; margin: 0.15rem 0; font-size: 0.98rem;">'
+                f'<strong>{marker}</strong> {html.escape(segment["text"])}</div>'
+            )
+        st.markdown("".join(rows), unsafe_allow_html=True)
+
+        test_messages = case.get("test_user_messages") or []
+        if test_messages:
+            st.markdown("### 🧪 Test Messages")
+            for idx, message in enumerate(test_messages, 1):
+                st.markdown(f"{idx}. {message}")
+
+        examples = case.get("example_conversations") or []
+        if examples:
+            st.markdown("### 💬 Example Conversations")
+            for example in examples:
+                st.caption(f"{example.get('dataset', '')} · Conversation #{example.get('conv_id', '')}")
+                st.code(example.get("snippet", ""), language=None)
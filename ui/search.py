@@ -0,0 +1,69 @@
+import time
+
+import streamlit as st
+from logic.search import highlight, search, sync_search_index
+from ui.conversations import get_conversation, render_transcript
+
+MAX_HITS_SHOWN = 3
+
+
+def _get_search_index(turns_df):
+    """Session-scoped index, extended with appended turns and rebuilt when the store is reloaded."""
+    st.session_state.search_index = sync_search_index(st.session_state.get("search_index"), turns_df)
+    return st.session_state.search_index
+
+
+def render_search(turns_df):
+    st.markdown('<h1 class="page-header">🔎 Search Conversations</h1>', unsafe_allow_html=True)
+    st.caption('Find conversations by what was said. All words must match; use quotes for exact phrases, e.g. "table for 2".')
+
+    query = st.text_input("Search turn text", key="search_query", placeholder="refund, \"not helpful\", dentist ...")
+    if not query.strip():
+        return
+
+    index = _get_search_index(turns_df)
+    started = time.perf_counter()
+    found = search(index, turns_df, query)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not found["results"]:
+        st.info("No conversations match this search.")
+        return
+
+    st.caption(
+        f"{found['total_conversations']} conversations ({found['total_turns']} turns) matched in {elapsed_ms:.1f} ms"
+        + (f" · showing top {len(found['results'])}" if found["total_conversations"] > len(found["results"]) else "")
+    )
+
+    # Selected transcript, shown above the result list
+    selected = st.session_state.get("search_conv_id")
+    if selected is not None:
+        conv = get_conversation(turns_df, selected)
+        with st.container(border=True):
+            col_title, col_close = st.columns([5, 1])
+            with col_title:
+                st.markdown(f"**Conversation ID:** {selected}")
+            with col_close:
+                if st.button("Close", key="search_close"):
+                    st.session_state.search_conv_id = None
+                    st.rerun()
+            render_transcript(conv)
+
+    for result in found["results"]:
+        with st.container(border=True):
+            col_info, col_btn = st.columns([5, 1])
+            with col_info:
+                st.markdown(
+                    f"**Conversation ID:** {result['conv_id']} · {result['dataset']} · "
+                    f"{result['n_hits']} matching turn{'s' if result['n_hits'] != 1 else ''}"
+                )
+            with col_btn:
+                if st.button("View", key=f"search_view_{result['conv_id']}"):
+                    st.session_state.search_conv_id = result["conv_id"]
+                    st.rerun()
+
+            for hit in result["hits"][:MAX_HITS_SHOWN]:
+                speaker = "🧑 **User:**" if hit["speaker"] == "USER" else "🤖 **Assistant:**"
+                st.markdown(f"{speaker} {highlight(hit['text'], found['terms'])}", unsafe_allow_html=True)
+            if result["n_hits"] > MAX_HITS_SHOWN:
+                st.caption(f"+ {result['n_hits'] - MAX_HITS_SHOWN} more matching turns")
@@ -1,9 +1,11 @@
 import streamlit as st
 from ui.conversations import render_conversations
 from ui.repairs import render_repair
-from logic.aggregations import compute_severity_stats, infer_conversation_theme
+from logic.aggregations import build_topic_stats, infer_conversation_theme, topic_severity_stats
+from logic.artifacts import derived_table
+from logic.backends import get_aggregation_backend
 
-def render_topic_page(turns_df, topics_df, repairs_df, topic_id):
+def render_topic_page(turns_df, topics_df, repairs, topic_id):
     topic_rows = topics_df[topics_df["topic_id"] == topic_id]
     if topic_rows.empty:
         st.error("Topic not found or no data available for this topic.")
@@ -132,7 +134,11 @@ def render_topic_page(turns_df, topics_df, repairs_df, topic_id):
     st.markdown(f'<h1 class="page-header">{display_label}</h1>', unsafe_allow_html=True)
     st.markdown(f'<div class="topic-caption">{topic["example_reason"]}</div>', unsafe_allow_html=True)
 
-    severity = compute_severity_stats(topic_turns)
+    topic_stats = derived_table(turns_df, "topic_stats", build_topic_stats)
+    if topic_id in topic_stats.index:
+        severity = topic_severity_stats(topic_stats, topic_id)
+    else:
+        severity = get_aggregation_backend().compute_severity_stats(topic_turns)
 
     # Create informative box with the three key metrics
     st.markdown(
@@ -164,5 +170,5 @@ def render_topic_page(turns_df, topics_df, repairs_df, topic_id):
 
     st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
     st.markdown('<h2 class="section-subheader">🛠 Repair Package</h2>', unsafe_allow_html=True)
-    render_repair(repairs_df, topic_id)
+    render_repair(repairs, topic_id)
     st.markdown('</div>', unsafe_allow_html=True)
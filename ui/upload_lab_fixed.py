@@ -1,12 +1,18 @@
 import io
-import json
 import random
 import re
 from datetime import datetime
 
 import pandas as pd
 import streamlit as st
-from logic.aggregations import infer_conversation_theme
+from logic.aggregations import infer_conversation_theme, summarize_conversations, update_top_conversations
+from logic.artifacts import live_tables
+from logic.data_loader import append_turns, base_version
+from logic.dedup import sync_dedup_index
+from logic.sampling import extend_kpi_sample
+from logic.topic_assign import assign_topics, build_topic_centroids
+from logic.upload_cache import empty_upload_cache, get_or_parse, upload_digest
+from logic.upload_parser import parse_upload
 
 
 def _clean_topic_label(label: str) -> str:
@@ -16,27 +22,22 @@ def _clean_topic_label(label: str) -> str:
     return re.sub(r"^Topic\s*\d+\s*[:\-]\s*", "", str(label)).strip()
 
 
-def _parse_uploaded_conversation(data) -> list:
-    """Parse uploaded JSON/JSONL conversation data into turn records."""
-    turns = []
-    
-    if isinstance(data, list):
-        # JSON array format
-        for item in data:
-            if isinstance(item, dict) and "text" in item:
-                turns.append(item)
-    else:
-        # Try JSONL format (one JSON per line)
-        lines = data.strip().split('\n') if isinstance(data, str) else [data]
-        for line in lines:
-            try:
-                item = json.loads(line) if isinstance(line, str) else line
-                if isinstance(item, dict) and "text" in item:
-                    turns.append(item)
-            except:
-                continue
-    
-    return turns
+@st.cache_resource(max_entries=4)
+def _build_topic_model(data_version, _turns_df):
+    return build_topic_centroids(_turns_df)
+
+
+def topic_model(turns_df):
+    """
+    Centroid model for placing uploaded turns into topics, fit on the store the
+    session's uploads were appended to: the bundle's when it was built from that
+    store, else built once per data version and shared across sessions.
+    """
+    version, rows = base_version(turns_df)
+    model = (live_tables(version) or {}).get("topic_model")
+    if model is None:
+        model = _build_topic_model(version, turns_df.iloc[:rows])
+    return model
 
 
 def _add_conversation_to_data(turns: list):
@@ -91,7 +92,30 @@ def _add_conversation_to_data(turns: list):
     
     # Append to existing dataframe
     new_df = pd.DataFrame(new_records)
-    st.session_state.turns_df = pd.concat([st.session_state.turns_df, new_df], ignore_index=True)
+
+    # Place unlabeled failure turns into the existing topics (nearest centroid, no re-cluster)
+    to_assign = (new_df["topic_id"] == -1) & (new_df["speaker"] == "USER") & (new_df["low_satisfaction"] == True)
+    if to_assign.any():
+        assigned = assign_topics(topic_model(st.session_state.turns_df), new_df[to_assign])
+        matched = assigned[assigned["topic_id"] != -1]
+        new_df.loc[matched.index, "topic_id"] = matched["topic_id"]
+        new_df.loc[matched.index, "topic_label"] = matched["topic_label"]
+    previous_version = st.session_state.turns_df.attrs.get("data_version")
+    st.session_state.turns_df = append_turns(st.session_state.turns_df, new_df)
+    extend_kpi_sample(st.session_state.turns_df)
+
+    # Keep the cached top-50 ranking current without re-ranking the whole corpus
+    if st.session_state.get("top_conversations_version") == previous_version:
+        st.session_state.top_conversations = update_top_conversations(
+            st.session_state.top_conversations,
+            summarize_conversations(new_df),
+            limit=50
+        )
+        st.session_state.top_conversations_version = st.session_state.turns_df.attrs.get("data_version")
+
+    # Index the new conversation for near-duplicate detection
+    if st.session_state.get("dedup_index") is not None:
+        st.session_state.dedup_index = sync_dedup_index(st.session_state.dedup_index, st.session_state.turns_df)
     
     return True
 
@@ -148,16 +172,34 @@ def _analyze_uploaded_conversation(turns: list) -> dict:
     }
 
 
-def _read_uploaded_text(upload) -> str:
-    """Best-effort text extraction from csv/json/jsonl/txt uploads."""
-    name = upload.name.lower()
-    data = upload.read()
-    try:
-        content = data.decode("utf-8")
-    except Exception:
-        content = data.decode("latin-1", errors="ignore")
+def _get_parsed_upload(upload):
+    """
+    Parse an upload once: the file is hashed the first time it is seen and its
+    parsed form is served from the session's digest-keyed LRU on later reruns.
+    Returns (digest, parsed).
+    """
+    if "upload_parse_cache" not in st.session_state:
+        st.session_state.upload_parse_cache = empty_upload_cache()
+
+    file_key = st.session_state.get("upload_lab_file_key")
+    if file_key and file_key[0] == upload.file_id:
+        digest = file_key[1]
+    else:
+        digest = upload_digest(upload)
+        st.session_state.upload_lab_file_key = (upload.file_id, digest)
+
+    parsed = get_or_parse(st.session_state.upload_parse_cache, digest, lambda: parse_upload(upload))
+    return digest, parsed
+
 
-    return content
+def _show_parse_errors(parsed: dict):
+    """Per-line problems found while parsing; valid turns are still used."""
+    skipped = parsed["n_errors"]
+    with st.expander(f"⚠️ {skipped} record{'s' if skipped != 1 else ''} skipped while reading the file", expanded=not parsed["turns"]):
+        for line_no, message in parsed["errors"]:
+            st.markdown(f"- Line {line_no}: {message}")
+        if skipped > len(parsed["errors"]):
+            st.caption(f"+ {skipped - len(parsed['errors'])} more")
 
 
 def render_upload_lab():
@@ -211,6 +253,8 @@ def render_upload_lab():
         st.session_state.upload_lab_source = None
     if "upload_history" not in st.session_state:
         st.session_state.upload_history = []
+    if "added_upload_digests" not in st.session_state:
+        st.session_state.added_upload_digests = set()
     
     # Display upload history if exists
     if st.session_state.upload_history:
@@ -266,36 +310,36 @@ def render_upload_lab():
     st.divider()
     st.markdown("### 🔍 Analysis & Integration")
 
-    chosen_data = None
+    chosen_turns = []
     chosen_source = None
+    chosen_digest = None
+    already_added = False
     
     if upload is not None:
-        raw_content = _read_uploaded_text(upload)
         chosen_source = upload.name
-        try:
-            # Try to parse as JSON
-            chosen_data = json.loads(raw_content)
-        except:
-            try:
-                # Try JSONL format
-                lines = raw_content.strip().split('\n')
-                chosen_data = [json.loads(line) for line in lines if line.strip()]
-            except:
-                st.error("⚠️ Unable to parse file. Please upload valid JSON or JSONL format.")
-                chosen_data = None
+        chosen_digest, parsed = _get_parsed_upload(upload)
+        chosen_turns = parsed["turns"]
+        if parsed["n_errors"]:
+            _show_parse_errors(parsed)
+        if not chosen_turns:
+            st.error("⚠️ No valid conversation turns found in the uploaded data. Please upload valid JSON or JSONL format.")
+        elif chosen_digest in st.session_state.added_upload_digests:
+            # Same bytes as a conversation already added: adding it again would only duplicate it
+            already_added = True
+            st.info("ℹ️ This file was already added to the dashboard. Upload a different conversation to add more data.")
     
     col1, col2, col3 = st.columns([2, 1, 2])
     with col2:
         analyze_clicked = st.button(
             "🔍 Analyze & Add to Dashboard", 
             type="primary", 
-            disabled=not bool(chosen_data), 
+            disabled=not chosen_turns or already_added, 
             use_container_width=True
         )
 
-    if analyze_clicked and chosen_data:
-        # Parse conversation turns
-        turns = _parse_uploaded_conversation(chosen_data)
+    if analyze_clicked and chosen_turns and not already_added:
+        # Conversation turns parsed when the file was first seen
+        turns = chosen_turns
         
         if turns:
             # Analyze the conversation
@@ -309,6 +353,7 @@ def render_upload_lab():
                 st.session_state.upload_lab_source = chosen_source
                 st.session_state.upload_lab_turns = turns
                 st.session_state.upload_lab_ready = True
+                st.session_state.added_upload_digests.add(chosen_digest)
                 
                 # Add to upload history
                 upload_record = {